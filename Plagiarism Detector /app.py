@@ -1,10 +1,14 @@
 import os
-from flask import Flask, request, render_template
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import Flask, request, render_template, jsonify
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from dotenv import load_dotenv
 import openai
+from corpus import CorpusIndex
 
 load_dotenv()
 
@@ -17,37 +21,114 @@ models = {
     "openai": None # Initialize OpenAI client later if API key is available
 }
 
-def get_embedding(text, model_name):
-    if model_name.startswith("sentence-transformers"):
-        return models[model_name].encode(text)
-    elif model_name == "openai":
-        # Ensure OpenAI API key is set
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("OPENAI_API_KEY not set in environment variables.")
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+OPENAI_BATCH_SIZE = int(os.getenv("OPENAI_BATCH_SIZE", 512))        # Inputs per embeddings request
+OPENAI_BATCH_TOKENS = int(os.getenv("OPENAI_BATCH_TOKENS", 250000))  # Tokens per request, below the API's 300k limit
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))   # Texts per SentenceTransformer forward pass
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+
+# One OpenAI client (and its connection pool) shared by all requests
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+def get_openai_client():
+    global _openai_client
+    # Ensure OpenAI API key is set
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OPENAI_API_KEY not set in environment variables.")
+    with _openai_client_lock:
+        if _openai_client is None:
+            _openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _openai_client
+
+# Embeddings keyed on (model, sha256 of text), least recently used evicted first,
+# so re-checking a submission (e.g. at another threshold) embeds nothing again
+_embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+_token_encoding = None # False once tiktoken turned out to be unavailable
+
+def count_tokens(text):
+    """Tokens of text for the OpenAI model; a conservative estimate without tiktoken"""
+    global _token_encoding
+    if _token_encoding is None:
         try:
-            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            response = client.embeddings.create(input=[text], model="text-embedding-ada-002")
-            return response.data[0].embedding
+            import tiktoken
+            _token_encoding = tiktoken.encoding_for_model(OPENAI_EMBEDDING_MODEL)
         except Exception as e:
-            print(f"Error getting OpenAI embedding: {e}")
-            return None
-    return None
+            # Not installed, or its vocabulary could not be downloaded
+            print(f"Estimating OpenAI token counts without tiktoken: {e!r}")
+            _token_encoding = False
+    if _token_encoding is False:
+        return len(text.encode("utf-8")) // 3 + 1
+    return len(_token_encoding.encode(text, disallowed_special=()))
+
+def _openai_batches(texts):
+    """Consecutive slices of texts within OPENAI_BATCH_SIZE inputs and OPENAI_BATCH_TOKENS tokens"""
+    start, tokens = 0, 0
+    for end, text in enumerate(texts):
+        text_tokens = count_tokens(text)
+        if end > start and (end - start == OPENAI_BATCH_SIZE or tokens + text_tokens > OPENAI_BATCH_TOKENS):
+            yield texts[start:end]
+            start, tokens = end, 0
+        tokens += text_tokens
+    if start < len(texts):
+        yield texts[start:]
+
+def _compute_embeddings(texts, model_name):
+    if model_name.startswith("sentence-transformers"):
+        return np.asarray(models[model_name].encode(texts, batch_size=EMBEDDING_BATCH_SIZE), dtype=np.float32)
+    elif model_name == "openai":
+        client = get_openai_client()
+        embeddings = []
+        for batch in _openai_batches(texts):
+            response = client.embeddings.create(input=batch, model=OPENAI_EMBEDDING_MODEL)
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return np.array(embeddings, dtype=np.float32)
+    raise ValueError(f"Unknown model: {model_name}")
+
+def get_embeddings(texts, model_name):
+    """Embeddings of texts, computing only those not cached, in batched requests"""
+    keys = [(model_name, hashlib.sha256(text.encode("utf-8")).hexdigest()) for text in texts]
+    embeddings = {}
+    with _embedding_cache_lock:
+        for key in keys:
+            if key in _embedding_cache:
+                _embedding_cache.move_to_end(key)
+                embeddings[key] = _embedding_cache[key]
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in embeddings:
+            missing.setdefault(key, text)
+    if missing:
+        computed = _compute_embeddings(list(missing.values()), model_name)
+        with _embedding_cache_lock:
+            for key, embedding in zip(missing, computed):
+                embeddings[key] = embedding
+                _embedding_cache[key] = embedding
+                _embedding_cache.move_to_end(key)
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+    return np.array([embeddings[key] for key in keys])
+
+def get_embedding(text, model_name):
+    return get_embeddings([text], model_name)[0]
 
 def calculate_similarity_matrix(texts, selected_model):
-    embeddings = []
-    valid_texts = []
-    for text in texts:
-        embedding = get_embedding(text, selected_model)
-        if embedding is not None:
-            embeddings.append(embedding)
-            valid_texts.append(text)
+    try:
+        embeddings_array = get_embeddings(texts, selected_model)
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Error getting {selected_model} embeddings: {e}")
+        return None, []
     
-    if not embeddings:
+    if len(embeddings_array) == 0:
         return None, []
 
-    embeddings_array = np.array(embeddings)
     similarity_matrix = cosine_similarity(embeddings_array)
-    return similarity_matrix, valid_texts
+    return similarity_matrix, list(texts)
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -93,5 +174,91 @@ def index():
                            highlight_pairs=highlight_pairs,
                            error_message=error_message)
 
+# Corpus mode: one near-duplicate index per embedding model ("none" for lexical matching only)
+corpora = {}
+_corpora_lock = threading.Lock()
+
+def get_corpus(model_name):
+    with _corpora_lock:
+        if model_name not in corpora:
+            corpora[model_name] = CorpusIndex(
+                embed=None if model_name == "none" else lambda texts: get_embeddings(texts, model_name),
+                jaccard_threshold=float(os.getenv("CORPUS_JACCARD_THRESHOLD", 0.5)),
+                min_similarity=float(os.getenv("CORPUS_MIN_SIMILARITY", 0.5)),
+                neighbors=int(os.getenv("CORPUS_NEIGHBORS", 10))
+            )
+        return corpora[model_name]
+
+def _valid_document(document):
+    """A text, or an object with a string or integer id and a text"""
+    if isinstance(document, str):
+        return True
+    return (
+        isinstance(document, dict)
+        and isinstance(document.get('id'), (str, int)) and not isinstance(document.get('id'), bool)
+        and isinstance(document.get('text'), str)
+    )
+
+@app.route('/api/corpus', methods=['GET', 'POST', 'DELETE'])
+def corpus():
+    """
+    POST {"documents": [{"id": ..., "text": ...}] or [text, ...], "model": ..., "threshold": 0.8}
+    adds a batch to the model's corpus and returns the duplicate pairs involving it.
+    GET ?model=...&threshold=... returns all duplicate pairs, DELETE ?model=... clears the corpus.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': "Request body must be a JSON object"}), 400
+    else:
+        data = request.args
+    model_name = data.get('model', list(models.keys())[0])
+    if model_name not in models and model_name != "none":
+        return jsonify({'error': f"Unknown model: {model_name}"}), 400
+
+    if request.method == 'DELETE':
+        with _corpora_lock:
+            corpora.pop(model_name, None)
+        return jsonify({'model': model_name, 'documents': 0})
+
+    try:
+        threshold = float(data.get('threshold', 0.8))
+        jaccard_threshold = data.get('jaccard_threshold')
+        jaccard_threshold = None if jaccard_threshold is None else float(jaccard_threshold)
+    except (TypeError, ValueError):
+        return jsonify({'error': "threshold and jaccard_threshold must be numbers"}), 400
+
+    index = get_corpus(model_name)
+    if request.method == 'GET':
+        pairs = index.duplicates(threshold, jaccard_threshold)
+        return jsonify({'model': model_name, 'stats': index.stats, 'pairs': pairs})
+
+    documents = data.get('documents', [])
+    if not isinstance(documents, list) or not all(_valid_document(document) for document in documents):
+        return jsonify({'error': "documents must be a list of texts or of objects with an id and a text"}), 400
+
+    # Batches are indexed one at a time; their pairs are read before the next batch lands
+    with index.lock:
+        ids, texts = [], []
+        # Bare texts are numbered after the corpus, skipping ids already taken
+        taken = {document['id'] for document in documents if isinstance(document, dict)}
+        next_id = len(index.ids)
+        for document in documents:
+            if isinstance(document, str):
+                while next_id in index.positions or next_id in taken:
+                    next_id += 1
+                taken.add(next_id)
+                ids.append(next_id)
+                texts.append(document)
+            else:
+                ids.append(document['id'])
+                texts.append(document['text'])
+        try:
+            index.add(ids, texts)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        pairs = index.duplicates(threshold, jaccard_threshold, documents=ids)
+    return jsonify({'model': model_name, 'added': len(ids), 'stats': index.stats, 'pairs': pairs})
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
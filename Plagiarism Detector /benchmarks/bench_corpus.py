@@ -0,0 +1,114 @@
+"""
+Scaling benchmark for corpus-mode near-duplicate detection.
+
+First checks that MinHash estimates track the exact shingle Jaccard
+similarity on random document pairs (exiting non-zero if they don't). It then
+generates synthetic corpora of increasing size with planted near-duplicates
+(copies with some words replaced) and reports indexing time, candidate pairs
+checked, and recall of the planted pairs. Up to --brute-force-max documents
+it also times the all-pairs cosine similarity matrix for comparison.
+
+Embeddings come from hashed word counts projected to 256 dimensions, so no
+model download is needed; pass --model to use a sentence-transformers model.
+
+Usage (from the project directory):
+    python benchmarks/bench_corpus.py [--sizes 1000 10000 100000] [--model all-MiniLM-L6-v2] [--max-jaccard-sd 0.06]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from corpus import CorpusIndex, MinHashLSH, normalize, shingle_hashes
+
+def synthetic_corpus(size, duplicate_fraction=0.05, words=200, edits=20, seed=0):
+    """Texts and the (original, copy) index pairs planted among them"""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    originals = int(size * (1 - duplicate_fraction))
+    texts = [" ".join(rng.choice(vocabulary) for _ in range(words)) for _ in range(originals)]
+    planted = set()
+    while len(texts) < size:
+        source = rng.randrange(originals)
+        copy = texts[source].split()
+        for _ in range(edits):
+            copy[rng.randrange(len(copy))] = rng.choice(vocabulary)
+        texts.append(" ".join(copy))
+        planted.add((source, len(texts) - 1))
+    return texts, planted
+
+def jaccard_errors(pairs=150, seed=0):
+    """MinHash estimate minus exact shingle Jaccard similarity for random pairs of edited copies"""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(300)]
+    lsh = MinHashLSH()
+    errors = []
+    for _ in range(pairs):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(20, 300))]
+        copy = list(words)
+        for _ in range(rng.randint(0, len(copy))):
+            copy[rng.randrange(len(copy))] = rng.choice(vocabulary)
+        left, right = " ".join(words), " ".join(copy)
+        left_shingles, right_shingles = set(shingle_hashes(left).tolist()), set(shingle_hashes(right).tolist())
+        exact = len(left_shingles & right_shingles) / len(left_shingles | right_shingles)
+        estimate = (lsh.signature(left) == lsh.signature(right)).mean()
+        errors.append(estimate - exact)
+    return np.array(errors)
+
+def hashed_embedder(dimension=256, features=2 ** 14):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    vectorizer = HashingVectorizer(n_features=features, alternate_sign=False)
+    projection = np.random.RandomState(0).normal(size=(features, dimension)).astype(np.float32)
+    return lambda texts: vectorizer.transform(texts) @ projection
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus-mode near-duplicate detection")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--model', help="sentence-transformers model (default: hashed projections)")
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--brute-force-max', type=int, default=20000)
+    parser.add_argument('--max-jaccard-sd', type=float, default=0.06,
+                        help="largest acceptable sd of MinHash Jaccard estimates (about 0.044 at J=0.5 with 128 permutations)")
+    args = parser.parse_args()
+
+    errors = jaccard_errors()
+    print(f"MinHash Jaccard error over {len(errors)} pairs: mean {errors.mean():+.3f}  "
+          f"sd {errors.std():.3f}  max {np.abs(errors).max():.3f}")
+    if errors.std() > args.max_jaccard_sd:
+        sys.exit(f"MinHash estimates do not track the exact Jaccard similarity (sd > {args.max_jaccard_sd})")
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        embed = lambda texts: model.encode(texts, batch_size=64)
+    else:
+        embed = hashed_embedder()
+
+    for size in args.sizes:
+        texts, planted = synthetic_corpus(size)
+        index = CorpusIndex(embed=embed, min_similarity=args.threshold)
+        start = time.perf_counter()
+        for first in range(0, size, args.batch_size):
+            index.add(range(first, min(first + args.batch_size, size)), texts[first:first + args.batch_size])
+        elapsed = time.perf_counter() - start
+        found = {(pair['source'], pair['target']) for pair in index.duplicates(args.threshold)}
+        recall = len(found & planted) / len(planted) if planted else 1.0
+        candidates = index.stats['lexical_candidates'] + index.stats['semantic_candidates']
+        print(f"{size:>8} docs  index {elapsed:7.2f}s  {candidates} candidates "
+              f"({candidates / (size * (size - 1) / 2):.2e} of all pairs)  {len(found)} pairs  recall {recall:.3f}")
+
+        if size <= args.brute_force_max:
+            start = time.perf_counter()
+            embeddings = normalize(embed(texts))
+            similarities = embeddings @ embeddings.T
+            brute_pairs = int((np.triu(similarities, 1) >= args.threshold).sum())
+            print(f"{'':>8}       all pairs {time.perf_counter() - start:7.2f}s  {brute_pairs} pairs above threshold")
+
+if __name__ == '__main__':
+    main()
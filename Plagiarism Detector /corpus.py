@@ -0,0 +1,262 @@
+"""
+Near-duplicate detection over large document collections.
+
+The web form compares a handful of texts with a full similarity matrix.
+That is quadratic in the number of texts. CorpusIndex instead ingests
+documents in batches and generates candidate pairs from two indexes,
+reporting only pairs that pass a threshold:
+
+- MinHash-LSH over word shingles finds lexical (copy/paste) duplicates.
+  Documents whose estimated Jaccard similarity reaches jaccard_threshold
+  collide in at least one band with high probability.
+- A faiss HNSW index over normalized sentence embeddings finds semantic
+  (paraphrase) duplicates among each document's nearest neighbours.
+
+Each new document is compared only with the candidates these indexes
+return, so ingesting N documents costs roughly O(N log N) rather than
+O(N^2) comparisons.
+"""
+import re
+import threading
+import zlib
+import numpy as np
+
+EMPTY_HASH = 1 << 32 # Signature value of a document without words; above every 32-bit hash
+SHINGLE_BLOCK = 4096 # Shingles hashed against all permutations at once
+
+def _lsh_bands(threshold, num_perm):
+    """(bands, rows) whose collision threshold (1/bands)^(1/rows) is closest to threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+def shingle_hashes(text, shingle_size=5):
+    """32-bit hashes of the word shingle_size-grams of text (one shingle for shorter texts)"""
+    tokens = re.findall(r'\w+', text.lower())
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    token_hashes = np.array([zlib.crc32(token.encode('utf-8')) for token in tokens], dtype=np.uint64)
+    width = min(shingle_size, len(token_hashes))
+    count = len(token_hashes) - width + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(width):
+        # Polynomial rolling hash; uint64 arithmetic wraps
+        hashes = hashes * np.uint64(1000003) + token_hashes[offset:offset + count]
+    return np.unique(hashes & np.uint64(0xFFFFFFFF))
+
+class _GrowingArray:
+    """Rows appended in batches into a buffer that doubles as needed"""
+
+    def __init__(self, width, dtype):
+        self.data = np.zeros((1024, width), dtype=dtype)
+        self.size = 0
+
+    def extend(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            grown = np.zeros((max(needed, 2 * len(self.data)), self.data.shape[1]), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = rows
+        self.size = needed
+
+    def __getitem__(self, key):
+        return self.data[:self.size][key]
+
+class MinHashLSH:
+    """MinHash signatures of word shingles, banded into hash buckets"""
+
+    def __init__(self, threshold=0.5, num_perm=128, shingle_size=5, seed=1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Multiply-shift hashing of 32-bit shingle hashes: the top 32 bits of
+        # (a * x + b) mod 2^64, with a and b drawn over the full 64 bits
+        # (a odd), so each permutation orders the shingles independently
+        random_words = lambda: rng.randint(0, 1 << 32, size=(num_perm, 2), dtype=np.int64).astype(np.uint64)
+        high_low = random_words()
+        self.a = ((high_low[:, 0] << np.uint64(32)) | high_low[:, 1] | np.uint64(1))[:, None]
+        high_low = random_words()
+        self.b = ((high_low[:, 0] << np.uint64(32)) | high_low[:, 1])[:, None]
+        self.bands, self.rows = _lsh_bands(threshold, num_perm)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = _GrowingArray(num_perm, np.uint64)
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(len(self.a), EMPTY_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), SHINGLE_BLOCK):
+            block = hashes[start:start + SHINGLE_BLOCK][None, :]
+            # uint64 arithmetic wraps, which is the mod 2^64
+            signature = np.minimum(signature, ((self.a * block + self.b) >> np.uint64(32)).min(axis=1))
+        return signature
+
+    def add(self, texts):
+        """Index texts; returns candidate pairs (earlier position, new position)"""
+        first = self.signatures.size
+        self.signatures.extend(np.stack([self.signature(text) for text in texts]))
+        candidates = set()
+        for position in range(first, self.signatures.size):
+            signature = self.signatures[position]
+            if signature[0] == EMPTY_HASH:
+                # No words, nothing to match on
+                continue
+            for band, buckets in enumerate(self.buckets):
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                members = buckets.setdefault(key, [])
+                candidates.update((other, position) for other in members)
+                members.append(position)
+        return candidates
+
+    def jaccard(self, pairs):
+        """Estimated Jaccard similarity of each (i, j) position pair; 0 when either has no words"""
+        if not pairs:
+            return np.zeros(0)
+        left, right = np.array(pairs).T
+        left, right = self.signatures[left], self.signatures[right]
+        empty = (left[:, 0] == EMPTY_HASH) | (right[:, 0] == EMPTY_HASH)
+        return np.where(empty, 0.0, (left == right).mean(axis=1))
+
+class EmbeddingANN:
+    """Nearest neighbours by cosine similarity in a faiss HNSW index"""
+
+    def __init__(self, dimension, neighbors=10, hnsw_m=32, ef_search=64):
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("Semantic corpus search requires `pip install faiss-cpu`") from e
+        self.neighbors = neighbors
+        self.index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efSearch = max(ef_search, neighbors + 1)
+
+    def add(self, embeddings):
+        """Index embeddings; returns {(earlier position, new position): cosine} for their neighbours"""
+        first = self.index.ntotal
+        self.index.add(embeddings)
+        similarities, positions = self.index.search(embeddings, self.neighbors + 1)
+        neighbours = {}
+        for row, (row_similarities, row_positions) in enumerate(zip(similarities, positions)):
+            position = first + row
+            for similarity, other in zip(row_similarities, row_positions.tolist()):
+                if other < 0 or other == position:
+                    continue
+                neighbours[(min(other, position), max(other, position))] = float(similarity)
+        return neighbours
+
+    def cosine(self, pairs):
+        if not pairs:
+            return np.zeros(0)
+        left, right = np.array(pairs).T
+        return np.einsum('ij,ij->i', self.index.reconstruct_batch(left), self.index.reconstruct_batch(right))
+
+def normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+class CorpusIndex:
+    """
+    Incremental near-duplicate index over a document collection.
+
+    embed maps a list of texts to an (n, dim) embedding matrix; without it
+    only lexical (MinHash) duplicates are found. Pairs are kept when their
+    estimated Jaccard similarity reaches jaccard_threshold or their cosine
+    similarity reaches min_similarity. duplicates() then filters them by the
+    reporting thresholds.
+
+    add() and duplicates() hold lock; callers that need a batch and its
+    duplicates to be consistent can hold it (it is reentrant) around both.
+    """
+
+    def __init__(self, embed=None, jaccard_threshold=0.5, min_similarity=0.5, num_perm=128,
+                 shingle_size=5, neighbors=10):
+        self.embed = embed
+        self.jaccard_threshold = jaccard_threshold
+        self.min_similarity = min_similarity
+        self.neighbors = neighbors
+        self.lsh = MinHashLSH(jaccard_threshold, num_perm, shingle_size)
+        self.ann = None
+        self.ids = []
+        self.positions = {}
+        self.pairs = {} # (i, j) positions -> (jaccard, cosine or None)
+        self.stats = {'documents': 0, 'lexical_candidates': 0, 'semantic_candidates': 0}
+        self.lock = threading.RLock()
+
+    def add(self, ids, texts):
+        """Index a batch of documents; returns the duplicate pairs it introduced"""
+        with self.lock:
+            return self._add(list(ids), list(texts))
+
+    def _add(self, ids, texts):
+        if not texts:
+            return []
+        if len(ids) != len(texts):
+            raise ValueError("ids and texts differ in length")
+        batch_ids = set()
+        for doc_id in ids:
+            if doc_id in self.positions or doc_id in batch_ids:
+                raise ValueError(f"Duplicate document id: {doc_id}")
+            batch_ids.add(doc_id)
+        # Embed before touching any index, so a failed batch leaves the corpus unchanged
+        embeddings = normalize(self.embed(texts)) if self.embed is not None else None
+
+        for doc_id in ids:
+            self.positions[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+        self.stats['documents'] += len(texts)
+
+        lexical = self.lsh.add(texts)
+        self.stats['lexical_candidates'] += len(lexical)
+        semantic = {}
+        if embeddings is not None:
+            if self.ann is None:
+                self.ann = EmbeddingANN(embeddings.shape[1], self.neighbors)
+            semantic = self.ann.add(embeddings)
+            self.stats['semantic_candidates'] += len(semantic)
+
+        candidates = sorted(lexical | set(semantic))
+        jaccard = self.lsh.jaccard(candidates)
+        missing = [pair for pair in candidates if pair not in semantic]
+        if self.ann is not None:
+            semantic.update(zip(missing, self.ann.cosine(missing).tolist()))
+
+        new_pairs = []
+        for pair, pair_jaccard in zip(candidates, jaccard.tolist()):
+            cosine = semantic.get(pair)
+            if pair_jaccard >= self.jaccard_threshold or (cosine is not None and cosine >= self.min_similarity):
+                self.pairs[pair] = (pair_jaccard, cosine)
+                new_pairs.append(pair)
+        return [self._record(pair) for pair in new_pairs]
+
+    def _record(self, pair):
+        jaccard, cosine = self.pairs[pair]
+        return {
+            'source': self.ids[pair[0]],
+            'target': self.ids[pair[1]],
+            'jaccard': round(jaccard, 4),
+            'cosine': None if cosine is None else round(cosine, 4)
+        }
+
+    def duplicates(self, threshold=0.8, jaccard_threshold=None, documents=None):
+        """
+        Pairs whose cosine similarity reaches threshold or whose Jaccard
+        similarity reaches jaccard_threshold, optionally only those involving
+        the ids in documents.
+        """
+        jaccard_threshold = self.jaccard_threshold if jaccard_threshold is None else jaccard_threshold
+        results = []
+        with self.lock:
+            positions = None if documents is None else {self.positions[doc_id] for doc_id in documents}
+            for pair, (jaccard, cosine) in sorted(self.pairs.items()):
+                if positions is not None and pair[0] not in positions and pair[1] not in positions:
+                    continue
+                lexical = jaccard >= jaccard_threshold
+                semantic = cosine is not None and cosine >= threshold
+                if lexical or semantic:
+                    record = self._record(pair)
+                    record['match'] = 'both' if lexical and semantic else 'lexical' if lexical else 'semantic'
+                    results.append(record)
+        return results
@@ -0,0 +1,95 @@
+"""
+Find near-duplicate documents in a corpus.
+
+The corpus is a directory of .txt files (ids are their relative paths) or a
+JSONL file with one {"id": ..., "text": ...} object per line. Documents are
+read and indexed in batches, so memory grows with the index rather than the
+corpus text. Duplicate pairs are written as JSONL.
+
+Usage:
+    python detect_duplicates.py CORPUS [--output pairs.jsonl] [--model all-MiniLM-L6-v2 | none]
+                                [--threshold 0.8] [--jaccard-threshold 0.5] [--batch-size 1000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from corpus import CorpusIndex
+
+def read_corpus(path, text_field='text', id_field='id'):
+    """(id, text) pairs from a directory of .txt files or a JSONL file"""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith('.txt'):
+                    file_path = os.path.join(root, name)
+                    with open(file_path, encoding='utf-8', errors='replace') as f:
+                        yield os.path.relpath(file_path, path), f.read()
+        return
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if line.strip():
+                document = json.loads(line)
+                yield document.get(id_field, line_number), document[text_field]
+
+def batches(documents, batch_size):
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate documents in a corpus")
+    parser.add_argument('corpus', help="directory of .txt files or a JSONL file")
+    parser.add_argument('--output', help="JSONL file for duplicate pairs (default: stdout)")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2',
+                        help="sentence-transformers model for semantic matching, or 'none' for lexical matching only")
+    parser.add_argument('--threshold', type=float, default=0.8, help="cosine similarity of semantic duplicates")
+    parser.add_argument('--jaccard-threshold', type=float, default=0.5, help="shingle Jaccard similarity of lexical duplicates")
+    parser.add_argument('--shingle-size', type=int, default=5, help="words per shingle")
+    parser.add_argument('--num-perm', type=int, default=128, help="MinHash permutations")
+    parser.add_argument('--neighbors', type=int, default=10, help="nearest neighbours checked per document")
+    parser.add_argument('--batch-size', type=int, default=1000, help="documents indexed per batch")
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', default='id')
+    args = parser.parse_args()
+
+    embed = None
+    if args.model != 'none':
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        embed = lambda texts: model.encode(texts, batch_size=64)
+
+    index = CorpusIndex(
+        embed=embed,
+        jaccard_threshold=args.jaccard_threshold,
+        min_similarity=args.threshold,
+        num_perm=args.num_perm,
+        shingle_size=args.shingle_size,
+        neighbors=args.neighbors
+    )
+    start = time.perf_counter()
+    for batch in batches(read_corpus(args.corpus, args.text_field, args.id_field), args.batch_size):
+        ids, texts = zip(*batch)
+        index.add(ids, texts)
+        print(f"Indexed {index.stats['documents']} documents ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    pairs = index.duplicates(args.threshold, args.jaccard_threshold)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for pair in pairs:
+            output.write(json.dumps(pair) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    print(f"{len(pairs)} duplicate pairs; {index.stats['lexical_candidates']} lexical and "
+          f"{index.stats['semantic_candidates']} semantic candidates checked", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
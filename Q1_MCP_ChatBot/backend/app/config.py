@@ -13,3 +13,10 @@ URLS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "Q1_M
 
 # Directory to store vector DB and ingested data
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Hybrid retrieval settings
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Local cross-encoder used to rerank fused candidates; empty disables reranking
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")
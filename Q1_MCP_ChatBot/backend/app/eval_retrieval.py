@@ -0,0 +1,81 @@
+"""
+Report retrieval quality and latency of each retrieval mode on a fixed
+question set.
+
+Usage (from the backend directory, after ingestion):
+    python -m app.eval_retrieval [--questions eval/retrieval_questions.json] [--k 3]
+
+A question counts as a hit when any of the top-k documents has a source URL
+containing one of its expected source substrings.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+from .config import RETRIEVAL_K
+from .vector_store import get_vector_store
+from .retrieval import HybridRetriever, load_bm25_index, load_reranker
+
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "eval", "retrieval_questions.json")
+
+def first_hit_rank(docs, expected_sources):
+    """1-based rank of the first relevant document, or None."""
+    for rank, doc in enumerate(docs, start=1):
+        source = doc.metadata.get("source", "")
+        if any(expected in source for expected in expected_sources):
+            return rank
+    return None
+
+def evaluate(retriever, questions):
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for item in questions:
+        start = time.perf_counter()
+        docs = retriever.invoke(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        rank = first_hit_rank(docs, item["expected_sources"])
+        if rank is not None:
+            hits += 1
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {
+        "hit_rate": hits / len(questions),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate MCP chatbot retrieval modes")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K)
+    args = parser.parse_args()
+
+    with open(args.questions) as f:
+        questions = json.load(f)
+
+    store = get_vector_store()
+    bm25_index = load_bm25_index()
+    reranker = load_reranker()
+
+    modes = {
+        "vector": HybridRetriever(vector_store=store, k=args.k, use_bm25=False),
+        "bm25": HybridRetriever(vector_store=store, bm25_index=bm25_index, k=args.k, use_vector=False),
+        "hybrid": HybridRetriever(vector_store=store, bm25_index=bm25_index, k=args.k),
+    }
+    if reranker is not None:
+        modes["hybrid+rerank"] = HybridRetriever(
+            vector_store=store, bm25_index=bm25_index, reranker=reranker, k=args.k
+        )
+    if bm25_index is None:
+        print("No BM25 index found; run ingestion first. Reporting vector mode only.")
+        modes = {"vector": modes["vector"]}
+
+    print(f"{len(questions)} questions, k={args.k}")
+    print(f"{'mode':<15}{'hit@k':>8}{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, retriever in modes.items():
+        report = evaluate(retriever, questions)
+        print(f"{name:<15}{report['hit_rate']:>8.2f}{report['mrr']:>8.2f}"
+              f"{report['p50_ms']:>10.1f}{report['p95_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
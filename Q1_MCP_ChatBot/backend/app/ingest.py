@@ -4,7 +4,8 @@ from lxml import etree
 from tqdm import tqdm
 from langchain_community.document_loaders import SitemapLoader
 from .config import URLS_FILE, DATA_DIR
-from .vector_store import get_vector_store, save_vector_store
+from .vector_store import get_vector_store, save_vector_store, get_all_documents
+from .retrieval import build_bm25_index, save_bm25_index
 
 def get_sitemap_urls(sitemap_url):
     try:
@@ -94,6 +95,9 @@ def run_ingestion():
             
             print("Saving vector store...")
             save_vector_store(store)
+
+            print("Building BM25 index...")
+            save_bm25_index(build_bm25_index(get_all_documents(store)))
             
             print(f"Successfully ingested {len(docs)} documents.")
         except Exception as e:
@@ -1,9 +1,12 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import json
 from . import rag_chain, ingest
-from .rag_chain import answer_question
+from .rag_chain import answer_question, stream_answer
 from .vector_store import get_document_count
 
 app = FastAPI(title="MCP Chatbot API")
@@ -46,8 +49,8 @@ async def ask_question(request: QuestionRequest):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
         
-    # Get answer and sources
-    answer, sources = answer_question(request.question)
+    # Get answer and sources without blocking the event loop
+    answer, sources = await run_in_threadpool(answer_question, request.question)
     
     # Convert sources to list if it's a string
     if isinstance(sources, str):
@@ -58,6 +61,32 @@ async def ask_question(request: QuestionRequest):
         sources=sources
     )
 
+def sse_event(event: str, data) -> str:
+    """Format a single Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question about MCP and stream the answer as Server-Sent Events.
+
+    Emits `token` events while the answer is generated, then a trailing
+    `sources` event (or `error`), and finally `done`.
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    async def event_stream():
+        async for kind, payload in stream_answer(request.question):
+            yield sse_event(kind, payload)
+        yield sse_event("done", None)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/ingest")
 def ingest_endpoint():
     """
@@ -65,6 +94,7 @@ def ingest_endpoint():
     """
     try:
         ingest.run_ingestion()
+        rag_chain.reload_bm25_index()
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,12 @@
 from .vector_store import get_vector_store, get_document_count
 from .config import OPENAI_API_KEY, MODEL_NAME
+from .retrieval import HybridRetriever, load_bm25_index, load_reranker
 from langchain_openai import ChatOpenAI
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import Dict, List, Tuple, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import AsyncIterator, Dict, List, Tuple, Optional
+import asyncio
 import logging
 import re
 
@@ -42,27 +44,6 @@ def is_mcp_related(question: str) -> bool:
     question_lower = question.lower()
     return any(keyword in question_lower for keyword in mcp_keywords)
 
-def truncate_documents(docs: List[dict], max_length: int = 4000) -> str:
-    """Truncate and combine documents to fit within token limit."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=100,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    
-    combined_text = ""
-    for doc in docs:
-        if len(combined_text) + len(doc.page_content) > max_length:
-            remaining_length = max_length - len(combined_text)
-            if remaining_length > 0:
-                # Add a portion of the next document if space allows
-                combined_text += doc.page_content[:remaining_length]
-            break
-        combined_text += doc.page_content + "\n\n"
-    
-    return combined_text
-
 # Initialize LLM with better settings for technical Q&A
 llm = ChatOpenAI(
     openai_api_key=OPENAI_API_KEY,
@@ -72,13 +53,13 @@ llm = ChatOpenAI(
     streaming=True
 )
 
-# Build RAG pipeline
+# Build RAG pipeline: vector + BM25 candidates fused with RRF, optionally reranked,
+# so only the top k documents need to be stuffed into the prompt
 store = get_vector_store()
-retriever = store.as_retriever(
-    search_kwargs={
-        "k": 3,  # Reduced from 4 to 3 for context length
-        "fetch_k": 5  # Reduced from 8 to 5
-    }
+retriever = HybridRetriever(
+    vector_store=store,
+    bm25_index=load_bm25_index(),
+    reranker=load_reranker(),
 )
 prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["context", "question"])
 
@@ -93,6 +74,51 @@ qa_chain = RetrievalQA.from_chain_type(
     }
 )
 
+def reload_bm25_index() -> None:
+    """Swap in the BM25 index saved by the latest ingestion run."""
+    retriever.bm25_index = load_bm25_index()
+    logger.info("Reloaded BM25 index")
+
+class QueueCallbackHandler(BaseCallbackHandler):
+    """Forward streamed LLM tokens from the worker thread to an asyncio queue."""
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self.queue = queue
+        self.loop = loop
+
+    def put(self, kind: str, payload) -> None:
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (kind, payload))
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            self.put("token", token)
+
+def check_question(question: str) -> Optional[str]:
+    """
+    Return a canned reply when the question cannot be answered from the
+    vector store, or None when the RAG chain should run.
+    """
+    if not is_mcp_related(question):
+        return "I can only answer questions related to the Model Context Protocol (MCP). Please rephrase your question to focus on MCP-specific topics."
+
+    doc_count = get_document_count()
+    logger.info(f"Current document count in vector store: {doc_count}")
+
+    if doc_count == 0:
+        logger.warning("No documents found in vector store!")
+        return "I apologize, but I don't have any MCP documentation loaded yet. Please run the ingestion process first."
+
+    return None
+
+def extract_sources(result: Dict) -> List[str]:
+    """Collect the source URLs of the documents returned by the chain."""
+    sources = []
+    for doc in result.get("source_documents", []):
+        meta = doc.metadata
+        if "source" in meta:
+            sources.append(meta["source"])
+    return sources
+
 def format_sources(sources: List[str]) -> str:
     """Format source URLs into a markdown list with deduplication."""
     unique_sources = list(dict.fromkeys(sources))[:3]  # Limit to top 3 sources
@@ -110,27 +136,14 @@ def answer_question(question: str) -> Tuple[str, Optional[str]]:
     Returns: (answer, formatted_sources)
     """
     try:
-        # Check if question is MCP-related
-        if not is_mcp_related(question):
-            return ("I can only answer questions related to the Model Context Protocol (MCP). Please rephrase your question to focus on MCP-specific topics.", None)
-
-        # Check if we have documents in the vector store
-        doc_count = get_document_count()
-        logger.info(f"Current document count in vector store: {doc_count}")
-        
-        if doc_count == 0:
-            logger.warning("No documents found in vector store!")
-            return ("I apologize, but I don't have any MCP documentation loaded yet. Please run the ingestion process first.", None)
+        # Check if question is MCP-related and documents are loaded
+        refusal = check_question(question)
+        if refusal:
+            return (refusal, None)
 
-        # Get answer from RAG chain
+        # Get answer from RAG chain (the chain runs the retriever itself)
         logger.info(f"Retrieving documents for question: {question}")
-        
-        # Get documents and truncate them to fit context window
-        docs = retriever.get_relevant_documents(question)
-        truncated_context = truncate_documents(docs)
-        
-        # Get answer using truncated context
-        result = qa_chain({"query": question, "context": truncated_context})
+        result = qa_chain({"query": question})
         
         # Log retrieved documents
         logger.info("Retrieved documents:")
@@ -142,11 +155,7 @@ def answer_question(question: str) -> Tuple[str, Optional[str]]:
         answer = result["result"]
         
         # Extract and format sources
-        sources = []
-        for doc in result.get("source_documents", []):
-            meta = doc.metadata
-            if "source" in meta:
-                sources.append(meta["source"])
+        sources = extract_sources(result)
         
         formatted_sources = format_sources(sources) if sources else None
         logger.info(f"Number of sources found: {len(sources) if sources else 0}")
@@ -163,3 +172,44 @@ def answer_question(question: str) -> Tuple[str, Optional[str]]:
         logger.error(f"Error in answer_question: {str(e)}", exc_info=True)
         error_msg = f"An error occurred while processing your question: {str(e)}"
         return error_msg, None
+
+async def stream_answer(question: str) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Stream the answer to a question as ("token", str) events followed by a
+    trailing ("sources", list) event. On failure a single ("error", str)
+    event is emitted instead of the sources.
+
+    The blocking RetrievalQA chain runs in the default executor so that
+    concurrent requests do not serialize on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    handler = QueueCallbackHandler(queue, loop)
+
+    def run_chain() -> None:
+        try:
+            refusal = check_question(question)
+            if refusal:
+                handler.put("token", refusal)
+                handler.put("sources", [])
+                return
+
+            logger.info(f"Streaming answer for question: {question}")
+            result = qa_chain({"query": question}, callbacks=[handler])
+            sources = list(dict.fromkeys(extract_sources(result)))[:3]
+            logger.info(f"Number of sources found: {len(sources)}")
+            handler.put("sources", sources)
+        except Exception as e:
+            logger.error(f"Error in stream_answer: {str(e)}", exc_info=True)
+            handler.put("error", f"An error occurred while processing your question: {str(e)}")
+        finally:
+            handler.put("done", None)
+
+    # If the client disconnects the worker simply runs to completion; its
+    # remaining events are dropped with the queue.
+    loop.run_in_executor(None, run_chain)
+    while True:
+        kind, payload = await queue.get()
+        if kind == "done":
+            break
+        yield kind, payload
@@ -0,0 +1,139 @@
+import os
+import pickle
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from rank_bm25 import BM25Okapi
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from .config import DATA_DIR, RETRIEVAL_K, RETRIEVAL_FETCH_K, RRF_K, RERANKER_MODEL
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_PATH = os.path.join(DATA_DIR, "bm25_index.pkl")
+
+# Identifiers such as `tools/list`, `mcp.server.fastmcp` or `max_tokens` are kept
+# whole so exact lookups match, and their parts are indexed as well.
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[./:-][a-z0-9_]+)*")
+SUBTOKEN_PATTERN = re.compile(r"[./:_-]")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenizer that preserves dotted/slashed identifiers."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = [part for part in SUBTOKEN_PATTERN.split(token) if part]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+def doc_key(doc: Document) -> Tuple[Optional[str], str]:
+    """Identity of a document shared by the vector and BM25 result lists."""
+    return doc.metadata.get("source"), doc.page_content
+
+class BM25Index:
+    """
+    In-memory BM25 index over the same documents stored in the vector DB.
+    """
+
+    def __init__(self, documents: List[Document]):
+        self.documents = documents
+        self.bm25 = BM25Okapi([tokenize(doc.page_content) for doc in documents])
+
+    def search(self, query: str, k: int) -> List[Document]:
+        """Return up to k documents with a positive BM25 score, best first."""
+        tokens = tokenize(query)
+        if not tokens or not self.documents:
+            return []
+        scores = self.bm25.get_scores(tokens)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.documents[i] for i in top if scores[i] > 0]
+
+def build_bm25_index(documents: List[Document]) -> BM25Index:
+    """Build a BM25 index, skipping the placeholder used to seed an empty store."""
+    documents = [doc for doc in documents if doc.page_content != "placeholder"]
+    print(f"Building BM25 index over {len(documents)} documents")
+    return BM25Index(documents)
+
+def save_bm25_index(index: BM25Index):
+    """Persist the BM25 index next to the vector DB."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = BM25_INDEX_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(index, f)
+    os.replace(tmp_path, BM25_INDEX_PATH)
+    print(f"BM25 index saved to {BM25_INDEX_PATH}")
+
+def load_bm25_index() -> Optional[BM25Index]:
+    """Load the BM25 index, or None when ingestion has not built one yet."""
+    if not os.path.exists(BM25_INDEX_PATH):
+        logger.warning("No BM25 index found; falling back to vector-only retrieval")
+        return None
+    try:
+        with open(BM25_INDEX_PATH, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.error(f"Error loading BM25 index: {str(e)}")
+        return None
+
+def load_reranker(model_name: str = RERANKER_MODEL):
+    """Load the optional local cross-encoder reranker."""
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.warning("sentence-transformers is not installed; reranking disabled")
+        return None
+    logger.info(f"Loading reranker model {model_name}")
+    return CrossEncoder(model_name, max_length=512)
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], rrf_k: int = RRF_K) -> List[Document]:
+    """
+    Merge ranked document lists with reciprocal-rank fusion:
+    score(d) = sum(1 / (rrf_k + rank)) over every list containing d.
+    """
+    scores: Dict[Tuple[Optional[str], str], float] = {}
+    docs: Dict[Tuple[Optional[str], str], Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked]
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that fuses vector similarity and BM25 results with RRF and
+    optionally reranks the fused candidates with a local cross-encoder.
+    """
+
+    vector_store: Any
+    bm25_index: Optional[Any] = None
+    reranker: Optional[Any] = None
+    k: int = RETRIEVAL_K
+    fetch_k: int = RETRIEVAL_FETCH_K
+    rrf_k: int = RRF_K
+    use_vector: bool = True
+    use_bm25: bool = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        result_lists = []
+        if self.use_vector:
+            result_lists.append(self.vector_store.similarity_search(query, k=self.fetch_k))
+        if self.use_bm25 and self.bm25_index is not None:
+            result_lists.append(self.bm25_index.search(query, self.fetch_k))
+
+        candidates = reciprocal_rank_fusion(result_lists, self.rrf_k)
+        if self.reranker is not None and len(candidates) > 1:
+            scores = self.reranker.predict([(query, doc.page_content) for doc in candidates])
+            order = np.argsort(-np.asarray(scores))
+            candidates = [candidates[i] for i in order]
+        return candidates[:self.k]
@@ -1,6 +1,7 @@
 import os
 from langchain_community.vectorstores import FAISS, Chroma
 from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
 from .config import DATA_DIR, VECTOR_DB_TYPE, OPENAI_API_KEY
 
 if not OPENAI_API_KEY:
@@ -60,6 +61,22 @@ def save_vector_store(store):
         print(f"Error saving vector store: {str(e)}")
         raise
 
+def get_all_documents(store):
+    """
+    Return every document held by the vector store, so that sparse indexes
+    can be built over exactly the same corpus.
+    """
+    if VECTOR_DB_TYPE == "faiss":
+        return list(store.docstore._dict.values())
+    elif VECTOR_DB_TYPE == "chroma":
+        data = store.get(include=["documents", "metadatas"])
+        return [
+            Document(page_content=text, metadata=meta or {})
+            for text, meta in zip(data["documents"], data["metadatas"])
+        ]
+    else:
+        raise ValueError(f"Unsupported VECTOR_DB_TYPE: {VECTOR_DB_TYPE}")
+
 def get_document_count():
     """
     Get the number of documents in the vector store.
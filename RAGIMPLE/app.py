@@ -1,147 +1,405 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import PyPDF2
+from collections import OrderedDict
+import hashlib
 import io
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+import tracemalloc
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import sent_tokenize, NLTKWordTokenizer
+import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
 app = Flask(__name__, static_folder='.')
 CORS(app) # Enable CORS for all routes
 
+# Per-chunk diagnostics are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
+
 # Download necessary NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
 except Exception:
     nltk.download('punkt')
 
+def iter_pdf_pages(pdf_file):
+    """Text of each page, extracted as it is read"""
+    reader = PyPDF2.PdfReader(pdf_file)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
 def extract_text_from_pdf(pdf_file):
-    text = ""
     try:
-        reader = PyPDF2.PdfReader(pdf_file)
-        for page_num in range(len(reader.pages)):
-            text += reader.pages[page_num].extract_text() or ""
+        return "".join(iter_pdf_pages(pdf_file))
     except Exception as e:
         print(f"Error extracting text: {e}")
         return None
-    return text
+
+# Sentence and word spans of recently chunked texts, keyed by content hash, so
+# strategies and repeated requests on one document tokenize it once
+SPAN_CACHE_SIZE = int(os.getenv('SPAN_CACHE_SIZE', '16'))
+_span_cache = OrderedDict()
+_span_cache_lock = threading.Lock()
+_word_tokenizer = NLTKWordTokenizer()
+
+def _cached_spans(text, kind, compute):
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    with _span_cache_lock:
+        entry = _span_cache.get(key)
+        if entry is not None:
+            _span_cache.move_to_end(key)
+            if kind in entry:
+                return entry[kind]
+    spans = compute(text)
+    with _span_cache_lock:
+        _span_cache.setdefault(key, {})[kind] = spans
+        _span_cache.move_to_end(key)
+        while len(_span_cache) > SPAN_CACHE_SIZE:
+            _span_cache.popitem(last=False)
+    return spans
+
+def clear_span_cache():
+    with _span_cache_lock:
+        _span_cache.clear()
+
+def _sentence_spans(text):
+    # Punkt returns slices of the text, so each sentence is found after the previous one
+    spans = []
+    cursor = 0
+    for sentence in sent_tokenize(text):
+        start = text.find(sentence, cursor)
+        if start == -1:
+            raise ValueError("Sentence tokenizer output does not align with the text")
+        cursor = start + len(sentence)
+        spans.append((start, cursor))
+    return spans
+
+def _word_spans(text):
+    # Tokenizes within sentences like word_tokenize, but keeps offsets instead of rewritten tokens
+    spans = []
+    for sentence_start, sentence_end in sentence_spans(text):
+        spans.extend(
+            (sentence_start + start, sentence_start + end)
+            for start, end in _word_tokenizer.span_tokenize(text[sentence_start:sentence_end])
+        )
+    return spans
+
+def sentence_spans(text):
+    """(start, end) character offsets of each sentence of text"""
+    return _cached_spans(text, 'sentences', _sentence_spans)
+
+def word_spans(text):
+    """(start, end) character offsets of each word_tokenize token of text"""
+    return _cached_spans(text, 'words', _word_spans)
 
 def chunk_fixed_size(text, chunk_size, overlap):
-    words = word_tokenize(text)
+    words = word_spans(text)
     chunks = []
     i = 0
     while i < len(words):
         chunk = words[i:i + chunk_size]
+        start, end = chunk[0][0], chunk[-1][1]
         chunks.append({
-            "text": " ".join(chunk),
-            "metadata": {"size": len(chunk), "overlap": overlap}
+            "text": text[start:end],
+            "metadata": {"size": len(chunk), "overlap": overlap, "start": start, "end": end}
         })
         i += chunk_size - overlap
     return chunks
 
 def chunk_sentence_based(text):
-    sentences = sent_tokenize(text)
     chunks = []
-    for i, sentence in enumerate(sentences):
+    for i, (start, end) in enumerate(sentence_spans(text)):
         chunks.append({
-            "text": sentence,
-            "metadata": {"type": "sentence", "index": i}
+            "text": text[start:end],
+            "metadata": {"type": "sentence", "index": i, "start": start, "end": end}
         })
     return chunks
 
-def chunk_recursive(text, max_chunk_size=500, overlap=50):
-    print(f"[chunk_recursive] text length: {len(text)}, max_chunk_size: {max_chunk_size}, overlap: {overlap}")
+# Separator levels for chunk_recursive, coarsest first; a level may list alternatives
+DEFAULT_SEPARATORS = (('.',), ('\n',))
+HIERARCHY_SEPARATORS = (('\n\n',), ('\n',), ('. ', '? ', '! '), (' ',))
+SEPARATOR_PRESETS = {'default': DEFAULT_SEPARATORS, 'hierarchy': HIERARCHY_SEPARATORS}
+
+def _last_separator_end(text, separators, start, end):
+    """End offset of the last occurrence of any of separators in text[start:end], or -1"""
+    best = -1
+    for separator in separators:
+        position = text.rfind(separator, start, end)
+        if position != -1:
+            best = max(best, position + len(separator))
+    return best
+
+def chunk_recursive(text, max_chunk_size=500, overlap=50, separators=None, min_fraction=0.5):
+    """
+    Split text into chunks of at most max_chunk_size characters, each ending
+    at the last separator in its window, with overlap characters shared by
+    consecutive chunks.
+
+    Separator levels are tried from coarsest to finest. With the default
+    separators ('.' then newline) the first level present in the window
+    decides, and a split shorter than min_fraction of a full window falls back
+    to a hard cut; this is the original behaviour. With custom separators
+    (e.g. HIERARCHY_SEPARATORS: paragraph, line, sentence, word) a level whose
+    split would be that short is skipped in favour of the next, finer one,
+    and a remainder that fits in one chunk is kept whole as the last chunk.
+
+    Windows are searched in place by offset; only emitted chunks are copied.
+    """
+    skip_short_splits = separators is not None
+    separators = DEFAULT_SEPARATORS if separators is None else separators
+    min_length = max_chunk_size * min_fraction
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(f"[chunk_recursive] text length: {len(text)}, max_chunk_size: {max_chunk_size}, overlap: {overlap}")
     chunks = []
     start_index = 0
     text_len = len(text)
 
     while start_index < text_len:
-        # Determine the end of the potential chunk
-        end_index_candidate = min(start_index + max_chunk_size, text_len)
-        
-        # Get the segment to find a natural split point
-        segment_to_search = text[start_index:end_index_candidate]
-        
-        split_at = -1 # Index relative to start_index
-        
-        # Try to find a natural split point (e.g., end of a sentence or paragraph)
-        # Search backwards from the end of the segment
-        last_dot = segment_to_search.rfind('.', 0, len(segment_to_search))
-        if last_dot != -1:
-            split_at = last_dot + 1 # Include the dot
-
-        if split_at == -1:
-            last_newline = segment_to_search.rfind('\n', 0, len(segment_to_search))
-            if last_newline != -1:
-                split_at = last_newline + 1 # Include the newline
-
-        # If no natural split found, or if the natural split is too early (e.g., only a few chars)
-        # Fallback to max_chunk_size, but ensure it's at least a reasonable size
-        # If the segment is smaller than max_chunk_size, take the whole segment
-        if split_at == -1 or (split_at < max_chunk_size * 0.5 and len(segment_to_search) == max_chunk_size):
-            # If no good split point, just take the max_chunk_size or remaining text
-            chunk_length = len(segment_to_search)
+        end_index = min(start_index + max_chunk_size, text_len)
+        window_length = end_index - start_index
+
+        split_at = -1 # Length of the chunk when split at a separator
+        # With custom separators a remainder that fits is kept whole
+        levels = () if skip_short_splits and end_index == text_len else separators
+        for level in levels:
+            separator_end = _last_separator_end(text, level, start_index, end_index)
+            if separator_end == -1:
+                continue
+            if not skip_short_splits or separator_end - start_index >= min_length:
+                split_at = separator_end - start_index
+                break
+
+        # A short split of a full window falls back to a hard cut at max_chunk_size
+        if split_at == -1 or (split_at < min_length and window_length == max_chunk_size):
+            chunk_length = window_length
         else:
             chunk_length = split_at
 
-        # Ensure chunk_length is at least 1 to prevent infinite loops with empty chunks
-        if chunk_length == 0 and start_index < text_len:
-            chunk_length = 1 # Force a minimum chunk size if no content is found
+        chunk_content = text[start_index:start_index + chunk_length]
 
-        chunk_content = text[start_index : start_index + chunk_length]
-        
-        if not chunk_content.strip() and start_index + chunk_length < text_len: # Skip empty chunks unless it's the very end
+        # Skip whitespace-only chunks unless it's the very end
+        if (not chunk_content or chunk_content.isspace()) and start_index + chunk_length < text_len:
             start_index += chunk_length
             continue
 
-        chunks.append({"text": chunk_content, "metadata": {"size": len(chunk_content), "overlap": overlap}})
-        print(f"[chunk_recursive] Added chunk, length: {len(chunk_content)}")
+        chunks.append({"text": chunk_content, "metadata": {
+            "size": len(chunk_content), "overlap": overlap,
+            "start": start_index, "end": start_index + chunk_length
+        }})
+        if debug:
+            logger.debug(f"[chunk_recursive] Added chunk, length: {len(chunk_content)}")
+        if skip_short_splits and start_index + chunk_length == text_len:
+            break
 
-        # Calculate the start of the next chunk
-        # Ensure we always advance by at least 1 character to prevent infinite loops
+        # Step back by overlap, but always advance past the current start
         next_start_index = start_index + chunk_length - overlap
-        
-        # Ensure next_start_index always moves forward and doesn't go past text_len
         if next_start_index <= start_index:
-            next_start_index = start_index + chunk_length # No overlap, just move past current chunk
-            if next_start_index == start_index: # If chunk_length was 0 or 1 and overlap was 1
-                next_start_index += 1 # Force advance by at least 1
-        
+            next_start_index = start_index + chunk_length
+
         start_index = next_start_index
-        print(f"[chunk_recursive] Next start_index: {start_index}, Remaining text length: {text_len - start_index}")
 
-    print(f"[chunk_recursive] Total chunks: {len(chunks)}")
+    logger.debug(f"[chunk_recursive] Total chunks: {len(chunks)}")
     return chunks
 
-def chunk_semantic(text, threshold=0.7):
-    sentences = sent_tokenize(text)
-    if not sentences: return []
+def _tfidf_vectors(sentences):
+    # Rows are L2-normalized (TfidfVectorizer's default norm)
+    return TfidfVectorizer().fit_transform(sentences)
 
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(sentences)
+_sentence_models = {}
 
-    chunks = []
-    current_chunk_sentences = [sentences[0]]
-
-    for i in range(1, len(sentences)):
-        # Calculate similarity between current sentence and the last sentence of the current chunk
-        # Or, more robustly, between current sentence and the average vector of the current chunk
-        
-        # For simplicity, let's compare current sentence with the previous one
-        similarity = cosine_similarity(tfidf_matrix[i], tfidf_matrix[i-1])[0][0]
-        
-        if similarity > threshold:
-            current_chunk_sentences.append(sentences[i])
+def _sentence_transformer_vectors(sentences):
+    from sentence_transformers import SentenceTransformer
+    model_name = os.getenv('SEMANTIC_MODEL', 'all-MiniLM-L6-v2')
+    if model_name not in _sentence_models:
+        _sentence_models[model_name] = SentenceTransformer(model_name)
+    return _sentence_models[model_name].encode(
+        sentences,
+        batch_size=int(os.getenv('SEMANTIC_BATCH_SIZE', '64')),
+        normalize_embeddings=True
+    )
+
+# Sentence vectorizers for semantic chunking; each maps a list of sentences to
+# an (n_sentences, dim) dense or sparse matrix with L2-normalized rows
+SEMANTIC_BACKENDS = {
+    'tfidf': _tfidf_vectors,
+    'sentence-transformers': _sentence_transformer_vectors,
+}
+
+def _adjacent_boundaries(vectors, threshold):
+    """Indices of sentences that start a new chunk, from all adjacent-pair similarities at once"""
+    if sparse.issparse(vectors):
+        similarities = np.asarray(vectors[1:].multiply(vectors[:-1]).sum(axis=1)).ravel()
+    else:
+        similarities = np.einsum('ij,ij->i', vectors[1:], vectors[:-1])
+    return (np.flatnonzero(similarities <= threshold) + 1).tolist()
+
+def _centroid_boundaries(vectors, threshold):
+    """Indices of sentences that start a new chunk, comparing each sentence with its chunk's running centroid"""
+    boundaries = []
+    if sparse.issparse(vectors):
+        # Keep the chunk's vector sum dense and update it, its squared norm and
+        # its dot products through each sentence's nonzeros only
+        vectors = sparse.csr_matrix(vectors)
+        total = np.zeros(vectors.shape[1])
+        total_norm_sq = 0.0
+        touched = []
+        for i in range(vectors.shape[0]):
+            row = slice(vectors.indptr[i], vectors.indptr[i + 1])
+            indices, values = vectors.indices[row], vectors.data[row]
+            dot = np.dot(total[indices], values)
+            if i > 0:
+                similarity = dot / np.sqrt(total_norm_sq) if total_norm_sq > 0 else 0.0
+                if similarity <= threshold:
+                    boundaries.append(i)
+                    for chunk_indices in touched:
+                        total[chunk_indices] = 0.0
+                    total_norm_sq, dot, touched = 0.0, 0.0, []
+            total[indices] += values
+            total_norm_sq += 2 * dot + np.dot(values, values)
+            touched.append(indices)
+        return boundaries
+
+    vectors = np.asarray(vectors)
+    total = vectors[0].astype(np.float64)
+    for i in range(1, len(vectors)):
+        norm = np.linalg.norm(total)
+        similarity = np.dot(total, vectors[i]) / norm if norm else 0.0
+        if similarity <= threshold:
+            boundaries.append(i)
+            total = vectors[i].astype(np.float64)
         else:
-            chunks.append({"text": " ".join(current_chunk_sentences), "metadata": {"type": "semantic", "num_sentences": len(current_chunk_sentences)}})
-            current_chunk_sentences = [sentences[i]]
-    
-    if current_chunk_sentences:
-        chunks.append({"text": " ".join(current_chunk_sentences), "metadata": {"type": "semantic", "num_sentences": len(current_chunk_sentences)}})
-    
+            total += vectors[i]
+    return boundaries
+
+def chunk_semantic(text, threshold=0.7, compare='adjacent', backend='tfidf'):
+    """
+    Group consecutive sentences whose similarity exceeds threshold.
+
+    compare='adjacent' compares each sentence with the previous one; all
+    pair similarities come from one elementwise product of the shifted,
+    row-normalized sentence matrix. compare='centroid' compares each sentence
+    with the mean vector of the chunk being built, which tolerates a single
+    off-topic sentence better. backend names the sentence vectorizer in
+    SEMANTIC_BACKENDS (TF-IDF by default, or a local sentence-transformers
+    model encoded in batches).
+    """
+    spans = sentence_spans(text)
+    if not spans: return []
+
+    vectors = SEMANTIC_BACKENDS[backend]([text[start:end] for start, end in spans])
+    if compare == 'adjacent':
+        boundaries = _adjacent_boundaries(vectors, threshold)
+    elif compare == 'centroid':
+        boundaries = _centroid_boundaries(vectors, threshold)
+    else:
+        raise ValueError(f"Unknown comparison: {compare}")
+
+    chunks = []
+    for first, last in zip([0] + boundaries, boundaries + [len(spans)]):
+        start, end = spans[first][0], spans[last - 1][1]
+        chunks.append({"text": text[start:end], "metadata": {
+            "type": "semantic", "num_sentences": last - first, "start": start, "end": end
+        }})
     return chunks
 
+STRATEGIES = ('fixed_size', 'sentence_based', 'recursive', 'semantic')
+
+def parse_chunk_options(data, strategy):
+    """Validated parameters of strategy from a JSON body or form; raises ValueError"""
+    if strategy not in STRATEGIES:
+        raise ValueError('Invalid chunking strategy')
+    options = {'strategy': strategy}
+    if strategy in ('fixed_size', 'recursive'):
+        options['chunk_size'] = int(data.get('chunk_size', 100)) # Default for fixed-size
+        options['overlap'] = int(data.get('overlap', 20))        # Default for fixed-size
+        # A step of chunk_size - overlap must move forward, or chunking never ends
+        if options['chunk_size'] <= 0 or not 0 <= options['overlap'] < options['chunk_size']:
+            raise ValueError('chunk_size must be positive and overlap between 0 and chunk_size - 1')
+    if strategy == 'recursive':
+        options['separators'] = data.get('separators', 'default') # Preset for recursive
+        if options['separators'] not in SEPARATOR_PRESETS:
+            raise ValueError('Invalid separators')
+    if strategy == 'semantic':
+        options['threshold'] = float(data.get('threshold', 0.7))  # Default for semantic
+        options['compare'] = data.get('compare', 'adjacent')      # Previous sentence or chunk centroid
+        options['embedding'] = data.get('embedding', 'tfidf')     # Sentence vectorizer
+        if options['compare'] not in ('adjacent', 'centroid') or options['embedding'] not in SEMANTIC_BACKENDS:
+            raise ValueError('Invalid semantic chunking options')
+    return options
+
+def run_strategy(text, options):
+    """Chunks of text under the strategy and parameters in options"""
+    strategy = options['strategy']
+    if strategy == 'fixed_size':
+        return chunk_fixed_size(text, options['chunk_size'], options['overlap'])
+    if strategy == 'sentence_based':
+        return chunk_sentence_based(text)
+    if strategy == 'recursive':
+        separators = options['separators']
+        return chunk_recursive(
+            text, options['chunk_size'], options['overlap'],
+            None if separators == 'default' else SEPARATOR_PRESETS[separators]
+        )
+    return chunk_semantic(text, options['threshold'], options['compare'], options['embedding'])
+
+def explain_strategy(options):
+    strategy = options['strategy']
+    if strategy == 'fixed_size':
+        return f"Splits text into chunks of {options['chunk_size']} words with an overlap of {options['overlap']} words."
+    if strategy == 'sentence_based':
+        return "Splits text into individual sentences. Each sentence forms a chunk."
+    if strategy == 'recursive':
+        return f"Recursively splits text, attempting to find natural break points (like sentences or paragraphs) before falling back to fixed size. Max chunk size: {options['chunk_size']}, overlap: {options['overlap']}."
+    compared_with = "the previous sentence" if options['compare'] == 'adjacent' else "the running centroid of the current chunk"
+    return f"Groups semantically similar sentences together into chunks, comparing each sentence's {options['embedding']} vector with {compared_with} against a cosine similarity threshold of {options['threshold']}."
+
+def _flush_point(buffer):
+    """Where to cut buffered text for chunking: the last paragraph, line, sentence or word break in its second half"""
+    for level in HIERARCHY_SEPARATORS:
+        cut = _last_separator_end(buffer, level, 0, len(buffer))
+        if cut >= len(buffer) // 2:
+            return cut
+    return len(buffer)
+
+def stream_chunks(pages, options, flush_chars):
+    """
+    Chunk text arriving page by page, yielding (page count, chunk) pairs.
+
+    Pages are buffered until flush_chars characters have accumulated; the
+    buffer is then chunked up to its last natural break and the remainder
+    carried into the next flush. Memory stays bounded by flush_chars rather
+    than the document, but chunks never span a flush point.
+    """
+    buffer = ""
+    offset = 0 # Document offset of the buffer
+    page_count = 0
+
+    def shifted(chunk):
+        chunk['metadata']['start'] += offset
+        chunk['metadata']['end'] += offset
+        return chunk
+
+    for page_count, page in enumerate(pages, 1):
+        buffer += page
+        if len(buffer) >= flush_chars:
+            cut = _flush_point(buffer)
+            for chunk in run_strategy(buffer[:cut], options):
+                yield page_count, shifted(chunk)
+            buffer = buffer[cut:]
+            offset += cut
+    if buffer.strip():
+        for chunk in run_strategy(buffer, options):
+            yield page_count, shifted(chunk)
+
 @app.route('/upload-pdf', methods=['POST'])
 def upload_pdf():
     if 'pdf' not in request.files:
@@ -157,44 +415,127 @@ def upload_pdf():
             return jsonify({'error': 'Could not process PDF'}), 500
         return jsonify({'text': text}), 200
 
+@app.route('/upload-chunk', methods=['POST'])
+def upload_chunk():
+    """
+    Extract and chunk an uploaded PDF server-side, streaming NDJSON: one
+    {"type": "chunk"} line per chunk as it is produced, then a {"type": "done"}
+    line with the explanation and totals (or {"type": "error"}).
+    """
+    if 'pdf' not in request.files or request.files['pdf'].filename == '':
+        return jsonify({'error': 'No PDF file provided'}), 400
+    try:
+        options = parse_chunk_options(request.form, request.form.get('strategy'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Read before streaming; the upload is closed when the request context ends
+    pdf_file = io.BytesIO(request.files['pdf'].read())
+    flush_chars = int(os.getenv('STREAM_FLUSH_CHARS', '20000'))
+
+    def generate():
+        count, pages = 0, 0
+        try:
+            for pages, chunk in stream_chunks(iter_pdf_pages(pdf_file), options, flush_chars):
+                count += 1
+                yield json.dumps({'type': 'chunk', 'index': count - 1, 'page': pages, 'chunk': chunk}) + "\n"
+            yield json.dumps({'type': 'done', 'chunks': count, 'pages': pages, 'explanation': explain_strategy(options)}) + "\n"
+        except Exception as e:
+            print(f"Error during streaming chunking: {e}")
+            yield json.dumps({'type': 'error', 'error': f'Error during chunking: {str(e)}'}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/chunk', methods=['POST'])
 def chunk_text():
     data = request.get_json()
     text = data.get('text')
     strategy = data.get('strategy')
-    chunk_size = data.get('chunk_size', 100) # Default for fixed-size
-    overlap = data.get('overlap', 20)       # Default for fixed-size
-    threshold = data.get('threshold', 0.7)   # Default for semantic
 
     if not text or not strategy:
         return jsonify({'error': 'Missing text or strategy'}), 400
 
-    chunks = []
-    explanation = ""
-
     try:
-        if strategy == 'fixed_size':
-            chunks = chunk_fixed_size(text, int(chunk_size), int(overlap))
-            explanation = f"Splits text into chunks of {chunk_size} words with an overlap of {overlap} words."
-        elif strategy == 'sentence_based':
-            chunks = chunk_sentence_based(text)
-            explanation = "Splits text into individual sentences. Each sentence forms a chunk."
-        elif strategy == 'recursive':
-            chunks = chunk_recursive(text, int(chunk_size), int(overlap))
-            explanation = f"Recursively splits text, attempting to find natural break points (like sentences or paragraphs) before falling back to fixed size. Max chunk size: {chunk_size}, overlap: {overlap}."
-        elif strategy == 'semantic':
-            chunks = chunk_semantic(text, float(threshold))
-            explanation = f"Groups semantically similar sentences together into chunks based on TF-IDF cosine similarity with a threshold of {threshold}."
-        else:
-            return jsonify({'error': 'Invalid chunking strategy'}), 400
+        options = parse_chunk_options(data, strategy)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        print(f"[chunk_text] Chunks generated: {len(chunks)}")
-        print(f"[chunk_text] Explanation: {explanation}")
+    try:
+        chunks = run_strategy(text, options)
+        explanation = explain_strategy(options)
+        logger.debug(f"[chunk_text] Chunks generated: {len(chunks)}")
+        logger.debug(f"[chunk_text] Explanation: {explanation}")
         return jsonify({'chunks': chunks, 'explanation': explanation}), 200
     except Exception as e:
         print(f"Error during chunking: {e}")
         return jsonify({'error': f'Error during chunking: {str(e)}'}), 500
 
+def _size_distribution(sizes):
+    if not sizes:
+        return {'min': 0, 'max': 0, 'mean': 0, 'median': 0, 'p95': 0}
+    ordered = sorted(sizes)
+    return {
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': round(statistics.fmean(ordered), 1),
+        'median': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    }
+
+def benchmark_strategies(text, data):
+    """Time, chunk count, chunk size distribution and peak memory of every strategy on text"""
+    results = {}
+    for strategy in STRATEGIES:
+        options = parse_chunk_options(data, strategy)
+        # Each strategy pays for its own tokenization rather than reusing the previous one's
+        clear_span_cache()
+        start = time.perf_counter()
+        chunks = run_strategy(text, options)
+        elapsed = time.perf_counter() - start
+
+        # A second run under tracemalloc, so tracing does not inflate the timing
+        clear_span_cache()
+        tracemalloc.start()
+        try:
+            run_strategy(text, options)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        results[strategy] = {
+            'options': options,
+            'seconds': round(elapsed, 4),
+            'chunks': len(chunks),
+            'size_chars': _size_distribution([len(chunk['text']) for chunk in chunks]),
+            'peak_memory_mb': round(peak / 1024 / 1024, 2)
+        }
+    return results
+
+@app.route('/benchmark', methods=['POST'])
+def benchmark():
+    """
+    Run all four strategies on one document: an uploaded 'pdf' (strategy
+    parameters as form fields) or a JSON body with 'text' and parameters.
+    """
+    if 'pdf' in request.files:
+        data = request.form
+        text = extract_text_from_pdf(request.files['pdf'].stream)
+        if text is None:
+            return jsonify({'error': 'Could not process PDF'}), 500
+    else:
+        data = request.get_json(silent=True) or {}
+        text = data.get('text')
+    if not text:
+        return jsonify({'error': 'Missing text or PDF'}), 400
+
+    try:
+        results = benchmark_strategies(text, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error during benchmark: {e}")
+        return jsonify({'error': f'Error during benchmark: {str(e)}'}), 500
+    return jsonify({'characters': len(text), 'results': results}), 200
+
 @app.route('/')
 def index():
     return app.send_static_file('index.html')
@@ -0,0 +1,58 @@
+"""
+Time chunk_recursive on a large synthetic text.
+
+Builds a text of --size-mb megabytes out of sentences, lines and paragraphs
+and chunks it with the default and the paragraph/line/sentence/word
+separators.
+
+Usage (from RAGIMPLE/):
+    python benchmarks/bench_recursive.py [--size-mb 50] [--chunk-size 500] [--overlap 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import chunk_recursive, HIERARCHY_SEPARATORS
+
+WORDS = ("retrieval augmented generation chunk overlap sentence paragraph document "
+         "vector index embedding query context answer model token split").split()
+
+def synthetic_text(size_bytes, seed=0):
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        lines = []
+        for _ in range(rng.randint(1, 4)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))).capitalize() + rng.choice(".?!")
+                for _ in range(rng.randint(1, 5))
+            ]
+            lines.append(" ".join(sentences))
+        paragraph = "\n".join(lines)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size_bytes]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recursive chunking")
+    parser.add_argument('--size-mb', type=float, default=50)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--overlap', type=int, default=50)
+    args = parser.parse_args()
+
+    text = synthetic_text(int(args.size_mb * 1024 * 1024))
+    print(f"Text: {len(text) / 1024 / 1024:.1f} MB")
+    for name, separators in (('default', None), ('hierarchy', HIERARCHY_SEPARATORS)):
+        start = time.perf_counter()
+        chunks = chunk_recursive(text, args.chunk_size, args.overlap, separators)
+        elapsed = time.perf_counter() - start
+        sizes = [chunk['metadata']['size'] for chunk in chunks]
+        print(f"{name:<10} {elapsed:6.2f}s  {len(chunks)} chunks  mean size {sum(sizes) / len(sizes):.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Time chunk_semantic on a large synthetic text.
+
+Builds a text of --sentences sentences drawn from a few topics and chunks it
+comparing each sentence with the previous one and with the running chunk
+centroid.
+
+Usage (from RAGIMPLE/):
+    python benchmarks/bench_semantic.py [--sentences 15000] [--threshold 0.1] [--embedding tfidf]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import chunk_semantic, SEMANTIC_BACKENDS
+
+TOPICS = [
+    "retrieval augmented generation chunk overlap context window answer".split(),
+    "vector index embedding similarity search nearest neighbour query".split(),
+    "pdf document page extraction text paragraph heading table".split(),
+    "model token prompt latency throughput batch inference server".split(),
+]
+
+def synthetic_text(sentences, seed=0):
+    rng = random.Random(seed)
+    result = []
+    topic = rng.choice(TOPICS)
+    for _ in range(sentences):
+        if rng.random() < 0.1:
+            topic = rng.choice(TOPICS)
+        result.append(" ".join(rng.choice(topic) for _ in range(rng.randint(6, 20))).capitalize() + ".")
+    return " ".join(result)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic chunking")
+    parser.add_argument('--sentences', type=int, default=15000)
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--embedding', default='tfidf', choices=sorted(SEMANTIC_BACKENDS))
+    args = parser.parse_args()
+
+    text = synthetic_text(args.sentences)
+    print(f"Text: {args.sentences} sentences, {len(text) / 1024:.0f} KB")
+    for compare in ('adjacent', 'centroid'):
+        start = time.perf_counter()
+        chunks = chunk_semantic(text, args.threshold, compare, args.embedding)
+        elapsed = time.perf_counter() - start
+        sentences = [chunk['metadata']['num_sentences'] for chunk in chunks]
+        print(f"{compare:<9} {elapsed:6.2f}s  {len(chunks)} chunks  mean {sum(sentences) / len(sentences):.1f} sentences")
+
+if __name__ == '__main__':
+    main()
@@ -15,28 +15,73 @@ class Settings(BaseSettings):
     DENSE_TOP_K: int = 5
     SPARSE_TOP_K: int = 5
     HYBRID_ALPHA: float = 0.5  # Weight for combining dense and sparse scores
+    FUSION_STRATEGY: str = "rrf"  # "minmax" or "zscore" for normalized linear fusion
+    RRF_K: int = 60
     RERANK_TOP_K: int = 3
     
     # Model Settings
     EMBEDDING_MODEL: str = "text-embedding-3-small"  # or "sentence-transformers/all-MiniLM-L6-v2"
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     LLM_MODEL: str = "gpt-4"  # or "gpt-3.5-turbo"
+    LLM_MAX_TOKENS: int = 1000  # answer length
+    PROMPT_TOKEN_BUDGET: int = 6000  # question, sources and instructions; leaves room for the answer
+    PROMPT_MIN_SOURCE_TOKENS: int = 64  # drop low-ranked sources rather than trim below this
+    EMBEDDING_BATCH_SIZE: int = 64  # texts per sentence-transformers forward pass
+    OPENAI_EMBEDDING_BATCH_SIZE: int = 256  # inputs per embeddings request
+    OPENAI_EMBEDDING_CONCURRENCY: int = 4  # embeddings requests in flight
+    
+    # Reranking
+    RERANKER_BACKEND: str = "torch"  # "torch-int8" (dynamic quantization) or "onnx"
+    RERANKER_ONNX_FILE: str = ""  # e.g. "model_quantized.onnx" in a pre-exported RERANKER_MODEL dir
+    RERANKER_MAX_LENGTH: int = 512  # tokens per (query, passage) pair
+    RERANKER_BATCH_SIZE: int = 64  # pairs collected across requests per worker step
+    RERANKER_MAX_BATCH_TOKENS: int = 8192  # padded tokens per forward pass
+    RERANKER_MAX_WAIT_MS: float = 5  # wait for concurrent pairs before running a batch
+    RERANKER_MAX_PENDING: int = 1024  # queued pairs before callers wait
+    RERANKER_CACHE_MAX_ENTRIES: int = 50000
+    RERANKER_CACHE_TTL_SECONDS: int = 3600
+    RERANKER_STATS_WINDOW: int = 1000  # requests used for latency percentiles
     
     # PDF Processing
     CHUNK_SIZE: int = 500
-    CHUNK_OVERLAP: int = 50
+    CHUNK_OVERLAP: int = 50  # must be smaller than CHUNK_SIZE
+    INGEST_BATCH_SIZE: int = 256  # chunks embedded and indexed at a time during an upload
+    PDF_WORKERS: int = 0  # text extraction processes; 0 uses all CPUs
+    PDF_PARALLEL_MIN_PAGES: int = 64  # smaller PDFs are extracted in-process
+    PDF_PAGES_PER_TASK: int = 32  # pages per worker task
     
     # Vector Search
-    FAISS_INDEX_TYPE: str = "HNSW"  # or "IVFFlat"
-    FAISS_METRIC: str = "cosine"
+    FAISS_INDEX_TYPE: str = "HNSW"  # "IVFFlat", or "Flat" for exact search only
+    FAISS_METRIC: str = "cosine"  # "cosine", "ip" or "l2"
+    FAISS_TRAIN_MIN_VECTORS: int = 10000  # stay on an exact flat index below this size
+    FAISS_NLIST: int = 0  # IVF lists; 0 picks ~4*sqrt(n)
+    FAISS_MAX_TRAIN_POINTS_PER_LIST: int = 256
+    FAISS_NPROBE: int = 16  # IVF lists scanned per query
+    FAISS_HNSW_M: int = 32
+    FAISS_EF_CONSTRUCTION: int = 200
+    FAISS_EF_SEARCH: int = 64  # HNSW candidate list size per query
+    
+    # Persistent Index
+    INDEX_DIR: str = "index"  # versioned snapshots of FAISS, Whoosh and the chunk table
+    INDEX_KEEP_SNAPSHOTS: int = 2  # published snapshots kept on disk
+    INDEX_MMAP: bool = True  # memory-map the current snapshot at startup
     
     # Web Search
     SEARCH_PROVIDER: str = "serper"  # or "bing"
     WEB_SEARCH_LIMIT: int = 5
+    SERPER_API_URL: str = "https://google.serper.dev/search"
+    BING_API_URL: str = "https://api.bing.microsoft.com/v7.0/search"
+    WEB_SEARCH_TIMEOUT: float = 10.0  # seconds
+    WEB_SEARCH_MAX_CONNECTIONS: int = 20
+    WEB_CACHE_TTL_SECONDS: int = 600
+    WEB_CACHE_MAX_ENTRIES: int = 1024
     
     # Cache Settings
     CACHE_EMBEDDINGS: bool = True
     CACHE_DIR: str = "cache"
+    CACHE_MAX_BYTES: int = 1 << 30  # embedding cache size before LRU eviction
+    ANSWER_CACHE_TTL_SECONDS: int = 300
+    ANSWER_CACHE_MAX_ENTRIES: int = 512
     
     class Config:
         env_file = ".env"
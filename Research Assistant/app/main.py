@@ -2,13 +2,15 @@ from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
 import os
+import shutil
 import uuid
 
 from .services.pdf import PDFProcessor
 from .services.search import SearchService
 from .services.synthesis import SynthesisService
-from .models.document import Document, SearchResult, WebSearchResult, AnswerResponse
+from .models.document import DocumentSummary, SearchResult, WebSearchResult, AnswerResponse
 
 app = FastAPI(title="Research Assistant API")
 
@@ -30,31 +32,41 @@ synthesis_service = SynthesisService()
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
 
+@app.on_event("shutdown")
+async def shutdown():
+    await search_service.aclose()
+    pdf_processor.close()
+
+async def no_results() -> list:
+    return []
+
 class QueryRequest(BaseModel):
     query: str
     pdf_only: bool = False
     web_only: bool = False
 
 @app.post("/upload")
-async def upload_pdf(file: UploadFile = File(...)) -> Document:
+async def upload_pdf(file: UploadFile = File(...)) -> DocumentSummary:
     """Upload and process a PDF document"""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Save file
+    # Save file, copying in blocks rather than reading it into memory
     file_path = os.path.join("uploads", f"{uuid.uuid4()}.pdf")
     with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+        await asyncio.to_thread(shutil.copyfileobj, file.file, buffer, 1 << 20)
     
     try:
-        # Process PDF
-        document = pdf_processor.process_pdf(file_path)
+        # Extract the PDF page by page off the event loop, embedding and
+        # indexing its chunks one batch at a time
+        document = pdf_processor.process_pdf(file_path, file.filename)
+        if not await search_service.add_chunk_batches(document):
+            raise HTTPException(status_code=422, detail="No extractable text found in PDF")
         
-        # Add to search indices
-        await search_service.add_documents(document.chunks)
-        
-        return document
+        return document.summary()
+    except HTTPException:
+        os.remove(file_path)
+        raise
     except Exception as e:
         os.remove(file_path)  # Clean up on error
         raise HTTPException(status_code=500, detail=str(e))
@@ -63,15 +75,13 @@ async def upload_pdf(file: UploadFile = File(...)) -> Document:
 async def query(request: QueryRequest) -> AnswerResponse:
     """Query the system using both PDF and web sources"""
     try:
-        # Get results from PDF documents
-        pdf_results: List[SearchResult] = []
-        if not request.web_only:
-            pdf_results = await search_service.hybrid_search(request.query)
-        
-        # Get results from web search
-        web_results: List[WebSearchResult] = []
-        if not request.pdf_only:
-            web_results = await search_service.search_web(request.query)
+        # Get results from PDF documents and web search concurrently
+        pdf_results: List[SearchResult]
+        web_results: List[WebSearchResult]
+        pdf_results, web_results = await asyncio.gather(
+            search_service.hybrid_search(request.query) if not request.web_only else no_results(),
+            search_service.search_web(request.query) if not request.pdf_only else no_results()
+        )
         
         # Generate answer
         response = await synthesis_service.generate_answer(
@@ -84,6 +94,27 @@ async def query(request: QueryRequest) -> AnswerResponse:
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    """Remove a document's chunks from the search indices"""
+    removed = await search_service.delete_document(document_id)
+    if removed == 0:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"document_id": document_id, "chunks_removed": removed}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Embedding and answer cache hit/miss counters"""
+    return {
+        "embeddings": await asyncio.to_thread(search_service.embedding_service.cache_stats),
+        "answers": synthesis_service.cache_stats()
+    }
+
+@app.get("/rerank/stats")
+async def rerank_stats():
+    """Reranker latency percentiles, batching and score cache counters"""
+    return search_service.reranker.stats()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
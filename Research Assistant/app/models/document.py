@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
@@ -11,16 +11,14 @@ class DocumentChunk(BaseModel):
     embedding: Optional[List[float]] = None
     metadata: Dict = {}
 
-class Document(BaseModel):
-    """Represents a processed document with metadata"""
+class DocumentSummary(BaseModel):
+    """Summary of an uploaded document returned to clients; text and chunks stay server-side"""
     document_id: str
     title: str
-    content: str
-    chunks: List[DocumentChunk]
     total_pages: int
-    file_path: str
+    total_chunks: int
     file_type: str
-    processed_at: datetime = datetime.now()
+    processed_at: datetime = Field(default_factory=datetime.now)
     metadata: Dict = {}
 
 class SearchResult(BaseModel):
@@ -0,0 +1,282 @@
+from typing import Dict, List, Optional
+from array import array
+from bisect import bisect_right
+import json
+import os
+import shutil
+import numpy as np
+from ..models.document import DocumentChunk
+
+CHUNK_IDS_FILE = "chunk_ids.npy"
+DOCUMENT_IDS_FILE = "document_ids.npy"
+PAGE_NUMBERS_FILE = "page_numbers.npy"
+ALIVE_FILE = "alive.npy"
+TEXT_FILE = "text.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+METADATA_FILE = "metadata.bin"
+METADATA_OFFSETS_FILE = "metadata_offsets.npy"
+SEGMENTS_FILE = "segments.json"
+SEGMENT_FILES = (
+    CHUNK_IDS_FILE, DOCUMENT_IDS_FILE, PAGE_NUMBERS_FILE,
+    TEXT_FILE, TEXT_OFFSETS_FILE, METADATA_FILE, METADATA_OFFSETS_FILE
+)
+
+def _load_blob(path: str, mmap: bool):
+    """Load a byte blob, memory-mapped unless empty or disabled"""
+    if os.path.getsize(path) == 0:
+        return b""
+    if mmap:
+        return np.memmap(path, dtype=np.uint8, mode='r')
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def segment_name(start: int) -> str:
+    return f"seg{start:012d}"
+
+class _Segment:
+    """Consecutive rows stored as flat column files; never modified once written"""
+
+    def __init__(self, start: int, chunk_ids, document_ids, page_numbers, text, text_offsets,
+                 metadata, metadata_offsets, path: Optional[str] = None):
+        self.start = start
+        self.size = len(chunk_ids)
+        self.chunk_ids = chunk_ids
+        self.document_ids = document_ids
+        self.page_numbers = page_numbers
+        self.text = text
+        self.text_offsets = text_offsets
+        self.metadata = metadata
+        self.metadata_offsets = metadata_offsets
+        self.path = path  # directory holding the files, None until written
+
+    @classmethod
+    def from_rows(cls, start: int, chunk_ids: List[str], document_ids: List[str], page_numbers,
+                  texts: List[str], metadata: List[Dict]) -> "_Segment":
+        def blob(values: List[bytes]):
+            lengths = np.fromiter((len(value) for value in values), dtype='int64', count=len(values))
+            return b"".join(values), np.concatenate([[0], np.cumsum(lengths)]).astype('int64')
+
+        text, text_offsets = blob([value.encode('utf-8') for value in texts])
+        metadata_blob, metadata_offsets = blob([json.dumps(value).encode('utf-8') for value in metadata])
+        return cls(
+            start,
+            np.array([value.encode('utf-8') for value in chunk_ids], dtype=bytes),
+            np.array([value.encode('utf-8') for value in document_ids], dtype=bytes),
+            np.array(page_numbers, dtype='int32'),
+            text, text_offsets, metadata_blob, metadata_offsets
+        )
+
+    @classmethod
+    def load(cls, path: str, start: int, mmap: bool) -> "_Segment":
+        mmap_mode = 'r' if mmap else None
+        columns = {
+            name: np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+            for name in (CHUNK_IDS_FILE, DOCUMENT_IDS_FILE, PAGE_NUMBERS_FILE, TEXT_OFFSETS_FILE, METADATA_OFFSETS_FILE)
+        }
+        return cls(
+            start,
+            columns[CHUNK_IDS_FILE],
+            columns[DOCUMENT_IDS_FILE],
+            columns[PAGE_NUMBERS_FILE],
+            _load_blob(os.path.join(path, TEXT_FILE), mmap),
+            columns[TEXT_OFFSETS_FILE],
+            _load_blob(os.path.join(path, METADATA_FILE), mmap),
+            columns[METADATA_OFFSETS_FILE],
+            path=path
+        )
+
+    @staticmethod
+    def write(path: str, segments: List["_Segment"]):
+        """Write consecutive segments as one"""
+        os.makedirs(path)
+
+        def write_blob(name: str, offsets_name: str, blobs, offsets):
+            with open(os.path.join(path, name), 'wb') as f:
+                for value in blobs:
+                    f.write(value)
+            parts, end = [np.zeros(1, dtype='int64')], 0
+            for segment_offsets in offsets:
+                parts.append(end + np.asarray(segment_offsets[1:]) - segment_offsets[0])
+                end = parts[-1][-1] if len(parts[-1]) else end
+            np.save(os.path.join(path, offsets_name), np.concatenate(parts))
+
+        np.save(os.path.join(path, CHUNK_IDS_FILE), np.concatenate([np.asarray(s.chunk_ids) for s in segments]))
+        np.save(os.path.join(path, DOCUMENT_IDS_FILE), np.concatenate([np.asarray(s.document_ids) for s in segments]))
+        np.save(os.path.join(path, PAGE_NUMBERS_FILE), np.concatenate([np.asarray(s.page_numbers) for s in segments]))
+        write_blob(TEXT_FILE, TEXT_OFFSETS_FILE, [s.text for s in segments], [s.text_offsets for s in segments])
+        write_blob(
+            METADATA_FILE, METADATA_OFFSETS_FILE,
+            [s.metadata for s in segments], [s.metadata_offsets for s in segments]
+        )
+
+    def link_into(self, path: str):
+        os.makedirs(path)
+        for name in SEGMENT_FILES:
+            _link_or_copy(os.path.join(self.path, name), os.path.join(path, name))
+
+    def get(self, row: int) -> DocumentChunk:
+        text_start, text_end = self.text_offsets[row:row + 2]
+        meta_start, meta_end = self.metadata_offsets[row:row + 2]
+        return DocumentChunk(
+            text=bytes(self.text[text_start:text_end]).decode('utf-8'),
+            page_number=int(self.page_numbers[row]),
+            chunk_id=self.chunk_ids[row].decode('utf-8'),
+            document_id=self.document_ids[row].decode('utf-8'),
+            metadata=json.loads(bytes(self.metadata[meta_start:meta_end]))
+        )
+
+class ChunkTable:
+    """
+    Array-backed table of indexed chunks addressed by their int64 FAISS id.
+
+    Each chunk gets the next row number as its FAISS id, so resolving a dense
+    hit is a constant-time array lookup. Rows are never reused: deleting a
+    document only clears its rows' alive flags, which keeps every id that is
+    still stored in FAISS (or in a saved snapshot) pointing at the same chunk.
+    Embeddings are not kept here; FAISS owns the vectors.
+
+    Rows loaded from a snapshot stay in (memory-mapped) segments of numpy
+    columns and UTF-8 blobs; rows added since then are kept in Python lists
+    until the next save, which writes them as a new segment. Saved segments
+    are immutable, so the next snapshot hard-links them instead of rewriting
+    them; only the alive flags (one byte per row) are written every time.
+    """
+
+    def __init__(self):
+        # Rows loaded from a snapshot
+        self._segments: List[_Segment] = []
+        self._segment_starts: List[int] = []
+        self._base_size = 0
+
+        # Rows appended since the snapshot
+        self._chunk_ids: List[str] = []
+        self._document_ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadata: List[Dict] = []
+        self._page_numbers = array('i')
+
+        # Alive flags for all rows
+        self._alive = bytearray()
+        self.deleted_count = 0
+
+    def __len__(self) -> int:
+        """Number of live chunks"""
+        return len(self._alive) - self.deleted_count
+
+    @property
+    def next_id(self) -> int:
+        """FAISS id that will be assigned to the next added chunk"""
+        return len(self._alive)
+
+    def add(self, chunks: List[DocumentChunk]) -> np.ndarray:
+        """Append chunks and return their FAISS ids as an int64 array"""
+        start = self.next_id
+        for chunk in chunks:
+            self._chunk_ids.append(chunk.chunk_id)
+            self._document_ids.append(chunk.document_id)
+            self._texts.append(chunk.text)
+            self._metadata.append(chunk.metadata)
+            self._page_numbers.append(chunk.page_number)
+            self._alive.append(1)
+        return np.arange(start, start + len(chunks), dtype='int64')
+
+    def get(self, faiss_id: int) -> Optional[DocumentChunk]:
+        """Resolve a FAISS id to its chunk, or None if unknown or deleted"""
+        if faiss_id < 0 or faiss_id >= len(self._alive) or not self._alive[faiss_id]:
+            return None
+
+        if faiss_id < self._base_size:
+            segment = self._segments[bisect_right(self._segment_starts, faiss_id) - 1]
+            return segment.get(faiss_id - segment.start)
+
+        row = faiss_id - self._base_size
+        return DocumentChunk(
+            text=self._texts[row],
+            page_number=self._page_numbers[row],
+            chunk_id=self._chunk_ids[row],
+            document_id=self._document_ids[row],
+            metadata=self._metadata[row]
+        )
+
+    def delete_document(self, document_id: str) -> np.ndarray:
+        """Mark all chunks of a document deleted and return their FAISS ids"""
+        encoded = document_id.encode('utf-8')
+        rows = [
+            segment.start + int(row)
+            for segment in self._segments
+            for row in np.flatnonzero(segment.document_ids == encoded)
+        ]
+        rows += [
+            self._base_size + i
+            for i, doc_id in enumerate(self._document_ids)
+            if doc_id == document_id
+        ]
+        return self.delete_rows(rows)
+
+    def delete_rows(self, rows) -> np.ndarray:
+        """Mark rows deleted and return the FAISS ids of those that were alive"""
+        rows = [int(row) for row in rows if self._alive[row]]
+        for row in rows:
+            self._alive[row] = 0
+        self.deleted_count += len(rows)
+        return np.array(rows, dtype='int64')
+
+    def save(self, directory: str):
+        """
+        Write the table into a new snapshot directory. Loaded segments are
+        hard-linked; the rows added since the load become a new segment,
+        merged with the trailing segments that are no larger than it so the
+        number of segments stays logarithmic in the number of rows.
+        """
+        os.makedirs(directory, exist_ok=True)
+        kept = list(self._segments)
+        if self._chunk_ids:
+            merged = [_Segment.from_rows(
+                self._base_size, self._chunk_ids, self._document_ids,
+                self._page_numbers, self._texts, self._metadata
+            )]
+            while kept and kept[-1].size <= sum(segment.size for segment in merged):
+                merged.insert(0, kept.pop())
+        else:
+            merged = []
+
+        names = []
+        for segment in kept:
+            names.append(segment_name(segment.start))
+            segment.link_into(os.path.join(directory, names[-1]))
+        if merged:
+            names.append(segment_name(merged[0].start))
+            _Segment.write(os.path.join(directory, names[-1]), merged)
+
+        np.save(os.path.join(directory, ALIVE_FILE), np.frombuffer(bytes(self._alive), dtype='uint8'))
+        with open(os.path.join(directory, SEGMENTS_FILE), 'w') as f:
+            json.dump(names, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "ChunkTable":
+        """Open a saved table; columns are memory-mapped rather than read"""
+        table = cls()
+        segments_path = os.path.join(directory, SEGMENTS_FILE)
+        if os.path.exists(segments_path):
+            with open(segments_path) as f:
+                paths = [os.path.join(directory, name) for name in json.load(f)]
+        else:
+            # Snapshots written before segments hold one segment's files directly
+            paths = [directory]
+        for path in paths:
+            segment = _Segment.load(path, table._base_size, mmap)
+            if segment.size:
+                table._segments.append(segment)
+                table._segment_starts.append(segment.start)
+                table._base_size += segment.size
+
+        # Alive flags are mutable, so they are copied into memory (one byte per row)
+        table._alive = bytearray(np.load(os.path.join(directory, ALIVE_FILE)).tobytes())
+        table.deleted_count = table._alive.count(0)
+        return table
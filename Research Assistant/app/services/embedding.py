@@ -1,87 +1,112 @@
-from typing import List, Dict, Union
-import numpy as np
+from typing import List, Dict
+import asyncio
 import os
-import json
-import hashlib
 from sentence_transformers import SentenceTransformer
 import openai
 from ..core.config import settings
 from ..models.document import DocumentChunk
+from .embedding_cache import EmbeddingCache
 
 class EmbeddingService:
     def __init__(self):
         self.model_name = settings.EMBEDDING_MODEL
         self.cache_dir = settings.CACHE_DIR
         self.use_cache = settings.CACHE_EMBEDDINGS
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
         
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
+        self.cache = None
+        if self.use_cache:
+            self.cache = EmbeddingCache(
+                os.path.join(self.cache_dir, "embeddings.sqlite3"),
+                settings.CACHE_MAX_BYTES
+            )
             
         if "sentence-transformers" in self.model_name:
             self.model = SentenceTransformer(self.model_name)
             self.is_openai = False
         else:
-            openai.api_key = settings.OPENAI_API_KEY
+            self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self.request_slots = asyncio.Semaphore(settings.OPENAI_EMBEDDING_CONCURRENCY)
             self.is_openai = True
     
-    def _get_cache_path(self, text: str) -> str:
-        """Get cache file path for text"""
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{text_hash}.json")
+    def _load_many_from_cache(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Look up several texts at once; returns only the hits"""
+        cached = self.cache.get_many(self.model_name, texts)
+        return {text: vector.tolist() for text, vector in cached.items()}
     
-    def _load_from_cache(self, text: str) -> Union[List[float], None]:
-        """Load embedding from cache if exists"""
-        if not self.use_cache:
-            return None
-            
-        cache_path = self._get_cache_path(text)
-        if os.path.exists(cache_path):
-            with open(cache_path, 'r') as f:
-                return json.load(f)
-        return None
+    def _save_many_to_cache(self, embeddings: Dict[str, List[float]]):
+        self.cache.put_many(self.model_name, embeddings)
     
-    def _save_to_cache(self, text: str, embedding: List[float]):
-        """Save embedding to cache"""
-        if not self.use_cache:
-            return
-            
-        cache_path = self._get_cache_path(text)
-        with open(cache_path, 'w') as f:
-            json.dump(embedding, f)
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
     
-    async def get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text using selected model"""
-        # Try loading from cache first
-        cached_embedding = self._load_from_cache(text)
-        if cached_embedding is not None:
-            return cached_embedding
-        
-        if self.is_openai:
-            # Use OpenAI embeddings
-            response = await openai.embeddings.create(
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters and size of the embedding cache"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, "model": self.model_name, **self.cache.stats()}
+    
+    def _encode_local(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encode all texts in one call. encode() sorts its input by length, so
+        each batch of `batch_size` is padded only to similar lengths.
+        """
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return embeddings.tolist()
+    
+    async def _embed_openai_request(self, texts: List[str]) -> List[List[float]]:
+        """One multi-input embeddings request, bounded by the request slots"""
+        async with self.request_slots:
+            response = await self.client.embeddings.create(
                 model=self.model_name,
-                input=text
+                input=texts
             )
-            embedding = response.data[0].embedding
-        else:
-            # Use sentence-transformers
-            embedding = self.model.encode(text).tolist()
-        
-        # Cache the result
-        self._save_to_cache(text, embedding)
-        return embedding
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    async def _embed_openai(self, texts: List[str]) -> List[List[float]]:
+        size = settings.OPENAI_EMBEDDING_BATCH_SIZE
+        batches = await asyncio.gather(*(
+            self._embed_openai_request(texts[i:i + size])
+            for i in range(0, len(texts), size)
+        ))
+        return [embedding for batch in batches for embedding in batch]
+    
+    async def get_embedding(self, text: str) -> List[float]:
+        """Get embedding for text using selected model"""
+        return (await self.get_embeddings_batch([text]))[0]
     
     async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for multiple texts in batch"""
-        embeddings = []
-        for text in texts:
-            embedding = await self.get_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+        """
+        Get embeddings for multiple texts in batch. The cache is checked in
+        bulk first, then only distinct misses are embedded.
+        """
+        # SQLite lookups and writes block, so they run in worker threads
+        found = await asyncio.to_thread(self._load_many_from_cache, texts) if self.use_cache else {}
+        misses = list(dict.fromkeys(text for text in texts if text not in found))
+        
+        if misses:
+            if self.is_openai:
+                computed = await self._embed_openai(misses)
+            else:
+                # Keep the model's CPU/GPU work off the event loop
+                computed = await asyncio.to_thread(self._encode_local, misses)
+            new_embeddings = dict(zip(misses, computed))
+            if self.use_cache:
+                await asyncio.to_thread(self._save_many_to_cache, new_embeddings)
+            found.update(new_embeddings)
+        
+        return [found[text] for text in texts]
     
     async def embed_chunks(self, chunks: List[DocumentChunk]) -> List[DocumentChunk]:
         """Add embeddings to document chunks"""
-        for chunk in chunks:
-            if chunk.embedding is None:
-                chunk.embedding = await self.get_embedding(chunk.text)
-        return chunks 
\ No newline at end of file
+        pending = [chunk for chunk in chunks if chunk.embedding is None]
+        embeddings = await self.get_embeddings_batch([chunk.text for chunk in pending])
+        for chunk, embedding in zip(pending, embeddings):
+            chunk.embedding = embedding
+        return chunks
@@ -0,0 +1,161 @@
+from typing import Dict, List, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Keeps IN (...) lists under SQLite's default host-parameter limit
+LOOKUP_BATCH = 400
+# Deferred recency updates are written once this many are pending or this old
+TOUCH_FLUSH_ENTRIES = 4096
+TOUCH_FLUSH_SECONDS = 60
+
+class EmbeddingCache:
+    """
+    Single-file embedding cache: float32 vectors stored as SQLite blobs keyed
+    on (model, sha256(text)).
+
+    Lookups and inserts work on whole batches in one transaction. When the
+    stored vectors exceed `max_bytes`, the least recently used entries are
+    evicted down to 90% of the limit.
+
+    A hit does not write to the database: its recency is recorded in memory
+    and written in bulk with the next insert, before an eviction, or once
+    enough updates are pending. Losing them in a crash only makes the LRU
+    order slightly stale. All methods block on disk; call them off the
+    event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, bytes], int] = {}
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        return hashlib.sha256(text.encode('utf-8')).digest()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given texts; misses are omitted"""
+        hashes = {self._hash(text): text for text in texts}
+        found: Dict[str, np.ndarray] = {}
+        keys = list(hashes)
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[hashes[text_hash]] = np.frombuffer(vector, dtype='float32')
+
+            now = time.time_ns()
+            for text in found:
+                self._touched[(model, self._hash(text))] = now
+            if len(self._touched) >= TOUCH_FLUSH_ENTRIES or time.monotonic() - self._last_flush > TOUCH_FLUSH_SECONDS:
+                self._flush_touched()
+                self._conn.commit()
+            hit_count = sum(1 for text in texts if text in found)
+            self.hits += hit_count
+            self.misses += len(texts) - hit_count
+        return found
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Store vectors as float32, evicting old entries if over budget"""
+        if not embeddings:
+            return
+        now = time.time_ns()
+        rows = [
+            (model, self._hash(text), np.asarray(vector, dtype='float32').tobytes(), now)
+            for text, vector in embeddings.items()
+        ]
+        with self._lock:
+            # Replaced rows are subtracted before their new size is added
+            replaced = 0
+            keys = [row[1] for row in rows]
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(length(vector)), 0) FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._bytes += sum(len(row[2]) for row in rows) - replaced
+            self._flush_touched()
+            if self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._conn.commit()
+
+    def _flush_touched(self):
+        """Write deferred recency updates; the caller holds the lock and commits"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(last_used, model, text_hash) for (model, text_hash), last_used in self._touched.items()]
+            )
+            self._touched = {}
+        self._last_flush = time.monotonic()
+
+    def _evict(self, target_bytes: int):
+        """Delete least recently used entries until the cache fits target_bytes"""
+        victims = []
+        freed = 0
+        cursor = self._conn.execute(
+            "SELECT model, text_hash, length(vector) FROM embeddings ORDER BY last_used"
+        )
+        for model, text_hash, size in cursor:
+            if self._bytes - freed <= target_bytes:
+                break
+            victims.append((model, text_hash))
+            freed += size
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", victims)
+        self._bytes -= freed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
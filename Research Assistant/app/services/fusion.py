@@ -0,0 +1,68 @@
+from typing import Dict, Hashable, List, Sequence, Tuple
+import numpy as np
+from ..core.config import settings
+
+# A retriever's output: (key, score) pairs, best first
+Ranking = Sequence[Tuple[Hashable, float]]
+
+FUSION_STRATEGIES = ("rrf", "minmax", "zscore")
+
+def normalize_min_max(scores: np.ndarray) -> np.ndarray:
+    """Scale scores to [0, 1]; a constant list maps to 1"""
+    low, high = scores.min(), scores.max()
+    if high == low:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+def normalize_z_score(scores: np.ndarray) -> np.ndarray:
+    """Center on the mean in units of standard deviation; a constant list maps to 0"""
+    std = scores.std()
+    if std == 0:
+        return np.zeros_like(scores)
+    return (scores - scores.mean()) / std
+
+NORMALIZERS = {"minmax": normalize_min_max, "zscore": normalize_z_score}
+
+def reciprocal_rank_fusion(rankings: Sequence[Ranking], weights: Sequence[float], k: int = settings.RRF_K) -> Dict[Hashable, float]:
+    """Sum of weight / (k + rank) over the rankings each key appears in; raw scores are ignored"""
+    fused: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (key, _) in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    return fused
+
+def linear_fusion(rankings: Sequence[Ranking], weights: Sequence[float], normalization: str = "minmax") -> Dict[Hashable, float]:
+    """
+    Weighted sum of per-ranking normalized scores. A key missing from a
+    ranking gets that ranking's lowest normalized score, so retrievers on
+    different scales (cosine similarity, BM25) are comparable.
+    """
+    normalize = NORMALIZERS[normalization]
+    keys: Dict[Hashable, int] = {}
+    for ranking in rankings:
+        for key, _ in ranking:
+            keys.setdefault(key, len(keys))
+
+    fused = np.zeros(len(keys))
+    for ranking, weight in zip(rankings, weights):
+        if not ranking:
+            continue
+        normalized = normalize(np.array([score for _, score in ranking], dtype='float64'))
+        column = np.full(len(keys), normalized.min())
+        column[[keys[key] for key, _ in ranking]] = normalized
+        fused += weight * column
+    return dict(zip(keys, fused.tolist()))
+
+def fuse(
+    rankings: Sequence[Ranking],
+    weights: Sequence[float],
+    strategy: str = settings.FUSION_STRATEGY
+) -> List[Tuple[Hashable, float]]:
+    """Combine rankings with the given strategy and return (key, score) best first"""
+    if strategy == "rrf":
+        fused = reciprocal_rank_fusion(rankings, weights)
+    elif strategy in NORMALIZERS:
+        fused = linear_fusion(rankings, weights, strategy)
+    else:
+        raise ValueError(f"Unsupported FUSION_STRATEGY: {strategy}")
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
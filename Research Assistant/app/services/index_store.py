@@ -0,0 +1,178 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import json
+import os
+import re
+import shutil
+import faiss
+from ..core.config import settings
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOTS_DIR = "snapshots"
+MANIFEST_FILE = "manifest.json"
+FAISS_FILE = "faiss.index"
+CHUNKS_DIR = "chunks"
+WHOOSH_DIR = "whoosh"
+SNAPSHOT_PATTERN = re.compile(r"^v(\d{6})$")
+
+def _fsync_dir(path: str):
+    """Flush a directory entry (no-op where directories cannot be opened)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _fsync_tree(path: str):
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            # Hard links into the published snapshot are already durable
+            if os.stat(file_path).st_nlink > 1:
+                continue
+            with open(file_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        _fsync_dir(root)
+
+class IndexStore:
+    """
+    Versioned on-disk snapshots of the hybrid index.
+
+    Layout:
+        {INDEX_DIR}/CURRENT                  name of the published snapshot
+        {INDEX_DIR}/snapshots/v000042/
+            manifest.json
+            faiss.index
+            chunks/                          ChunkTable columns
+            whoosh/                          Whoosh segments
+
+    A commit builds the next snapshot in a temporary directory, fsyncs it,
+    renames it into place and then atomically replaces CURRENT. A crash at
+    any point leaves CURRENT pointing at the last complete snapshot.
+    Whoosh and chunk table segment files are immutable, and the FAISS file
+    is linked when the index did not change, so a new snapshot mostly
+    consists of hard links to the previous one. Only new files are fsynced.
+    """
+
+    def __init__(self, root: str = settings.INDEX_DIR, keep: int = settings.INDEX_KEEP_SNAPSHOTS):
+        self.root = root
+        self.keep = max(1, keep)
+        self.snapshots_dir = os.path.join(root, SNAPSHOTS_DIR)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        self._remove_incomplete()
+
+    def _remove_incomplete(self):
+        """Drop temporary directories left behind by an interrupted commit"""
+        for name in os.listdir(self.snapshots_dir):
+            if name.endswith(".tmp"):
+                shutil.rmtree(os.path.join(self.snapshots_dir, name), ignore_errors=True)
+
+    def snapshot_path(self, version: int) -> str:
+        return os.path.join(self.snapshots_dir, f"v{version:06d}")
+
+    def current_version(self) -> Optional[int]:
+        """Version of the published snapshot, or None for an empty store"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                match = SNAPSHOT_PATTERN.match(f.read().strip())
+        except FileNotFoundError:
+            return None
+        return int(match.group(1)) if match else None
+
+    def current_path(self) -> Optional[str]:
+        version = self.current_version()
+        return None if version is None else self.snapshot_path(version)
+
+    def read_manifest(self, snapshot_path: str) -> Dict:
+        with open(os.path.join(snapshot_path, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def begin(self) -> str:
+        """
+        Create the working directory for the next snapshot, pre-populated
+        with the current snapshot's Whoosh segments.
+        """
+        version = (self.current_version() or 0) + 1
+        working_path = self.snapshot_path(version) + ".tmp"
+        # A snapshot renamed into place but never published in CURRENT is stale
+        shutil.rmtree(self.snapshot_path(version), ignore_errors=True)
+        shutil.rmtree(working_path, ignore_errors=True)
+        os.makedirs(working_path)
+
+        whoosh_path = os.path.join(working_path, WHOOSH_DIR)
+        current_path = self.current_path()
+        if current_path is not None:
+            shutil.copytree(
+                os.path.join(current_path, WHOOSH_DIR),
+                whoosh_path,
+                copy_function=self._link_or_copy,
+                ignore=shutil.ignore_patterns("*_WRITELOCK")
+            )
+        else:
+            os.makedirs(whoosh_path)
+        return working_path
+
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    def write_faiss(self, working_path: str, index):
+        faiss.write_index(index, os.path.join(working_path, FAISS_FILE))
+
+    def link_faiss(self, working_path: str):
+        """Reuse the current snapshot's FAISS file, if any, in the next one"""
+        current_path = self.current_path()
+        if current_path is not None and self.has_faiss(current_path):
+            self._link_or_copy(os.path.join(current_path, FAISS_FILE), os.path.join(working_path, FAISS_FILE))
+
+    def read_faiss(self, snapshot_path: str, mmap: bool = settings.INDEX_MMAP):
+        flags = faiss.IO_FLAG_MMAP if mmap else 0
+        return faiss.read_index(os.path.join(snapshot_path, FAISS_FILE), flags)
+
+    def has_faiss(self, snapshot_path: str) -> bool:
+        return os.path.exists(os.path.join(snapshot_path, FAISS_FILE))
+
+    def publish(self, working_path: str, manifest: Dict) -> str:
+        """Make a fully written working directory the current snapshot"""
+        version = int(SNAPSHOT_PATTERN.match(os.path.basename(working_path)[:-len(".tmp")]).group(1))
+        manifest = dict(manifest, version=version, created_at=datetime.now().isoformat())
+        with open(os.path.join(working_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f)
+
+        _fsync_tree(working_path)
+        snapshot_path = self.snapshot_path(version)
+        os.rename(working_path, snapshot_path)
+        _fsync_dir(self.snapshots_dir)
+
+        current_tmp = os.path.join(self.root, CURRENT_FILE + ".tmp")
+        with open(current_tmp, 'w') as f:
+            f.write(os.path.basename(snapshot_path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(self.root, CURRENT_FILE))
+        _fsync_dir(self.root)
+
+        self._prune(version)
+        return snapshot_path
+
+    def abort(self, working_path: str):
+        shutil.rmtree(working_path, ignore_errors=True)
+
+    def _prune(self, current_version: int):
+        """Keep only the newest `keep` published snapshots"""
+        versions: List[int] = sorted(
+            int(match.group(1))
+            for match in map(SNAPSHOT_PATTERN.match, os.listdir(self.snapshots_dir))
+            if match
+        )
+        for version in versions[:-self.keep]:
+            if version != current_version:
+                shutil.rmtree(self.snapshot_path(version), ignore_errors=True)
@@ -1,100 +1,170 @@
 import PyPDF2
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import threading
 import uuid
 import os
 from ..core.config import settings
-from ..models.document import Document, DocumentChunk
+from ..models.document import DocumentChunk, DocumentSummary
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop); runs in a worker process"""
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+class PDFIngest:
+    """
+    A PDF being ingested. Iterating yields its chunks in batches of
+    INGEST_BATCH_SIZE as pages are extracted, so only one batch is held at a
+    time; summary() is complete once the batches are exhausted.
+    """
+
+    def __init__(self, processor: "PDFProcessor", file_path: str, title: Optional[str] = None):
+        self.processor = processor
+        self.file_path = file_path
+        self.title = title or os.path.basename(file_path)
+        self.document_id = str(uuid.uuid4())
+        self.total_chunks = 0
+        self.stats: Dict[str, int] = {"total_pages": 0, "pages_without_text": 0, "total_words": 0, "total_chars": 0}
+
+    def _counted(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        for page_number, text in pages:
+            self.stats["total_pages"] += 1
+            self.stats["total_words"] += len(text.split())
+            self.stats["total_chars"] += len(text)
+            if not text.strip():
+                self.stats["pages_without_text"] += 1
+            yield page_number, text
+
+    def __iter__(self) -> Iterator[List[DocumentChunk]]:
+        chunks = self.processor.iter_chunks(self._counted(self.processor.iter_pages(self.file_path)), self.document_id)
+        while batch := list(itertools.islice(chunks, self.processor.batch_size)):
+            self.total_chunks += len(batch)
+            yield batch
+
+    def summary(self) -> DocumentSummary:
+        stats = dict(self.stats)
+        return DocumentSummary(
+            document_id=self.document_id,
+            title=self.title,
+            total_pages=stats.pop("total_pages"),
+            total_chunks=self.total_chunks,
+            file_type="pdf",
+            metadata=stats
+        )
 
 class PDFProcessor:
     def __init__(self):
         self.chunk_size = settings.CHUNK_SIZE
         self.chunk_overlap = settings.CHUNK_OVERLAP
+        if self.chunk_size <= 0 or not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError("CHUNK_SIZE must be positive and CHUNK_OVERLAP between 0 and CHUNK_SIZE - 1")
+        self.batch_size = settings.INGEST_BATCH_SIZE
+        self.workers = settings.PDF_WORKERS or os.cpu_count() or 1
+        self.parallel_min_pages = settings.PDF_PARALLEL_MIN_PAGES
+        self.pages_per_task = settings.PDF_PAGES_PER_TASK
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs torch threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
 
-    def extract_text_from_pdf(self, file_path: str) -> tuple[str, int]:
-        """Extract text and metadata from PDF file"""
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def iter_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_number, text) in page order, one page at a time. Large PDFs
+        are extracted by a process pool in page ranges.
+        """
         with open(file_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
             total_pages = len(reader.pages)
-            text = ""
-            
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text, total_pages
-
-    def create_chunks(self, text: str, total_pages: int, document_id: str) -> List[DocumentChunk]:
-        """Split text into overlapping chunks"""
-        chunks = []
-        words = text.split()
-        
-        current_chunk = []
-        current_size = 0
-        current_page = 1
-        words_per_page = len(words) // total_pages
-        
-        for i, word in enumerate(words):
-            current_chunk.append(word)
-            current_size += 1
-            
-            # Estimate current page based on word position
-            current_page = (i // words_per_page) + 1
-            if current_page > total_pages:
-                current_page = total_pages
-            
-            if current_size >= self.chunk_size:
-                chunk_text = ' '.join(current_chunk)
-                chunk_id = str(uuid.uuid4())
-                
-                chunks.append(DocumentChunk(
-                    text=chunk_text,
-                    page_number=current_page,
-                    chunk_id=chunk_id,
-                    document_id=document_id,
-                    metadata={
-                        "word_count": len(current_chunk),
-                        "char_count": len(chunk_text)
-                    }
-                ))
-                
-                # Keep overlap words for next chunk
-                current_chunk = current_chunk[-self.chunk_overlap:]
-                current_size = len(current_chunk)
-        
-        # Add remaining words as last chunk if any
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunk_id = str(uuid.uuid4())
-            chunks.append(DocumentChunk(
-                text=chunk_text,
-                page_number=current_page,
-                chunk_id=chunk_id,
-                document_id=document_id,
-                metadata={
-                    "word_count": len(current_chunk),
-                    "char_count": len(chunk_text)
-                }
-            ))
-        
-        return chunks
-
-    def process_pdf(self, file_path: str) -> Document:
-        """Process PDF file and return Document object with chunks"""
-        document_id = str(uuid.uuid4())
-        text, total_pages = self.extract_text_from_pdf(file_path)
-        
-        chunks = self.create_chunks(text, total_pages, document_id)
-        
-        return Document(
+            if self.workers <= 1 or total_pages < self.parallel_min_pages:
+                for i, page in enumerate(reader.pages):
+                    yield i + 1, page.extract_text() or ""
+                return
+
+        yield from self._iter_pages_parallel(file_path, total_pages)
+
+    def _iter_pages_parallel(self, file_path: str, total_pages: int) -> Iterator[Tuple[int, str]]:
+        pool = self._get_pool()
+        ranges = (
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        )
+        # Keep a bounded number of ranges in flight so extracted text does not pile up
+        in_flight = deque(
+            (start, pool.submit(_extract_page_range, file_path, start, stop))
+            for start, stop in itertools.islice(ranges, self.workers * 2)
+        )
+        while in_flight:
+            start, future = in_flight.popleft()
+            texts = future.result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append((next_range[0], pool.submit(_extract_page_range, file_path, *next_range)))
+            for offset, text in enumerate(texts):
+                yield start + offset + 1, text
+
+    def _make_chunk(self, words: List[str], word_pages: List[int], document_id: str) -> DocumentChunk:
+        chunk_text = ' '.join(words)
+        return DocumentChunk(
+            text=chunk_text,
+            page_number=word_pages[0],
+            chunk_id=str(uuid.uuid4()),
             document_id=document_id,
-            title=os.path.basename(file_path),
-            content=text,
-            chunks=chunks,
-            total_pages=total_pages,
-            file_path=file_path,
-            file_type="pdf",
             metadata={
-                "total_chunks": len(chunks),
-                "total_words": len(text.split()),
-                "total_chars": len(text)
+                "word_count": len(words),
+                "char_count": len(chunk_text),
+                "page_start": word_pages[0],
+                "page_end": word_pages[-1]
             }
-        ) 
\ No newline at end of file
+        )
+
+    def iter_chunks(self, pages: Iterable[Tuple[int, str]], document_id: str) -> Iterator[DocumentChunk]:
+        """
+        Split page texts into overlapping chunks as pages arrive. Every word
+        keeps its page, so a chunk's page span is exact even when it crosses
+        a page break.
+        """
+        words: List[str] = []
+        word_pages: List[int] = []
+        new_words = 0  # words not yet emitted in any chunk
+
+        for page_number, text in pages:
+            for word in text.split():
+                words.append(word)
+                word_pages.append(page_number)
+                new_words += 1
+
+                if len(words) >= self.chunk_size:
+                    yield self._make_chunk(words, word_pages, document_id)
+
+                    # Keep overlap words for next chunk
+                    keep = len(words) - self.chunk_overlap
+                    words = words[keep:]
+                    word_pages = word_pages[keep:]
+                    new_words = 0
+
+        # Add remaining words as last chunk unless they are all overlap
+        if new_words:
+            yield self._make_chunk(words, word_pages, document_id)
+
+    def process_pdf(self, file_path: str, title: Optional[str] = None) -> PDFIngest:
+        """Start processing a PDF; iterate the result for its chunk batches"""
+        return PDFIngest(self, file_path, title)
@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import time
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from ..core.config import settings
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def load_reranker_model(model_name: str = settings.RERANKER_MODEL, backend: str = settings.RERANKER_BACKEND):
+    """
+    Load the cross-encoder for CPU inference.
+
+    "torch" is the fp32 model, "torch-int8" applies dynamic int8 quantization
+    to its Linear layers, and "onnx" runs it (or a pre-exported, possibly
+    quantized, ONNX file in the model directory) on ONNX Runtime.
+    """
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("RERANKER_BACKEND=onnx requires `pip install optimum[onnxruntime]`") from e
+        file_name = settings.RERANKER_ONNX_FILE or "model.onnx"
+        exported = os.path.exists(os.path.join(model_name, file_name))
+        return ORTModelForSequenceClassification.from_pretrained(
+            model_name,
+            export=not exported,
+            file_name=file_name if exported else None
+        )
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    if backend == "torch-int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != "torch":
+        raise ValueError(f"Unsupported RERANKER_BACKEND: {backend}")
+    return model
+
+def length_buckets(lengths: List[int], max_batch_tokens: int) -> List[List[int]]:
+    """
+    Group positions by ascending length so that each group, padded to its
+    longest member, stays within max_batch_tokens
+    """
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for position in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sorted ascending, so this pair sets the bucket's padded length
+        if current and (len(current) + 1) * lengths[position] > max_batch_tokens:
+            buckets.append(current)
+            current = []
+        current.append(position)
+    if current:
+        buckets.append(current)
+    return buckets
+
+class RerankerService:
+    """
+    Cross-encoder reranking behind one micro-batching worker.
+
+    Concurrent requests queue their (query, passage) pairs; the worker takes
+    up to RERANKER_BATCH_SIZE of them, waiting at most RERANKER_MAX_WAIT_MS
+    for more, and scores them on a single inference thread so queries queue
+    instead of contending for CPU cores. Pairs are tokenized without padding,
+    sorted by length and run in buckets padded only to their own longest pair.
+    Scores are cached per (query, chunk).
+    """
+
+    def __init__(self, model_name: str = settings.RERANKER_MODEL, backend: str = settings.RERANKER_BACKEND):
+        self.model_name = model_name
+        self.backend = backend
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = load_reranker_model(model_name, backend)
+        self.max_length = settings.RERANKER_MAX_LENGTH
+        self.batch_size = settings.RERANKER_BATCH_SIZE
+        self.max_batch_tokens = max(settings.RERANKER_MAX_BATCH_TOKENS, self.max_length)
+        self.max_wait = settings.RERANKER_MAX_WAIT_MS / 1000
+        self.cache = TTLCache(settings.RERANKER_CACHE_MAX_ENTRIES, settings.RERANKER_CACHE_TTL_SECONDS)
+
+        # Rolling request latencies (seconds) and batching counters for stats()
+        self.latencies = deque(maxlen=settings.RERANKER_STATS_WINDOW)
+        self.pairs_scored = 0
+        self.worker_batches = 0
+        self.forward_passes = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=settings.RERANKER_MAX_PENDING)
+            self._worker = loop.create_task(self._run())
+
+    async def score(self, query: str, texts: List[str], keys: Optional[List[str]] = None) -> List[float]:
+        """
+        Relevance of each text to the query in [0, 1]. `keys` (e.g. chunk ids)
+        identify texts in the score cache; the texts themselves are used if omitted.
+        """
+        start = time.perf_counter()
+        self._ensure_worker()
+        query_key = " ".join(query.split())
+        keys = keys or texts
+
+        scores: List[Optional[float]] = [None] * len(texts)
+        pending: List[Tuple[int, Tuple[str, str], asyncio.Future]] = []
+        for i, (text, key) in enumerate(zip(texts, keys)):
+            cache_key = (query_key, key)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                scores[i] = cached
+                continue
+            future = self._loop.create_future()
+            # Waits here when the queue is full, bounding the backlog
+            await self._queue.put((query, text, future))
+            pending.append((i, cache_key, future))
+
+        for i, cache_key, future in pending:
+            scores[i] = await future
+            self.cache.set(cache_key, scores[i])
+
+        self.latencies.append(time.perf_counter() - start)
+        return scores
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+            try:
+                scores = await loop.run_in_executor(
+                    self._executor, self._score_pairs, [(query, text) for query, text, _ in batch]
+                )
+            except Exception as e:
+                logger.exception("Reranker batch failed")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Score pairs in length buckets, each dynamically padded"""
+        encoded = self.tokenizer(
+            [query for query, _ in pairs],
+            [text for _, text in pairs],
+            truncation=True,
+            max_length=self.max_length
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        scores = np.empty(len(pairs), dtype='float32')
+        with torch.inference_mode():
+            for bucket in length_buckets(lengths, self.max_batch_tokens):
+                features = self.tokenizer.pad(
+                    {name: [values[i] for i in bucket] for name, values in encoded.items()},
+                    return_tensors="pt"
+                )
+                logits = self.model(**features).logits
+                scores[bucket] = torch.sigmoid(logits[:, 0]).float().numpy()
+                self.forward_passes += 1
+        self.pairs_scored += len(pairs)
+        self.worker_batches += 1
+        return scores.tolist()
+
+    def stats(self) -> Dict:
+        """Latency percentiles over the last RERANKER_STATS_WINDOW requests, batching and cache counters"""
+        latencies = np.array(self.latencies) * 1000
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "requests": len(latencies),
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            "pairs_scored": self.pairs_scored,
+            "mean_pairs_per_batch": self.pairs_scored / self.worker_batches if self.worker_batches else 0.0,
+            "forward_passes": self.forward_passes,
+            "cache_entries": len(self.cache),
+            "cache_hit_rate": self.cache.hits / lookups if lookups else 0.0
+        }
+
+    async def aclose(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=False)
@@ -1,16 +1,29 @@
-from typing import List, Dict, Tuple
-import numpy as np
-import faiss
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 from whoosh.index import create_in, open_dir
-from whoosh.fields import Schema, TEXT, ID
-from whoosh.qparser import QueryParser
+from whoosh.fields import Schema, TEXT, ID, STORED
+from whoosh.qparser import OrGroup, QueryParser
+import asyncio
+import logging
 import os
-import requests
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-import torch
+import numpy as np
 from ..core.config import settings
-from ..models.document import SearchResult, WebSearchResult
+from ..models.document import DocumentChunk, SearchResult, WebSearchResult
 from .embedding import EmbeddingService
+from .fusion import fuse
+from .chunk_table import ChunkTable
+from .index_store import IndexStore, CHUNKS_DIR, WHOOSH_DIR
+from .reranker import RerankerService
+from .vector_index import VectorIndexManager
+from .web_search import WebSearchService
+
+logger = logging.getLogger(__name__)
+
+WHOOSH_SCHEMA = Schema(
+    chunk_id=ID(stored=True),
+    document_id=ID(stored=True),
+    faiss_id=STORED,
+    content=TEXT
+)
 
 class SearchService:
     def __init__(self):
@@ -18,117 +31,222 @@ class SearchService:
         self.dense_top_k = settings.DENSE_TOP_K
         self.sparse_top_k = settings.SPARSE_TOP_K
         self.hybrid_alpha = settings.HYBRID_ALPHA
+        self.fusion_strategy = settings.FUSION_STRATEGY
         self.rerank_top_k = settings.RERANK_TOP_K
         
-        # Initialize FAISS index
-        self.index = None
-        self.document_map = {}
+        # Load FAISS, Whoosh and the chunk table from the latest snapshot;
+        # FAISS ids are rows of the chunk table
+        self.index_store = IndexStore()
+        self.vector_index = VectorIndexManager()
+        self.index_is_mmapped = False
+        self.chunk_table = ChunkTable()
+        # Serializes index updates, which run in worker threads off the event loop
+        self._write_lock = asyncio.Lock()
+        self._load_snapshot()
         
-        # Initialize Whoosh
-        if not os.path.exists("whoosh_index"):
-            os.makedirs("whoosh_index")
-        schema = Schema(
-            chunk_id=ID(stored=True),
-            content=TEXT(stored=True)
-        )
-        self.whoosh_index = create_in("whoosh_index", schema)
+        self.web_search = WebSearchService()
         
-        # Initialize re-ranker
-        self.reranker = AutoModelForSequenceClassification.from_pretrained(settings.RERANKER_MODEL)
-        self.reranker_tokenizer = AutoTokenizer.from_pretrained(settings.RERANKER_MODEL)
-        self.reranker.eval()
-    
-    def _init_faiss_index(self, dim: int):
-        """Initialize FAISS index with appropriate parameters"""
-        if settings.FAISS_INDEX_TYPE == "HNSW":
-            self.index = faiss.IndexHNSWFlat(dim, 32)  # 32 neighbors
-        else:  # IVFFlat
-            quantizer = faiss.IndexFlatL2(dim)
-            self.index = faiss.IndexIVFFlat(quantizer, dim, 100)  # 100 centroids
-            self.index.train(np.random.random((1000, dim)).astype('float32'))
-    
-    async def add_documents(self, chunks: List[Dict]):
-        """Add document chunks to both dense and sparse indices"""
-        # Add to FAISS
-        embeddings = []
-        for chunk in chunks:
-            if not chunk.embedding:
-                chunk.embedding = await self.embedding_service.get_embedding(chunk.text)
-            embeddings.append(chunk.embedding)
-            self.document_map[chunk.chunk_id] = chunk
+        # Initialize re-ranker (micro-batched across concurrent queries)
+        self.reranker = RerankerService()
+    
+    def _load_snapshot(self):
+        """Open the current snapshot, creating an empty one on first start"""
+        snapshot_path = self.index_store.current_path()
+        if snapshot_path is None:
+            working_path = self.index_store.begin()
+            create_in(os.path.join(working_path, WHOOSH_DIR), WHOOSH_SCHEMA)
+            ChunkTable().save(os.path.join(working_path, CHUNKS_DIR))
+            snapshot_path = self.index_store.publish(working_path, self._manifest())
+        
+        manifest = self.index_store.read_manifest(snapshot_path)
+        if manifest.get("chunks"):
+            expected = {"embedding_model": self.embedding_service.model_name, "metric": settings.FAISS_METRIC}
+            for key, value in expected.items():
+                if manifest.get(key) != value:
+                    logger.warning(f"Index snapshot was built with {key}={manifest.get(key)}, but {value} is configured")
         
-        embeddings_array = np.array(embeddings).astype('float32')
-        if self.index is None:
-            self._init_faiss_index(embeddings_array.shape[1])
-        self.index.add(embeddings_array)
+        self.whoosh_index = open_dir(os.path.join(snapshot_path, WHOOSH_DIR))
+        self.chunk_table = ChunkTable.load(os.path.join(snapshot_path, CHUNKS_DIR), mmap=settings.INDEX_MMAP)
+        if self.index_store.has_faiss(snapshot_path):
+            index = self.index_store.read_faiss(snapshot_path)
+            self.index_is_mmapped = settings.INDEX_MMAP
+            if self.index_is_mmapped and self.vector_index.should_migrate(index):
+                # The migration starting below copies every vector into memory
+                # anyway, and writes during it must go to a writable index, so
+                # open that now rather than replace the index mid-migration
+                index = self.index_store.read_faiss(snapshot_path, mmap=False)
+                self.index_is_mmapped = False
+            self.vector_index = VectorIndexManager(index)
+        self._saved_index_version = self.vector_index.version
+    
+    def _manifest(self) -> Dict:
+        return {
+            "embedding_model": self.embedding_service.model_name,
+            "faiss_index_type": settings.FAISS_INDEX_TYPE,
+            "metric": settings.FAISS_METRIC,
+            "dim": self.vector_index.index.d if self.vector_index.index is not None else None,
+            "chunks": len(self.chunk_table)
+        }
+    
+    def _ensure_writable_index(self):
+        """Replace a memory-mapped (read-only) FAISS index with an in-memory copy"""
+        if self.index_is_mmapped:
+            self.vector_index.replace_index(self.index_store.read_faiss(self.index_store.current_path(), mmap=False))
+            self.index_is_mmapped = False
+    
+    def _begin_commit(self) -> Tuple[str, Any]:
+        """Working directory of the next snapshot and a Whoosh writer on its sparse index"""
+        working_path = self.index_store.begin()
+        try:
+            writer = open_dir(os.path.join(working_path, WHOOSH_DIR)).writer()
+        except Exception:
+            self.index_store.abort(working_path)
+            raise
+        return working_path, writer
+    
+    def _abort_commit(self, working_path: str, writer):
+        try:
+            writer.cancel()
+        except Exception:
+            pass  # already committed or failed
+        self.index_store.abort(working_path)
+    
+    def _finish_commit(self, working_path: str, writer):
+        """
+        Persist the in-memory index as the new snapshot. Only what changed is
+        written: new Whoosh and chunk table segments, the alive flags, and the
+        FAISS index if it was modified; everything else is hard-linked from
+        the previous snapshot. Callers hold _write_lock.
+        """
+        try:
+            writer.commit()
+            index_version = self.vector_index.version
+            if index_version != self._saved_index_version:
+                self.index_store.write_faiss(working_path, self.vector_index.index)
+            else:
+                self.index_store.link_faiss(working_path)
+            self.chunk_table.save(os.path.join(working_path, CHUNKS_DIR))
+            snapshot_path = self.index_store.publish(working_path, self._manifest())
+        except Exception:
+            self.index_store.abort(working_path)
+            raise
         
-        # Add to Whoosh
-        writer = self.whoosh_index.writer()
-        for chunk in chunks:
+        # Serve from the new snapshot; appended chunk rows now live on disk
+        self._saved_index_version = index_version
+        self.whoosh_index = open_dir(os.path.join(snapshot_path, WHOOSH_DIR))
+        self.chunk_table = ChunkTable.load(os.path.join(snapshot_path, CHUNKS_DIR), mmap=settings.INDEX_MMAP)
+    
+    def _commit(self, update_whoosh: Callable):
+        """Publish a new snapshot; `update_whoosh` receives the Whoosh writer"""
+        working_path, writer = self._begin_commit()
+        try:
+            update_whoosh(writer)
+        except Exception:
+            self._abort_commit(working_path, writer)
+            raise
+        self._finish_commit(working_path, writer)
+    
+    async def _locked(self, func: Callable, *args):
+        """
+        Run an index update in a worker thread while holding the write lock.
+        Shielded, so a cancelled request cannot release the lock while its
+        thread is still writing.
+        """
+        async def run():
+            async with self._write_lock:
+                return await asyncio.to_thread(func, *args)
+        return await asyncio.shield(run())
+    
+    async def add_documents(self, chunks: List[DocumentChunk]) -> int:
+        """Add document chunks to both dense and sparse indices"""
+        size = settings.INGEST_BATCH_SIZE
+        return await self.add_chunk_batches(chunks[i:i + size] for i in range(0, len(chunks), size))
+    
+    async def add_chunk_batches(self, batches: Iterable[List[DocumentChunk]]) -> int:
+        """
+        Embed and index chunk batches one at a time and publish them as a
+        single snapshot, so memory is bounded by the batch size rather than
+        the document. `batches` may block (e.g. PDF extraction); it is
+        advanced in a worker thread. Returns the number of chunks added. On
+        failure the chunks added so far are removed and nothing is published.
+        """
+        return await asyncio.shield(self._add_chunk_batches(iter(batches)))
+    
+    async def _add_chunk_batches(self, batches: Iterator[List[DocumentChunk]]) -> int:
+        async with self._write_lock:
+            working_path, writer = await asyncio.to_thread(self._begin_commit)
+            added: List[np.ndarray] = []
+            try:
+                while (chunks := await asyncio.to_thread(next, batches, None)) is not None:
+                    await self.embedding_service.embed_chunks(chunks)
+                    added.append(await asyncio.to_thread(self._index_batch, chunks, writer))
+                if not added:
+                    await asyncio.to_thread(self._abort_commit, working_path, writer)
+                    return 0
+                await asyncio.to_thread(self._finish_commit, working_path, writer)
+            except BaseException:
+                await asyncio.to_thread(self._undo_batches, working_path, writer, added)
+                raise
+            return sum(len(faiss_ids) for faiss_ids in added)
+    
+    def _index_batch(self, chunks: List[DocumentChunk], writer) -> np.ndarray:
+        self._ensure_writable_index()
+        faiss_ids = self.chunk_table.add(chunks)
+        self.vector_index.add([chunk.embedding for chunk in chunks], faiss_ids)
+        for chunk, faiss_id in zip(chunks, faiss_ids):
             writer.add_document(
                 chunk_id=chunk.chunk_id,
+                document_id=chunk.document_id,
+                faiss_id=int(faiss_id),
                 content=chunk.text
             )
-        writer.commit()
+        return faiss_ids
+    
+    def _undo_batches(self, working_path: str, writer, added: List[np.ndarray]):
+        self._abort_commit(working_path, writer)
+        if added:
+            # FAISS ids are never reused, so the rows stay in the table as deleted
+            faiss_ids = self.chunk_table.delete_rows(np.concatenate(added))
+            self.vector_index.remove(faiss_ids)
+    
+    async def delete_document(self, document_id: str) -> int:
+        """Remove all chunks of a document from both indices"""
+        return await self._locked(self._delete_document, document_id)
+    
+    def _delete_document(self, document_id: str) -> int:
+        faiss_ids = self.chunk_table.delete_document(document_id)
+        if len(faiss_ids) == 0:
+            return 0
+        
+        self._ensure_writable_index()
+        # HNSW cannot remove vectors; deleted rows are filtered at query time
+        self.vector_index.remove(faiss_ids)
+        
+        self._commit(lambda writer: writer.delete_by_term("document_id", document_id))
+        return len(faiss_ids)
+    
+    async def aclose(self):
+        """Release pooled HTTP connections, the reranker worker and the embedding cache"""
+        await self.web_search.aclose()
+        await self.reranker.aclose()
+        await asyncio.to_thread(self.embedding_service.close)
     
     async def search_web(self, query: str) -> List[WebSearchResult]:
         """Search the web using configured provider"""
-        if settings.SEARCH_PROVIDER == "serper":
-            headers = {
-                "X-API-KEY": settings.SERPER_API_KEY,
-                "Content-Type": "application/json"
-            }
-            response = requests.post(
-                "https://google.serper.dev/search",
-                headers=headers,
-                json={"q": query, "num": settings.WEB_SEARCH_LIMIT}
-            )
-            results = response.json().get("organic", [])
-            
-            return [
-                WebSearchResult(
-                    title=result["title"],
-                    snippet=result["snippet"],
-                    url=result["link"],
-                    published_date=result.get("date")
-                ) for result in results
-            ]
-        else:  # Bing
-            headers = {
-                "Ocp-Apim-Subscription-Key": settings.BING_API_KEY
-            }
-            response = requests.get(
-                f"https://api.bing.microsoft.com/v7.0/search?q={query}&count={settings.WEB_SEARCH_LIMIT}",
-                headers=headers
-            )
-            results = response.json().get("webPages", {}).get("value", [])
-            
-            return [
-                WebSearchResult(
-                    title=result["name"],
-                    snippet=result["snippet"],
-                    url=result["url"],
-                    published_date=None
-                ) for result in results
-            ]
-    
-    def _rerank_results(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        return await self.web_search.search(query)
+    
+    async def _rerank_results(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
         """Re-rank results using cross-encoder"""
-        pairs = [[query, result.text] for result in results]
-        features = self.reranker_tokenizer(
-            pairs,
-            padding=True,
-            truncation=True,
-            return_tensors="pt",
-            max_length=512
+        if not results:
+            return []
+        scores = await self.reranker.score(
+            query,
+            [result.text for result in results],
+            keys=[result.chunk_id for result in results]
         )
         
-        with torch.no_grad():
-            scores = self.reranker(**features).logits.squeeze()
-            scores = torch.sigmoid(scores).numpy()
-        
         for result, score in zip(results, scores):
-            result.score = float(score)
+            result.score = score
         
         results.sort(key=lambda x: x.score, reverse=True)
         return results[:self.rerank_top_k]
@@ -136,34 +254,39 @@ class SearchService:
     async def hybrid_search(self, query: str) -> List[SearchResult]:
         """Perform hybrid search combining dense and sparse retrieval"""
         # Dense search with FAISS
-        query_embedding = await self.embedding_service.get_embedding(query)
-        D, I = self.index.search(
-            np.array([query_embedding]).astype('float32'),
-            self.dense_top_k
-        )
         dense_results = []
-        for i, (dist, idx) in enumerate(zip(D[0], I[0])):
-            if idx < 0:  # Invalid index
-                continue
-            chunk = self.document_map[list(self.document_map.keys())[idx]]
-            dense_results.append(SearchResult(
-                text=chunk.text,
-                source_type="pdf",
-                source_id=chunk.document_id,
-                page_number=chunk.page_number,
-                chunk_id=chunk.chunk_id,
-                score=1.0 - dist  # Convert distance to similarity score
-            ))
+        if self.vector_index.ntotal > 0:
+            query_embedding = await self.embedding_service.get_embedding(query)
+            # Over-fetch when deleted vectors may still be in the index
+            search_k = self.dense_top_k + min(self.chunk_table.deleted_count, self.dense_top_k)
+            scores, ids = self.vector_index.search(query_embedding, search_k)
+            for score, idx in zip(scores, ids):
+                if len(dense_results) >= self.dense_top_k:
+                    break
+                chunk = self.chunk_table.get(int(idx))
+                if chunk is None:  # Invalid or deleted id
+                    continue
+                dense_results.append(SearchResult(
+                    text=chunk.text,
+                    source_type="pdf",
+                    source_id=chunk.document_id,
+                    page_number=chunk.page_number,
+                    chunk_id=chunk.chunk_id,
+                    score=float(score)
+                ))
         
         # Sparse search with Whoosh
         with self.whoosh_index.searcher() as searcher:
-            query_parser = QueryParser("content", self.whoosh_index.schema)
+            # OR semantics: a natural-language question rarely has every term in one chunk
+            query_parser = QueryParser("content", self.whoosh_index.schema, group=OrGroup)
             whoosh_query = query_parser.parse(query)
             results = searcher.search(whoosh_query, limit=self.sparse_top_k)
             
             sparse_results = []
             for result in results:
-                chunk = self.document_map[result["chunk_id"]]
+                chunk = self.chunk_table.get(result["faiss_id"])
+                if chunk is None:
+                    continue
                 sparse_results.append(SearchResult(
                     text=chunk.text,
                     source_type="pdf",
@@ -173,24 +296,24 @@ class SearchService:
                     score=result.score
                 ))
         
-        # Combine results
-        all_results = {}
-        for result in dense_results + sparse_results:
-            if result.chunk_id not in all_results:
-                all_results[result.chunk_id] = result
-            else:
-                # Combine scores using weighted average
-                dense_score = result.score if result in dense_results else 0
-                sparse_score = result.score if result in sparse_results else 0
-                all_results[result.chunk_id].score = (
-                    self.hybrid_alpha * dense_score +
-                    (1 - self.hybrid_alpha) * sparse_score
-                )
-        
-        combined_results = list(all_results.values())
-        combined_results.sort(key=lambda x: x.score, reverse=True)
+        # Combine results; dense and sparse scores are on different scales, so
+        # they are fused by rank or after per-retriever normalization
+        results_by_id = {result.chunk_id: result for result in sparse_results + dense_results}
+        fused = fuse(
+            [
+                [(result.chunk_id, result.score) for result in dense_results],
+                [(result.chunk_id, result.score) for result in sparse_results]
+            ],
+            [self.hybrid_alpha, 1 - self.hybrid_alpha],
+            self.fusion_strategy
+        )
+        combined_results = []
+        for chunk_id, score in fused:
+            result = results_by_id[chunk_id]
+            result.score = score
+            combined_results.append(result)
         
         # Re-rank top results
-        reranked_results = self._rerank_results(query, combined_results)
+        reranked_results = await self._rerank_results(query, combined_results)
         
         return reranked_results 
\ No newline at end of file
@@ -1,12 +1,71 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import logging
 import openai
 from ..core.config import settings
 from ..models.document import SearchResult, WebSearchResult, AnswerResponse
+from .single_flight import SingleFlight
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a research assistant that provides accurate, "
+    "well-cited answers based on provided sources. Use [n] notation for citations."
+)
+
+INSTRUCTIONS = (
+    "Instructions:\n"
+    "1. Synthesize information from both PDF and web sources\n"
+    "2. Use [n] citations to reference sources\n"
+    "3. Prioritize recent and high-scoring sources\n"
+    "4. Be concise but comprehensive\n"
+    "5. If sources conflict, note the discrepancy\n\n"
+    "Answer: "
+)
+
+class TokenCounter:
+    """
+    Token counts and truncation for the LLM's tokenizer. Falls back to a
+    ~4 characters per token estimate when tiktoken or its encoding files
+    are unavailable.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str):
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Using approximate token counts ({e!r})")
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // self.CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[:max_tokens]) + "..."
+        return text[:max_tokens * self.CHARS_PER_TOKEN] + "..."
 
 class SynthesisService:
     def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
+        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.LLM_MODEL
+        self.max_answer_tokens = settings.LLM_MAX_TOKENS
+        self.prompt_token_budget = settings.PROMPT_TOKEN_BUDGET
+        self.min_source_tokens = settings.PROMPT_MIN_SOURCE_TOKENS
+        self.tokens = TokenCounter(self.model)
+        self.answer_cache = TTLCache(settings.ANSWER_CACHE_MAX_ENTRIES, settings.ANSWER_CACHE_TTL_SECONDS)
+        self.in_flight = SingleFlight()
     
     def _format_sources(self, pdf_results: List[SearchResult], web_results: List[WebSearchResult]) -> List[Dict[str, str]]:
         """Format sources for citation"""
@@ -37,60 +96,172 @@ class SynthesisService:
         
         return sources
     
-    def _create_prompt(self, query: str, pdf_results: List[SearchResult], web_results: List[WebSearchResult]) -> str:
-        """Create prompt for the LLM"""
+    def _fit_sources(
+        self,
+        query: str,
+        pdf_results: List[SearchResult],
+        web_results: List[WebSearchResult]
+    ) -> Tuple[List[SearchResult], List[WebSearchResult], List[str], List[str]]:
+        """
+        Choose and trim source texts so the prompt fits PROMPT_TOKEN_BUDGET.
+        
+        The budget left after the question and instructions is shared
+        evenly: sources shorter than their share are kept whole and their
+        unused tokens go to the rest, longer ones are truncated. If the share
+        would fall below PROMPT_MIN_SOURCE_TOKENS, the lowest-ranked sources
+        (PDF and web alternately, from the bottom) are dropped instead.
+        """
+        fixed = self.tokens.count(self._render_prompt(query, [], []))
+        available = self.prompt_token_budget - fixed
+        
+        # Interleave by rank so trimming removes the weakest of both kinds
+        ranked = []
+        for rank in range(max(len(pdf_results), len(web_results))):
+            if rank < len(pdf_results):
+                ranked.append(("pdf", rank))
+            if rank < len(web_results):
+                ranked.append(("web", rank))
+        
+        def source_text(kind: str, rank: int) -> str:
+            if kind == "pdf":
+                return pdf_results[rank].text
+            return f"{web_results[rank].title}\n{web_results[rank].snippet}"
+        
+        # Entry overhead ("[n] (Page p): " and blank lines) is small; reserve it per source
+        overhead = 16
+        while ranked and available // len(ranked) - overhead < self.min_source_tokens:
+            ranked.pop()
+        
+        lengths = {source: self.tokens.count(source_text(*source)) for source in ranked}
+        limits = {}
+        remaining = available - overhead * len(ranked)
+        for position, source in enumerate(sorted(ranked, key=lengths.get)):
+            share = remaining // (len(ranked) - position)
+            limits[source] = min(lengths[source], share)
+            remaining -= limits[source]
+        
+        kept = sorted(ranked)  # ("pdf", i) before ("web", j), each in rank order
+        pdf_kept = [pdf_results[rank] for kind, rank in kept if kind == "pdf"]
+        web_kept = [web_results[rank] for kind, rank in kept if kind == "web"]
+        pdf_texts = [
+            self.tokens.truncate(source_text(kind, rank), limits[(kind, rank)])
+            for kind, rank in kept if kind == "pdf"
+        ]
+        web_texts = [
+            self.tokens.truncate(source_text(kind, rank), limits[(kind, rank)])
+            for kind, rank in kept if kind == "web"
+        ]
+        if len(kept) < len(pdf_results) + len(web_results):
+            logger.info(f"Prompt budget dropped {len(pdf_results) + len(web_results) - len(kept)} sources")
+        return pdf_kept, web_kept, pdf_texts, web_texts
+    
+    def _render_prompt(self, query: str, pdf_entries: List[Tuple[int, str]], web_texts: List[str]) -> str:
+        """Lay out the prompt from (page, text) PDF entries and web texts"""
         prompt = f"Question: {query}\n\n"
         prompt += "Please provide a comprehensive answer based on the following sources. " \
                  "Cite sources using [n] notation.\n\n"
         
         prompt += "PDF Sources:\n"
-        for i, result in enumerate(pdf_results):
-            prompt += f"[{i+1}] (Page {result.page_number}): {result.text}\n\n"
+        for i, (page_number, text) in enumerate(pdf_entries):
+            prompt += f"[{i+1}] (Page {page_number}): {text}\n\n"
         
         prompt += "Web Sources:\n"
-        for i, result in enumerate(web_results):
-            idx = len(pdf_results) + i + 1
-            prompt += f"[{idx}] {result.title}\n{result.snippet}\n\n"
-        
-        prompt += "Instructions:\n" \
-                 "1. Synthesize information from both PDF and web sources\n" \
-                 "2. Use [n] citations to reference sources\n" \
-                 "3. Prioritize recent and high-scoring sources\n" \
-                 "4. Be concise but comprehensive\n" \
-                 "5. If sources conflict, note the discrepancy\n\n" \
-                 "Answer: "
+        for i, text in enumerate(web_texts):
+            idx = len(pdf_entries) + i + 1
+            prompt += f"[{idx}] {text}\n\n"
         
+        prompt += INSTRUCTIONS
         return prompt
     
+    def _create_prompt(
+        self,
+        query: str,
+        pdf_results: List[SearchResult],
+        web_results: List[WebSearchResult]
+    ) -> Tuple[str, List[SearchResult], List[WebSearchResult]]:
+        """Create a prompt within the token budget; returns it with the sources it cites"""
+        pdf_kept, web_kept, pdf_texts, web_texts = self._fit_sources(query, pdf_results, web_results)
+        prompt = self._render_prompt(
+            query,
+            [(result.page_number, text) for result, text in zip(pdf_kept, pdf_texts)],
+            web_texts
+        )
+        return prompt, pdf_kept, web_kept
+    
+    def _cache_key(
+        self,
+        query: str,
+        pdf_results: List[SearchResult],
+        web_results: List[WebSearchResult]
+    ) -> Tuple:
+        return (
+            " ".join(query.lower().split()),
+            tuple(result.chunk_id for result in pdf_results),
+            tuple(result.url for result in web_results),
+            self.model
+        )
+    
+    def cache_stats(self) -> Dict:
+        lookups = self.answer_cache.hits + self.answer_cache.misses
+        return {
+            "entries": len(self.answer_cache),
+            "hits": self.answer_cache.hits,
+            "misses": self.answer_cache.misses,
+            "hit_rate": self.answer_cache.hits / lookups if lookups else 0.0,
+            "coalesced": self.in_flight.coalesced,
+            "in_flight": len(self.in_flight)
+        }
+    
     async def generate_answer(
         self,
         query: str,
         pdf_results: List[SearchResult],
         web_results: List[WebSearchResult]
     ) -> AnswerResponse:
-        """Generate final answer with citations"""
+        """
+        Generate final answer with citations. Answers are cached per query and
+        retrieved sources, and identical concurrent requests share one LLM call.
+        """
+        key = self._cache_key(query, pdf_results, web_results)
+        cached: Optional[AnswerResponse] = self.answer_cache.get(key)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+        
+        async def generate() -> AnswerResponse:
+            response = await self._generate_answer(query, pdf_results, web_results)
+            self.answer_cache.set(key, response)
+            return response
+        
+        response = await self.in_flight.do(key, generate)
+        return response.model_copy(deep=True)
+    
+    async def _generate_answer(
+        self,
+        query: str,
+        pdf_results: List[SearchResult],
+        web_results: List[WebSearchResult]
+    ) -> AnswerResponse:
+        # Create prompt, keeping only the sources that fit the token budget
+        prompt, pdf_results, web_results = self._create_prompt(query, pdf_results, web_results)
+        
         # Format sources for citations
         sources = self._format_sources(pdf_results, web_results)
         
-        # Create prompt
-        prompt = self._create_prompt(query, pdf_results, web_results)
-        
         # Generate answer using OpenAI
-        response = await openai.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": "You are a research assistant that provides accurate, "
-                 "well-cited answers based on provided sources. Use [n] notation for citations."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.3,
-            max_tokens=1000
+            max_tokens=self.max_answer_tokens
         )
         
         answer = response.choices[0].message.content
         
         # Calculate confidence score based on source quality
-        total_score = sum(float(source["score"]) for source in sources 
+        total_score = sum(float(source["score"]) for source in sources
                          if source["score"] != "N/A")
         avg_score = total_score / len(sources) if sources else 0
         
@@ -100,4 +271,4 @@ class SynthesisService:
             pdf_sources_used=len(pdf_results),
             web_sources_used=len(web_results),
             confidence_score=avg_score
-        ) 
\ No newline at end of file
+        )
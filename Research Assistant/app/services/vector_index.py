@@ -0,0 +1,221 @@
+from typing import List, Optional, Tuple
+import logging
+import threading
+import numpy as np
+import faiss
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def uses_inner_product(metric: str = settings.FAISS_METRIC) -> bool:
+    """Cosine is computed as inner product over L2-normalized vectors"""
+    return metric in ("cosine", "ip")
+
+def prepare_vectors(vectors, metric: str = settings.FAISS_METRIC) -> np.ndarray:
+    """Convert to a contiguous float32 matrix, normalizing rows for cosine"""
+    vectors = np.array(vectors, dtype='float32', copy=True, ndmin=2)
+    if metric == "cosine":
+        faiss.normalize_L2(vectors)
+    return vectors
+
+def distances_to_scores(distances: np.ndarray, metric: str = settings.FAISS_METRIC) -> np.ndarray:
+    """Turn FAISS distances into similarities where higher is better"""
+    if uses_inner_product(metric):
+        return distances
+    return 1.0 / (1.0 + distances)
+
+def default_nlist(n: int) -> int:
+    """IVF list count: ~4*sqrt(n), keeping at least 39 training points per list"""
+    return max(1, min(int(4 * np.sqrt(n)), n // 39))
+
+def build_ann_index(
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    index_type: str = settings.FAISS_INDEX_TYPE,
+    metric: str = settings.FAISS_METRIC,
+    nlist: int = settings.FAISS_NLIST
+):
+    """
+    Build an IVF or HNSW index trained on (already prepared) real vectors.
+    IVF stores ids natively; HNSW is wrapped in IndexIDMap.
+    """
+    dim = vectors.shape[1]
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if uses_inner_product(metric) else faiss.METRIC_L2
+    if index_type == "HNSW":
+        base_index = faiss.IndexHNSWFlat(dim, settings.FAISS_HNSW_M, faiss_metric)
+        base_index.hnsw.efConstruction = settings.FAISS_EF_CONSTRUCTION
+    elif index_type == "IVFFlat":
+        nlist = nlist or default_nlist(len(vectors))
+        quantizer = faiss.IndexFlatIP(dim) if uses_inner_product(metric) else faiss.IndexFlatL2(dim)
+        base_index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+        sample = vectors
+        max_training = nlist * settings.FAISS_MAX_TRAIN_POINTS_PER_LIST
+        if len(vectors) > max_training:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), max_training, replace=False)]
+        base_index.train(sample)
+        # IndexIDMap.remove_ids assumes removal compacts the inner index in
+        # order, which IVF does not, so IVF keeps its own ids
+        base_index.add_with_ids(vectors, ids)
+        return base_index
+    else:
+        raise ValueError(f"Unsupported FAISS_INDEX_TYPE: {index_type}")
+
+    index = faiss.IndexIDMap(base_index)
+    index.add_with_ids(vectors, ids)
+    return index
+
+def base_index_of(index):
+    """The index wrapped by an IndexIDMap, or the index itself"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+def set_search_params(index, nprobe: int = settings.FAISS_NPROBE, ef_search: int = settings.FAISS_EF_SEARCH):
+    """Apply nprobe (IVF) or efSearch (HNSW) to an index"""
+    base_index = base_index_of(index)
+    if isinstance(base_index, faiss.IndexIVF):
+        base_index.nprobe = nprobe
+    elif isinstance(base_index, faiss.IndexHNSW):
+        base_index.hnsw.efSearch = ef_search
+
+def is_flat(index) -> bool:
+    return isinstance(base_index_of(index), faiss.IndexFlat)
+
+class VectorIndexManager:
+    """
+    Owns the FAISS index through its lifecycle.
+
+    Vectors are buffered in an exact flat index until FAISS_TRAIN_MIN_VECTORS
+    have been added. Then the configured IVF/HNSW index is trained on those
+    real vectors in a background thread and swapped in; adds and removes
+    that arrive during the build are replayed on the new index before the
+    swap. The configured metric is applied by normalizing vectors and using
+    inner-product indexes for cosine.
+    """
+
+    def __init__(self, index=None, metric: str = settings.FAISS_METRIC, index_type: str = settings.FAISS_INDEX_TYPE):
+        self.index = index
+        self.metric = metric
+        self.index_type = index_type
+        self.nprobe = settings.FAISS_NPROBE
+        self.ef_search = settings.FAISS_EF_SEARCH
+        self._lock = threading.RLock()
+        self._migration: Optional[threading.Thread] = None
+        self._pending: List[Tuple[str, np.ndarray, Optional[np.ndarray]]] = []
+        self.version = 0  # bumped whenever the index contents or structure change
+        if index is not None:
+            set_search_params(index, self.nprobe, self.ef_search)
+            self._maybe_migrate()
+
+    @property
+    def ntotal(self) -> int:
+        return 0 if self.index is None else self.index.ntotal
+
+    @property
+    def migrating(self) -> bool:
+        return self._migration is not None
+
+    def _new_flat_index(self, dim: int):
+        base_index = faiss.IndexFlatIP(dim) if uses_inner_product(self.metric) else faiss.IndexFlatL2(dim)
+        return faiss.IndexIDMap(base_index)
+
+    def add(self, vectors, ids: np.ndarray):
+        vectors = prepare_vectors(vectors, self.metric)
+        with self._lock:
+            if self.index is None:
+                self.index = self._new_flat_index(vectors.shape[1])
+            self.index.add_with_ids(vectors, ids)
+            self.version += 1
+            if self.migrating:
+                self._pending.append(("add", vectors, ids))
+        self._maybe_migrate()
+
+    def remove(self, ids: np.ndarray) -> bool:
+        """Remove vectors; False if the index type cannot (HNSW)"""
+        with self._lock:
+            if self.index is None:
+                return True
+            if self.migrating:
+                self._pending.append(("remove", ids, None))
+            try:
+                self.index.remove_ids(ids)
+                self.version += 1
+                return True
+            except RuntimeError:
+                return False
+
+    def search(self, query, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, ids) for one query; higher scores are better"""
+        query = prepare_vectors(query, self.metric)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return np.empty(0, dtype='float32'), np.empty(0, dtype='int64')
+            distances, ids = self.index.search(query, k)
+        return distances_to_scores(distances[0], self.metric), ids[0]
+
+    def replace_index(self, index):
+        """Swap in an equivalent index, e.g. a writable copy of a mmapped one"""
+        with self._lock:
+            set_search_params(index, self.nprobe, self.ef_search)
+            self.index = index
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Tune recall vs latency at query time"""
+        with self._lock:
+            self.nprobe = nprobe or self.nprobe
+            self.ef_search = ef_search or self.ef_search
+            if self.index is not None:
+                set_search_params(self.index, self.nprobe, self.ef_search)
+
+    def should_migrate(self, index) -> bool:
+        """Whether `index` is a flat buffer large enough to be replaced by the configured index"""
+        return (
+            self.index_type != "Flat"
+            and index is not None
+            and is_flat(index)
+            and index.ntotal >= settings.FAISS_TRAIN_MIN_VECTORS
+        )
+
+    def _maybe_migrate(self):
+        with self._lock:
+            if self.migrating or not self.should_migrate(self.index):
+                return
+            base_index = base_index_of(self.index)
+            vectors = base_index.reconstruct_n(0, self.index.ntotal)
+            ids = faiss.vector_to_array(self.index.id_map).astype('int64')
+            self._pending = []
+            self._migration = threading.Thread(
+                target=self._migrate, args=(vectors, ids), name="faiss-index-migration", daemon=True
+            )
+            self._migration.start()
+
+    def _migrate(self, vectors: np.ndarray, ids: np.ndarray):
+        try:
+            logger.info(f"Building {self.index_type} index on {len(vectors)} vectors")
+            new_index = build_ann_index(vectors, ids, self.index_type, self.metric)
+            set_search_params(new_index, self.nprobe, self.ef_search)
+            with self._lock:
+                for op, data, op_ids in self._pending:
+                    if op == "add":
+                        new_index.add_with_ids(data, op_ids)
+                    else:
+                        try:
+                            new_index.remove_ids(data)
+                        except RuntimeError:
+                            pass  # deleted rows are filtered by the chunk table
+                self.index = new_index
+                self.version += 1
+                self._pending = []
+            logger.info(f"Switched to {self.index_type} index")
+        except Exception:
+            logger.exception("FAISS index migration failed; keeping the flat index")
+        finally:
+            with self._lock:
+                self._migration = None
+
+    def wait(self):
+        """Block until a running migration finishes (used by tools and tests)"""
+        migration = self._migration
+        if migration is not None:
+            migration.join()
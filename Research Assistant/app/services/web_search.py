@@ -0,0 +1,97 @@
+from typing import List
+import logging
+import httpx
+from ..core.config import settings
+from ..models.document import WebSearchResult
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class WebSearchService:
+    """
+    Web search over Serper or Bing through one pooled async HTTP client.
+
+    Connections are reused across queries, and results for a normalized
+    query are cached for WEB_CACHE_TTL_SECONDS. A failing or timed-out
+    provider, or one whose response cannot be parsed, yields no web results
+    rather than an error.
+    """
+
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            timeout=settings.WEB_SEARCH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.WEB_SEARCH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WEB_SEARCH_MAX_CONNECTIONS
+            )
+        )
+        self.cache = TTLCache(settings.WEB_CACHE_MAX_ENTRIES, settings.WEB_CACHE_TTL_SECONDS)
+
+    async def aclose(self):
+        """Release pooled HTTP connections"""
+        await self.http_client.aclose()
+
+    async def search(self, query: str) -> List[WebSearchResult]:
+        """Search the web, serving repeated queries from the TTL cache"""
+        cache_key = (settings.SEARCH_PROVIDER, settings.WEB_SEARCH_LIMIT, " ".join(query.lower().split()))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [result.model_copy() for result in cached]
+
+        try:
+            results = await self._fetch(query)
+        except httpx.HTTPError as e:
+            # A slow or failing provider should not fail the PDF half of the answer
+            logger.warning(f"Web search failed: {e!r}")
+            return []
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # Non-JSON or unexpectedly shaped responses degrade the same way
+            logger.warning(f"Web search returned an unreadable response: {e!r}")
+            return []
+
+        self.cache.set(cache_key, results)
+        return [result.model_copy() for result in results]
+
+    async def _fetch(self, query: str) -> List[WebSearchResult]:
+        """Query the configured provider"""
+        if settings.SEARCH_PROVIDER == "serper":
+            headers = {
+                "X-API-KEY": settings.SERPER_API_KEY,
+                "Content-Type": "application/json"
+            }
+            response = await self.http_client.post(
+                settings.SERPER_API_URL,
+                headers=headers,
+                json={"q": query, "num": settings.WEB_SEARCH_LIMIT}
+            )
+            response.raise_for_status()
+            results = response.json().get("organic", [])
+
+            return [
+                WebSearchResult(
+                    title=result["title"],
+                    snippet=result["snippet"],
+                    url=result["link"],
+                    published_date=result.get("date")
+                ) for result in results
+            ]
+        else:  # Bing
+            headers = {
+                "Ocp-Apim-Subscription-Key": settings.BING_API_KEY
+            }
+            response = await self.http_client.get(
+                settings.BING_API_URL,
+                params={"q": query, "count": settings.WEB_SEARCH_LIMIT},
+                headers=headers
+            )
+            response.raise_for_status()
+            results = response.json().get("webPages", {}).get("value", [])
+
+            return [
+                WebSearchResult(
+                    title=result["name"],
+                    snippet=result["snippet"],
+                    url=result["url"],
+                    published_date=None
+                ) for result in results
+            ]
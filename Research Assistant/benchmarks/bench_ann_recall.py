@@ -0,0 +1,83 @@
+"""
+Recall vs latency of the IVF and HNSW indexes built by the index lifecycle
+manager, swept over nprobe and efSearch.
+
+Vectors are synthetic and clustered (like sentence embeddings); ground truth
+comes from an exact flat index with the same metric.
+
+Usage:
+    python benchmarks/bench_ann_recall.py [--n 100000] [--dim 384] [--queries 500]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.vector_index import (
+    build_ann_index, prepare_vectors, set_search_params, uses_inner_product
+)
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype('float32')
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype('float32')
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def measure(index, queries: np.ndarray, k: int):
+    """Single-query latency, as served per request"""
+    found = np.empty((len(queries), k), dtype='int64')
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        _, ids = index.search(query[None, :], k)
+        found[i] = ids[0]
+    latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+    return found, latency_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.DENSE_TOP_K)
+    parser.add_argument("--metric", default=settings.FAISS_METRIC)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(1)
+    rng = np.random.default_rng(0)
+    vectors = prepare_vectors(clustered_vectors(args.n, args.dim, 200, rng), args.metric)
+    queries = prepare_vectors(clustered_vectors(args.queries, args.dim, 200, rng), args.metric)
+    ids = np.arange(args.n, dtype='int64')
+
+    exact = faiss.IndexFlatIP(args.dim) if uses_inner_product(args.metric) else faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    truth, flat_ms = measure(exact, queries, args.k)
+    print(f"n={args.n} dim={args.dim} k={args.k} metric={args.metric}")
+    print(f"{'index':<10}{'param':<14}{'recall@k':>10}{'ms/query':>10}{'build s':>10}")
+    print(f"{'Flat':<10}{'-':<14}{1.0:>10.3f}{flat_ms:>10.3f}{'-':>10}")
+
+    sweeps = {
+        "IVFFlat": ("nprobe", [1, 4, 16, 64, 128]),
+        "HNSW": ("efSearch", [16, 32, 64, 128, 256]),
+    }
+    for index_type, (param, values) in sweeps.items():
+        start = time.perf_counter()
+        index = build_ann_index(vectors, ids, index_type, args.metric)
+        build_s = time.perf_counter() - start
+        for value in values:
+            if param == "nprobe":
+                set_search_params(index, nprobe=value)
+            else:
+                set_search_params(index, ef_search=value)
+            found, ms = measure(index, queries, args.k)
+            print(f"{index_type:<10}{f'{param}={value}':<14}{recall_at_k(found, truth):>10.3f}{ms:>10.3f}{build_s:>10.1f}")
+
+if __name__ == "__main__":
+    main()
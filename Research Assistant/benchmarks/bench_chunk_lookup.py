@@ -0,0 +1,78 @@
+"""
+Benchmark resolving dense FAISS hits to chunks as the corpus grows.
+
+Compares the chunk table (O(1) per hit) with the previous
+`document_map[list(document_map.keys())[idx]]` lookup (O(N) per hit).
+
+Usage:
+    python benchmarks/bench_chunk_lookup.py [--sizes 1000 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.chunk_table import ChunkTable
+
+LEGACY_MAX_SIZE = 100_000  # the old lookup is too slow to measure beyond this
+
+def make_chunks(n: int, chunks_per_document: int = 200):
+    document_id = None
+    for i in range(n):
+        if i % chunks_per_document == 0:
+            document_id = str(uuid.uuid4())
+        yield SimpleNamespace(
+            text=f"chunk {i}",
+            page_number=i // 10 + 1,
+            chunk_id=str(uuid.uuid4()),
+            document_id=document_id,
+            metadata={}
+        )
+
+def time_per_query(resolve, hits: np.ndarray) -> float:
+    """Mean microseconds to resolve one query's worth of hits"""
+    start = time.perf_counter()
+    for row in hits:
+        for idx in row:
+            resolve(int(idx))
+    return (time.perf_counter() - start) / len(hits) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--top-k", type=int, default=settings.DENSE_TOP_K)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"top_k={args.top_k}, queries={args.queries}")
+    print(f"{'chunks':>10}{'chunk table us/query':>24}{'legacy us/query':>20}")
+    for n in args.sizes:
+        chunks = list(make_chunks(n))
+        table = ChunkTable()
+        table.add(chunks)
+        # Delete ~1% of documents so lookups also exercise tombstones
+        for chunk in chunks[::20_000]:
+            table.delete_document(chunk.document_id)
+
+        hits = rng.integers(0, n, size=(args.queries, args.top_k))
+        table_us = time_per_query(table.get, hits)
+
+        legacy = "-"
+        if n <= LEGACY_MAX_SIZE:
+            document_map = {chunk.chunk_id: chunk for chunk in chunks}
+            legacy_queries = hits[:max(1, args.queries // 10)]
+            legacy_us = time_per_query(
+                lambda idx: document_map[list(document_map.keys())[idx]], legacy_queries
+            )
+            legacy = f"{legacy_us:.1f}"
+        print(f"{n:>10}{table_us:>24.1f}{legacy:>20}")
+
+if __name__ == "__main__":
+    main()
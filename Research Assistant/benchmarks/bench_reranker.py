@@ -0,0 +1,107 @@
+"""
+Benchmark reranking latency under concurrent load.
+
+Compares the previous approach (each request runs its own forward pass,
+padded to the longest pair, in a worker thread) with RerankerService
+(micro-batched across requests, length-bucketed, one inference thread).
+Queries are distinct, so the score cache is not exercised.
+
+Usage:
+    python benchmarks/bench_reranker.py [--concurrency 16] [--requests 128] [--candidates 10]
+        [--backend torch|torch-int8|onnx] [--model cross-encoder/ms-marco-MiniLM-L-6-v2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.reranker import RerankerService
+
+WORDS = (
+    "retrieval ranking transformer attention corpus document query passage index vector "
+    "embedding latency throughput batch model score evaluation dataset neural sparse dense"
+).split()
+
+def make_requests(n: int, candidates: int, rng: random.Random):
+    """Queries with passages of varied length, like PDF chunks of different density"""
+    requests = []
+    for i in range(n):
+        query = f"{i} " + " ".join(rng.choices(WORDS, k=rng.randint(3, 10)))
+        passages = [" ".join(rng.choices(WORDS, k=rng.randint(20, 350))) for _ in range(candidates)]
+        requests.append((query, passages))
+    return requests
+
+def score_unbatched(reranker: RerankerService, query: str, passages):
+    """The previous implementation: one forward pass per request"""
+    features = reranker.tokenizer(
+        [[query, passage] for passage in passages],
+        padding=True,
+        truncation=True,
+        return_tensors="pt",
+        max_length=512
+    )
+    with torch.no_grad():
+        return torch.sigmoid(reranker.model(**features).logits[:, 0]).numpy()
+
+async def run_load(score, requests, concurrency: int):
+    """Issue requests from `concurrency` clients; return per-request latencies and wall time"""
+    latencies = []
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def client():
+        while not queue.empty():
+            query, passages = queue.get_nowait()
+            start = time.perf_counter()
+            await score(query, passages)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return np.array(latencies) * 1000, time.perf_counter() - start
+
+def report(name: str, latencies: np.ndarray, wall: float):
+    print(
+        f"{name:<12} p50 {np.percentile(latencies, 50):8.1f} ms   "
+        f"p99 {np.percentile(latencies, 99):8.1f} ms   "
+        f"{len(latencies) / wall:7.1f} req/s"
+    )
+
+async def main(args):
+    reranker = RerankerService(args.model, args.backend)
+    requests = make_requests(args.requests, args.candidates, random.Random(0))
+
+    # Warm up both paths
+    score_unbatched(reranker, *requests[0])
+    await reranker.score(*make_requests(1, args.candidates, random.Random(1))[0])
+
+    print(f"{args.model} ({args.backend}), {args.requests} requests x {args.candidates} candidates, "
+          f"concurrency {args.concurrency}")
+    latencies, wall = await run_load(
+        lambda query, passages: asyncio.to_thread(score_unbatched, reranker, query, passages),
+        requests, args.concurrency
+    )
+    report("unbatched", latencies, wall)
+
+    latencies, wall = await run_load(reranker.score, requests, args.concurrency)
+    report("batched", latencies, wall)
+    stats = reranker.stats()
+    print(f"  {stats['mean_pairs_per_batch']:.1f} pairs per worker batch, {stats['forward_passes']} forward passes")
+    await reranker.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.RERANKER_MODEL)
+    parser.add_argument("--backend", default=settings.RERANKER_BACKEND)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--candidates", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
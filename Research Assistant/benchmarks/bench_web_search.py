@@ -0,0 +1,52 @@
+"""
+Benchmark web search latency against the mock provider.
+
+Measures sequential vs concurrent queries over the pooled client and the
+latency of repeated (cached) queries.
+
+Usage:
+    MOCK_SEARCH_LATENCY=0.5 uvicorn benchmarks.mock_search_server:app --port 8100
+    SEARCH_PROVIDER=serper SERPER_API_URL=http://localhost:8100/search \\
+        python benchmarks/bench_web_search.py [--queries 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.web_search import WebSearchService
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+async def main(queries: int):
+    service = WebSearchService()
+    try:
+        texts = [f"benchmark query {i}" for i in range(queries)]
+
+        async def sequential():
+            for text in texts:
+                await service.search(text + " seq")
+
+        sequential_time = await timed(sequential())
+        concurrent_time = await timed(asyncio.gather(*(service.search(text) for text in texts)))
+        cached_time = await timed(asyncio.gather(*(service.search(text) for text in texts)))
+
+        print(f"{queries} queries")
+        print(f"  sequential: {sequential_time * 1000:9.1f} ms")
+        print(f"  concurrent: {concurrent_time * 1000:9.1f} ms")
+        print(f"  cached:     {cached_time * 1000:9.1f} ms")
+        print(f"  cache hits: {service.cache.hits}, misses: {service.cache.misses}")
+    finally:
+        await service.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries))
@@ -0,0 +1,108 @@
+"""
+Offline evaluation of hybrid fusion strategies.
+
+Indexes a fixture corpus with the configured embedding model (FAISS) and
+Whoosh BM25, runs every query through both retrievers, and reports
+nDCG@k and fusion latency for dense only, sparse only and each
+FUSION_STRATEGY.
+
+Usage:
+    python benchmarks/eval_fusion.py [--corpus benchmarks/fixtures/fusion_corpus.json]
+        [--model sentence-transformers/all-MiniLM-L6-v2] [--depth 10] [--k 5] [--alpha 0.5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+from whoosh.fields import Schema, ID, TEXT
+from whoosh.filedb.filestore import RamStorage
+from whoosh.qparser import OrGroup, QueryParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.embedding import EmbeddingService
+from app.services.fusion import FUSION_STRATEGIES, fuse
+from app.services.vector_index import VectorIndexManager
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fusion_corpus.json")
+
+def ndcg_at_k(ranked_ids, relevance, k: int) -> float:
+    """nDCG with graded gains (2^rel - 1) and a log2 position discount"""
+    gains = [2 ** relevance.get(doc_id, 0) - 1 for doc_id in ranked_ids[:k]]
+    dcg = sum(gain / np.log2(i + 2) for i, gain in enumerate(gains))
+    ideal = sorted((2 ** rel - 1 for rel in relevance.values()), reverse=True)[:k]
+    idcg = sum(gain / np.log2(i + 2) for i, gain in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+async def main(args):
+    settings.EMBEDDING_MODEL = args.model
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    documents = corpus["documents"]
+    doc_ids = [doc["id"] for doc in documents]
+
+    # Dense: exact index, so only fusion differs between runs
+    embedding_service = EmbeddingService()
+    vectors = await embedding_service.get_embeddings_batch([doc["text"] for doc in documents])
+    vector_index = VectorIndexManager(index_type="Flat")
+    vector_index.add(vectors, np.arange(len(documents), dtype='int64'))
+
+    # Sparse: BM25 over the same text, parsed like SearchService does
+    whoosh_index = RamStorage().create_index(Schema(doc_id=ID(stored=True), content=TEXT))
+    writer = whoosh_index.writer()
+    for doc in documents:
+        writer.add_document(doc_id=doc["id"], content=doc["text"])
+    writer.commit()
+    query_parser = QueryParser("content", whoosh_index.schema, group=OrGroup)
+
+    methods = ["dense", "sparse", *FUSION_STRATEGIES]
+    ndcg = {method: [] for method in methods}
+    fusion_us = {method: [] for method in FUSION_STRATEGIES}
+    dense_ms, sparse_ms = [], []
+    weights = [args.alpha, 1 - args.alpha]
+
+    with whoosh_index.searcher() as searcher:
+        for item in corpus["queries"]:
+            start = time.perf_counter()
+            query_embedding = await embedding_service.get_embedding(item["query"])
+            scores, ids = vector_index.search(query_embedding, args.depth)
+            dense = [(doc_ids[i], float(score)) for score, i in zip(scores, ids) if i >= 0]
+            dense_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            hits = searcher.search(query_parser.parse(item["query"]), limit=args.depth)
+            sparse = [(hit["doc_id"], hit.score) for hit in hits]
+            sparse_ms.append((time.perf_counter() - start) * 1000)
+
+            relevance = item["relevant"]
+            ndcg["dense"].append(ndcg_at_k([doc_id for doc_id, _ in dense], relevance, args.k))
+            ndcg["sparse"].append(ndcg_at_k([doc_id for doc_id, _ in sparse], relevance, args.k))
+            for strategy in FUSION_STRATEGIES:
+                start = time.perf_counter()
+                fused = fuse([dense, sparse], weights, strategy)
+                fusion_us[strategy].append((time.perf_counter() - start) * 1e6)
+                ndcg[strategy].append(ndcg_at_k([doc_id for doc_id, _ in fused], relevance, args.k))
+
+    print(f"{len(corpus['queries'])} queries, {len(documents)} documents, model {args.model}, "
+          f"depth {args.depth}, alpha {args.alpha}")
+    print(f"retrieval: dense {np.mean(dense_ms):.2f} ms, sparse {np.mean(sparse_ms):.2f} ms per query")
+    print(f"{'method':<8} {'nDCG@' + str(args.k):>8} {'fusion p50':>12} {'fusion p99':>12}")
+    for method in methods:
+        line = f"{method:<8} {np.mean(ndcg[method]):8.3f}"
+        if method in fusion_us:
+            line += f" {np.percentile(fusion_us[method], 50):9.1f} us {np.percentile(fusion_us[method], 99):9.1f} us"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--depth", type=int, default=10, help="results taken from each retriever")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--alpha", type=float, default=settings.HYBRID_ALPHA, help="dense weight")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,50 @@
+"""
+Stand-in for the Serper and Bing search APIs with a fixed response delay.
+
+Usage:
+    MOCK_SEARCH_LATENCY=0.8 uvicorn benchmarks.mock_search_server:app --port 8100
+
+Then point the app at it:
+    SERPER_API_URL=http://localhost:8100/search
+    BING_API_URL=http://localhost:8100/v7.0/search
+"""
+import asyncio
+import os
+from fastapi import FastAPI, Request
+
+LATENCY = float(os.getenv("MOCK_SEARCH_LATENCY", "0.5"))
+
+app = FastAPI(title="Mock search provider")
+
+def make_results(query: str, count: int):
+    return [
+        {
+            "title": f"Result {i} for {query}",
+            "snippet": f"Snippet {i} about {query}.",
+            "url": f"https://example.com/{i}"
+        }
+        for i in range(count)
+    ]
+
+@app.post("/search")
+async def serper_search(request: Request):
+    body = await request.json()
+    await asyncio.sleep(LATENCY)
+    return {
+        "organic": [
+            {"title": r["title"], "snippet": r["snippet"], "link": r["url"]}
+            for r in make_results(body.get("q", ""), body.get("num", 5))
+        ]
+    }
+
+@app.get("/v7.0/search")
+async def bing_search(q: str = "", count: int = 5):
+    await asyncio.sleep(LATENCY)
+    return {
+        "webPages": {
+            "value": [
+                {"name": r["title"], "snippet": r["snippet"], "url": r["url"]}
+                for r in make_results(q, count)
+            ]
+        }
+    }
@@ -71,7 +71,7 @@ with st.sidebar:
                 st.session_state.uploaded_files.append(doc_info)
                 st.success(f"Uploaded: {doc_info['title']}")
         else:
-            st.error("Error uploading file")
+            st.error(f"Error uploading file: {response.json().get('detail', response.text)}")
     
     st.header("🔍 Search Settings")
     search_mode = st.radio(
@@ -0,0 +1,77 @@
+"""
+Check the accuracy drift of a BERT/Sentence-BERT inference backend.
+
+Classifiers are trained on the embeddings stored in the model registry
+(normally produced by the fp32 torch backend). This re-embeds the dataset
+with the candidate backend and reports, per model, the cosine similarity to
+the stored embeddings, prediction agreement, and the trained classifier's
+test-split accuracy and macro F1 on both. Exits non-zero when accuracy drops
+by more than --max-drop.
+
+Usage (from backend/):
+    python -m app.check_drift [--backend onnx-int8] [--models bert sbert] [--max-drop 0.02]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the trained models")
+    parser.add_argument('--backend', default='onnx-int8', choices=['torch', 'onnx', 'onnx-int8'])
+    parser.add_argument('--models', nargs='+', default=['bert', 'sbert'], choices=['bert', 'sbert'])
+    parser.add_argument('--max-drop', type=float, default=0.02, help="largest acceptable test accuracy drop")
+    args = parser.parse_args()
+
+    # The backend is read when the embedding factory is created; caching is
+    # off so every text is re-embedded by the candidate backend and timed
+    os.environ['EMBEDDING_BACKEND'] = args.backend
+    os.environ['EMBEDDING_CACHE_MODELS'] = ''
+    from .models.classifier import ArticleClassifier
+    classifier = ArticleClassifier()
+
+    failed = False
+    for model_name in args.models:
+        if model_name not in classifier.models:
+            print(f"{model_name}: no trained model; run `python -m app.train` first")
+            failed = True
+            continue
+        artifacts = classifier.registry.load(model_name, classifier.artifact_keys[model_name])
+        reference = np.asarray(artifacts.embeddings)
+        model = artifacts.classifier
+
+        # Load (and on first use export) the backend before timing
+        classifier.embedding_factory.get_embeddings(classifier.data[:1], model_name)
+        start = time.perf_counter()
+        candidate = classifier.embedding_factory.get_embeddings(classifier.data, model_name)
+        elapsed = time.perf_counter() - start
+
+        cosine = (reference * candidate).sum(axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1) + 1e-12
+        )
+        agreement = np.mean(model.predict(reference) == model.predict(candidate))
+        y_test = [classifier.labels[i] for i in artifacts.test_indices]
+        reference_pred = model.predict(reference[artifacts.test_indices])
+        candidate_pred = model.predict(candidate[artifacts.test_indices])
+        accuracy = accuracy_score(y_test, reference_pred), accuracy_score(y_test, candidate_pred)
+        macro_f1 = (
+            f1_score(y_test, reference_pred, average='macro', zero_division=0),
+            f1_score(y_test, candidate_pred, average='macro', zero_division=0)
+        )
+
+        print(f"{model_name} ({artifacts.manifest.get('embedding_backend', 'torch')} -> {args.backend}):")
+        print(f"  cosine similarity  mean {cosine.mean():.4f}  min {cosine.min():.4f}")
+        print(f"  prediction agreement {agreement:.1%}")
+        print(f"  test accuracy {accuracy[0]:.3f} -> {accuracy[1]:.3f}   macro F1 {macro_f1[0]:.3f} -> {macro_f1[1]:.3f}")
+        print(f"  embedded {len(classifier.data)} articles in {elapsed:.2f}s")
+        if accuracy[0] - accuracy[1] > args.max_drop:
+            print(f"  accuracy drop exceeds {args.max_drop}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
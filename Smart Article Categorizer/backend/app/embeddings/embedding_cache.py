@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), '../../artifacts')
+
+# SQLite's default limit on host parameters per statement is 999
+LOOKUP_CHUNK = 900
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    Embeddings keyed on (namespace, sha256(text)).
+
+    A bounded in-memory LRU of EMBEDDING_CACHE_SIZE entries sits in front of
+    a SQLite store at EMBEDDING_CACHE_PATH (default: embedding_cache.sqlite
+    in MODEL_DIR; empty keeps the cache in memory only). Namespaces identify
+    the model and everything that changes its output (version, inference
+    backend). Lookups and writes take whole batches, so a batch costs one
+    query per 900 texts rather than one per text.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('EMBEDDING_CACHE_SIZE', '10000'))
+        if path is None:
+            default_path = os.path.join(os.getenv('MODEL_DIR', DEFAULT_MODEL_DIR), 'embedding_cache.sqlite')
+            path = os.getenv('EMBEDDING_CACHE_PATH', default_path)
+        self.memory: OrderedDict = OrderedDict()
+        self.stats_by_namespace: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS embeddings ('
+                'namespace TEXT, text_hash TEXT, dtype TEXT, vector BLOB, '
+                'PRIMARY KEY (namespace, text_hash))'
+            )
+            self.db.commit()
+
+    def _count(self, namespace: str, field: str, amount: int):
+        counts = self.stats_by_namespace.setdefault(namespace, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})
+        counts[field] += amount
+
+    def _remember(self, key: Tuple[str, str], embedding: np.ndarray):
+        self.memory[key] = embedding
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, namespace: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings of texts, None where missing"""
+        hashes = [text_hash(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        with self._lock:
+            for i, digest in enumerate(hashes):
+                embedding = self.memory.get((namespace, digest))
+                if embedding is not None:
+                    self.memory.move_to_end((namespace, digest))
+                    results[i] = embedding
+            memory_hits = sum(result is not None for result in results)
+            self._count(namespace, 'memory_hits', memory_hits)
+
+            missing = list({hashes[i] for i, result in enumerate(results) if result is None})
+            found = {}
+            if self.db is not None:
+                for start in range(0, len(missing), LOOKUP_CHUNK):
+                    chunk = missing[start:start + LOOKUP_CHUNK]
+                    rows = self.db.execute(
+                        f"SELECT text_hash, dtype, vector FROM embeddings WHERE namespace = ? "
+                        f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                        [namespace, *chunk]
+                    )
+                    for digest, dtype, vector in rows:
+                        found[digest] = np.frombuffer(vector, dtype=dtype)
+                        self._remember((namespace, digest), found[digest])
+
+            for i, digest in enumerate(hashes):
+                if results[i] is None and digest in found:
+                    results[i] = found[digest]
+            disk_hits = sum(result is not None for result in results) - memory_hits
+            self._count(namespace, 'disk_hits', disk_hits)
+            self._count(namespace, 'misses', len(texts) - memory_hits - disk_hits)
+        return results
+
+    def put_many(self, namespace: str, texts: List[str], embeddings: np.ndarray):
+        rows = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                digest = text_hash(text)
+                embedding = np.array(embedding)
+                embedding.flags.writeable = False
+                self._remember((namespace, digest), embedding)
+                rows.append((namespace, digest, embedding.dtype.str, embedding.tobytes()))
+            if self.db is not None and rows:
+                self.db.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)', rows)
+                self.db.commit()
+
+    def stats(self, namespace: str) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self.stats_by_namespace.get(namespace, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}))
+        lookups = sum(counts.values())
+        hits = counts['memory_hits'] + counts['disk_hits']
+        return dict(counts, lookups=lookups, hit_rate=hits / lookups if lookups else 0.0)
@@ -1,86 +1,345 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Executor
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModel
-import torch
-import gensim.downloader as api
-from openai import OpenAI
+import asyncio
+import gc
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
+from .embedding_cache import EmbeddingCache
+
 load_dotenv()
 
+# Versions of the embedding models; trained classifiers are keyed on these
+MODEL_VERSIONS = {
+    'word2vec': 'word2vec-google-news-300',
+    'bert': 'bert-base-uncased',
+    'sbert': 'sentence-transformers/all-MiniLM-L6-v2',
+    'openai': 'text-embedding-ada-002'
+}
+
+# Entries of self.models owned by each backend
+BACKEND_MODELS = {
+    'word2vec': ['word2vec'],
+    'bert': ['bert_tokenizer', 'bert_model'],
+    'sbert': ['sbert'],
+    'openai': ['openai', 'openai_async']
+}
+
+DEFAULT_WORD2VEC_PATH = os.path.join(os.path.dirname(__file__), '../../models/word2vec-google-news-300.kv')
+
 class EmbeddingFactory:
+    """
+    Embeddings from the enabled backends (ENABLED_MODELS, comma separated).
+
+    Nothing is loaded at construction: each backend loads on its first
+    request and, when MODEL_IDLE_TIMEOUT is set, is unloaded again after
+    that many idle seconds. Word2vec is opened from a local KeyedVectors
+    file with mmap='r', so worker processes share its pages instead of each
+    holding a private copy.
+    """
+
     def __init__(self):
         self.models = {}
-        self.initialize_models()
+        enabled = os.getenv('ENABLED_MODELS', ','.join(MODEL_VERSIONS))
+        self.enabled_models = [name.strip() for name in enabled.split(',') if name.strip()]
+        unknown = [name for name in self.enabled_models if name not in MODEL_VERSIONS]
+        if unknown:
+            raise ValueError(f"Unknown model in ENABLED_MODELS: {', '.join(unknown)}")
+        self.word2vec_path = os.getenv('WORD2VEC_PATH', DEFAULT_WORD2VEC_PATH)
+        self.idle_timeout = float(os.getenv('MODEL_IDLE_TIMEOUT', '0'))
+        self.batch_size = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+        # BERT/Sentence-BERT inference: "torch" (fp32), "onnx" or "onnx-int8" (ONNX Runtime)
+        self.backend = os.getenv('EMBEDDING_BACKEND', 'torch')
+        if self.backend not in ('torch', 'onnx', 'onnx-int8'):
+            raise ValueError(f"Unsupported EMBEDDING_BACKEND: {self.backend}")
+        self.threads = int(os.getenv('EMBEDDING_THREADS', '0'))
+        # Averaging word2vec vectors is cheaper than a cache lookup, so it is not cached by default
+        cached = os.getenv('EMBEDDING_CACHE_MODELS', 'bert,sbert,openai')
+        self.cached_models = {name.strip() for name in cached.split(',') if name.strip()}
+        self.cache = EmbeddingCache()
+        self.openai_batch_size = int(os.getenv('OPENAI_BATCH_SIZE', '512'))
+        # Tokens per request, below the API's 300k limit
+        self.openai_batch_tokens = int(os.getenv('OPENAI_BATCH_TOKENS', '250000'))
+        self._token_encoding = None  # False once tiktoken turned out to be unavailable
+        self.last_used: Dict[str, float] = {}
+        self.load_seconds: Dict[str, float] = {}
+        self._load_locks = {name: threading.Lock() for name in MODEL_VERSIONS}
+        if self.idle_timeout > 0:
+            threading.Thread(target=self._unload_idle_models, name="embedding-unloader", daemon=True).start()
+
+    def _ensure_loaded(self, model_name: str) -> Tuple:
+        """
+        Load a backend on first use; returns its BACKEND_MODELS objects, read
+        under the load lock so the idle unloader cannot drop them in between
+        """
+        if model_name not in self.enabled_models:
+            raise ValueError(f"Model {model_name} is not enabled (ENABLED_MODELS)")
+        with self._load_locks[model_name]:
+            self.last_used[model_name] = time.monotonic()
+            if not all(key in self.models for key in BACKEND_MODELS[model_name]):
+                start = time.perf_counter()
+                getattr(self, f'_load_{model_name}')()
+                self.load_seconds[model_name] = time.perf_counter() - start
+                print(f"Loaded {model_name} in {self.load_seconds[model_name]:.1f}s")
+            return tuple(self.models[key] for key in BACKEND_MODELS[model_name])
 
-    def initialize_models(self):
-        # Initialize Word2Vec
-        print("Loading Word2Vec model...")
-        self.models['word2vec'] = api.load('word2vec-google-news-300')
+    def _load_word2vec(self):
+        if not os.path.exists(self.word2vec_path):
+            raise FileNotFoundError(
+                f"Word2Vec vectors not found at {self.word2vec_path}; "
+                "run `python -m app.embeddings.prepare_word2vec` once to create them"
+            )
+        from gensim.models import KeyedVectors
+        self.models['word2vec'] = KeyedVectors.load(self.word2vec_path, mmap='r')
+
+    def _load_onnx(self, model_name: str):
+        from .onnx_backend import OnnxEncoder
+        return OnnxEncoder(
+            MODEL_VERSIONS[model_name], model_name,
+            quantize=self.backend == 'onnx-int8', intra_op_threads=self.threads
+        )
 
-        # Initialize BERT
-        print("Loading BERT model...")
-        self.models['bert_tokenizer'] = AutoTokenizer.from_pretrained('bert-base-uncased')
-        self.models['bert_model'] = AutoModel.from_pretrained('bert-base-uncased')
+    def _load_bert(self):
+        if self.backend != 'torch':
+            encoder = self._load_onnx('bert')
+            self.models['bert_tokenizer'] = encoder.tokenizer
+            self.models['bert_model'] = encoder
+            return
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_VERSIONS['bert'])
+        model = AutoModel.from_pretrained(MODEL_VERSIONS['bert'])
+        model.eval()
+        self.models['bert_tokenizer'] = tokenizer
+        self.models['bert_model'] = model
 
-        # Initialize Sentence-BERT
-        print("Loading Sentence-BERT model...")
-        self.models['sbert'] = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+    def _load_sbert(self):
+        if self.backend != 'torch':
+            self.models['sbert'] = self._load_onnx('sbert')
+            return
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.models['sbert'] = SentenceTransformer(MODEL_VERSIONS['sbert'])
 
-        # Initialize OpenAI client
+    def _load_openai(self):
+        from openai import OpenAI, AsyncOpenAI
         self.models['openai'] = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.models['openai_async'] = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
-    def get_word2vec_embedding(self, text: str) -> np.ndarray:
-        words = text.lower().split()
-        word_vectors = [
-            self.models['word2vec'][word]
-            for word in words
-            if word in self.models['word2vec']
+    def unload(self, model_name: str):
+        """Drop a backend; requests already holding it finish normally"""
+        with self._load_locks[model_name]:
+            for key in BACKEND_MODELS[model_name]:
+                self.models.pop(key, None)
+        gc.collect()
+
+    def _unload_idle_models(self):
+        while True:
+            time.sleep(min(60.0, self.idle_timeout))
+            now = time.monotonic()
+            for model_name, last_used in list(self.last_used.items()):
+                if now - last_used > self.idle_timeout and BACKEND_MODELS[model_name][0] in self.models:
+                    print(f"Unloading idle {model_name} model")
+                    self.unload(model_name)
+
+    def loaded_models(self) -> List[str]:
+        return [
+            model_name for model_name in self.enabled_models
+            if all(key in self.models for key in BACKEND_MODELS[model_name])
         ]
-        if not word_vectors:
-            return np.zeros(300)
-        return np.mean(word_vectors, axis=0)
 
-    def get_bert_embedding(self, text: str) -> np.ndarray:
-        tokenizer = self.models['bert_tokenizer']
-        model = self.models['bert_model']
+    def get_word2vec_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Average word vectors per text with one gather and one segmented sum"""
+        word2vec, = self._ensure_loaded('word2vec')
+        key_to_index = word2vec.key_to_index
+        indices = []
+        counts = np.zeros(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            text_indices = [key_to_index[word] for word in text.lower().split() if word in key_to_index]
+            indices.extend(text_indices)
+            counts[i] = len(text_indices)
         
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-        with torch.no_grad():
-            outputs = model(**inputs)
+        embeddings = np.zeros((len(texts), word2vec.vector_size), dtype=np.float32)
+        if indices:
+            vectors = word2vec.vectors[np.array(indices)]
+            has_words = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[has_words]
+            embeddings[has_words] = np.add.reduceat(vectors, starts, axis=0) / counts[has_words, None]
+        return embeddings
+
+    def get_word2vec_embedding(self, text: str) -> np.ndarray:
+        return self.get_word2vec_embeddings([text])[0]
+
+    def get_bert_embeddings(self, texts: List[str]) -> np.ndarray:
+        """[CLS] embeddings in padded batches of texts with similar lengths"""
+        import torch
+        tokenizer, model = self._ensure_loaded('bert')
+        if self.backend != 'torch':
+            return model.embed(texts, self.batch_size)
         
-        # Get [CLS] token embedding
-        cls_embedding = outputs.last_hidden_state[:, 0, :].numpy()
-        return cls_embedding[0]
+        # Sorting by length keeps padding within each batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.zeros((len(texts), model.config.hidden_size), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            inputs = tokenizer([texts[i] for i in batch], return_tensors="pt", truncation=True, max_length=512, padding=True)
+            with torch.no_grad():
+                outputs = model(**inputs)
+            
+            # Get [CLS] token embedding
+            embeddings[batch] = outputs.last_hidden_state[:, 0, :].numpy()
+        return embeddings
+
+    def get_bert_embedding(self, text: str) -> np.ndarray:
+        return self.get_bert_embeddings([text])[0]
+
+    def get_sbert_embeddings(self, texts: List[str]) -> np.ndarray:
+        model, = self._ensure_loaded('sbert')
+        if self.backend != 'torch':
+            return model.embed(texts, self.batch_size)
+        return model.encode(texts, batch_size=self.batch_size)
 
     def get_sbert_embedding(self, text: str) -> np.ndarray:
-        return self.models['sbert'].encode(text)
+        return self.get_sbert_embeddings([text])[0]
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens of text for the OpenAI model; a conservative estimate without tiktoken"""
+        if self._token_encoding is None:
+            try:
+                import tiktoken
+                self._token_encoding = tiktoken.encoding_for_model(MODEL_VERSIONS['openai'])
+            except Exception as e:
+                # Not installed, or its vocabulary could not be downloaded
+                print(f"Estimating OpenAI token counts without tiktoken: {e!r}")
+                self._token_encoding = False
+        if self._token_encoding is False:
+            return len(text.encode('utf-8')) // 3 + 1
+        return len(self._token_encoding.encode(text, disallowed_special=()))
+
+    def _openai_batches(self, texts: List[str]) -> List[List[str]]:
+        """Consecutive slices of texts within OPENAI_BATCH_SIZE inputs and OPENAI_BATCH_TOKENS tokens"""
+        batches = []
+        start, tokens = 0, 0
+        for end, text in enumerate(texts):
+            text_tokens = self.count_tokens(text)
+            if end > start and (end - start == self.openai_batch_size or tokens + text_tokens > self.openai_batch_tokens):
+                batches.append(texts[start:end])
+                start, tokens = end, 0
+            tokens += text_tokens
+        if start < len(texts):
+            batches.append(texts[start:])
+        return batches
+
+    def get_openai_embeddings(self, texts: List[str]) -> np.ndarray:
+        """One embeddings request per batch of OPENAI_BATCH_SIZE texts and OPENAI_BATCH_TOKENS tokens"""
+        client, _ = self._ensure_loaded('openai')
+        embeddings = []
+        for batch in self._openai_batches(texts):
+            response = client.embeddings.create(
+                model=MODEL_VERSIONS['openai'],
+                input=batch
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return np.array(embeddings)
 
     def get_openai_embedding(self, text: str) -> np.ndarray:
-        response = self.models['openai'].embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return np.array(response.data[0].embedding)
+        return self.get_openai_embeddings([text])[0]
 
-    def get_embedding(self, text: str, model_name: str) -> np.ndarray:
+    def cache_namespace(self, model_name: str) -> str:
+        """Cache namespace: the model version and, for BERT/Sentence-BERT, the inference backend"""
+        namespace = f"{model_name}:{MODEL_VERSIONS[model_name]}"
+        if model_name in ('bert', 'sbert'):
+            namespace += f":{self.backend}"
+        return namespace
+
+    def _compute_embeddings(self, texts: List[str], model_name: str) -> np.ndarray:
         if model_name == 'word2vec':
-            return self.get_word2vec_embedding(text)
+            return self.get_word2vec_embeddings(texts)
         elif model_name == 'bert':
-            return self.get_bert_embedding(text)
+            return self.get_bert_embeddings(texts)
         elif model_name == 'sbert':
-            return self.get_sbert_embedding(text)
+            return self.get_sbert_embeddings(texts)
         elif model_name == 'openai':
-            return self.get_openai_embedding(text)
+            return self.get_openai_embeddings(texts)
         else:
             raise ValueError(f"Unknown model: {model_name}")
 
+    def _cache_lookup(self, texts: List[str], model_name: str) -> Tuple[List[Optional[np.ndarray]], List[str]]:
+        """Cached embeddings (None where missing) and the distinct texts still to embed"""
+        cached = self.cache.get_many(self.cache_namespace(model_name), texts)
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, cached) if embedding is None))
+        return cached, missing
+
+    def _cache_fill(self, texts: List[str], model_name: str, cached: List[Optional[np.ndarray]],
+                    missing: List[str], computed: np.ndarray) -> np.ndarray:
+        if missing:
+            self.cache.put_many(self.cache_namespace(model_name), missing, computed)
+        by_text = dict(zip(missing, computed))
+        return np.stack([
+            embedding if embedding is not None else by_text[text]
+            for text, embedding in zip(texts, cached)
+        ])
+
+    def get_embeddings(self, texts: List[str], model_name: str) -> np.ndarray:
+        """
+        Embeddings of several texts as one (len(texts), dim) matrix. Texts in
+        the embedding cache are not recomputed; the rest are embedded in one
+        batch (each distinct text once) and added to the cache.
+        """
+        if model_name not in MODEL_VERSIONS:
+            raise ValueError(f"Unknown model: {model_name}")
+        if not texts or model_name not in self.cached_models:
+            return self._compute_embeddings(texts, model_name)
+        
+        cached, missing = self._cache_lookup(texts, model_name)
+        computed = self._compute_embeddings(missing, model_name) if missing else []
+        return self._cache_fill(texts, model_name, cached, missing, computed)
+
+    async def aget_embeddings(self, texts: List[str], model_name: str,
+                              executor: Optional[Executor] = None) -> np.ndarray:
+        """
+        Embeddings without blocking the event loop: OpenAI through its async
+        client, local backends (torch, numpy) in executor threads.
+        """
+        loop = asyncio.get_running_loop()
+        if model_name != 'openai':
+            return await loop.run_in_executor(executor, self.get_embeddings, texts, model_name)
+        if not texts or model_name not in self.cached_models:
+            return await self._aget_openai_embeddings(texts)
+
+        # The cache is SQLite; read and write it in the executor too
+        cached, missing = await loop.run_in_executor(executor, self._cache_lookup, texts, model_name)
+        computed = await self._aget_openai_embeddings(missing) if missing else []
+        return await loop.run_in_executor(
+            executor, self._cache_fill, texts, model_name, cached, missing, computed
+        )
+
+    async def _aget_openai_embeddings(self, texts: List[str]) -> np.ndarray:
+        _, client = self._ensure_loaded('openai')
+        # Counting tokens is CPU work; keep it off the event loop
+        batches = await asyncio.to_thread(self._openai_batches, texts)
+        responses = await asyncio.gather(*[
+            client.embeddings.create(model=MODEL_VERSIONS['openai'], input=batch)
+            for batch in batches
+        ])
+        return np.array([
+            item.embedding
+            for response in responses
+            for item in sorted(response.data, key=lambda item: item.index)
+        ])
+
+    def get_embedding(self, text: str, model_name: str) -> np.ndarray:
+        return self.get_embeddings([text], model_name)[0]
+
     def get_all_embeddings(self, text: str) -> Dict[str, np.ndarray]:
         return {
-            'word2vec': self.get_word2vec_embedding(text),
-            'bert': self.get_bert_embedding(text),
-            'sbert': self.get_sbert_embedding(text),
-            'openai': self.get_openai_embedding(text)
-        } 
\ No newline at end of file
+            model_name: self.get_embedding(text, model_name)
+            for model_name in self.enabled_models
+        }
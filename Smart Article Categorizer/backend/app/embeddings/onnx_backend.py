@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+import inspect
+import json
+import os
+
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(__file__), '../../models/onnx')
+
+def _load_transformer(model_name: str, kind: str, max_length: int):
+    """The torch encoder to export, its tokenizer and how its output is pooled"""
+    if kind == 'sbert':
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.models import Normalize, Pooling
+        sbert = SentenceTransformer(model_name, device='cpu')
+        pooling = next(module for module in sbert if isinstance(module, Pooling)).get_config_dict()
+        # sentence-transformers 2.x stores one flag per mode, later releases a single pooling_mode
+        if pooling.get('pooling_mode_mean_tokens') or pooling.get('pooling_mode') == 'mean':
+            mode = 'mean'
+        elif pooling.get('pooling_mode_cls_token') or pooling.get('pooling_mode') == 'cls':
+            mode = 'cls'
+        else:
+            raise ValueError(f"Unsupported pooling for ONNX export of {model_name}: {pooling}")
+        config = {
+            'pooling': mode,
+            'normalize': any(isinstance(module, Normalize) for module in sbert),
+            'max_length': sbert.max_seq_length
+        }
+        return sbert[0].auto_model, sbert.tokenizer, config
+
+    from transformers import AutoTokenizer, AutoModel
+    return (
+        AutoModel.from_pretrained(model_name),
+        AutoTokenizer.from_pretrained(model_name),
+        {'pooling': 'cls', 'normalize': False, 'max_length': max_length}
+    )
+
+def export_encoder(model_name: str, kind: str, output_dir: str, quantize: bool = True, max_length: int = 512) -> str:
+    """
+    Export a BERT-style encoder to ONNX with dynamic batch and sequence axes,
+    optionally with dynamic int8 weight quantization. Returns the directory
+    holding model.onnx (or model-int8.onnx), the tokenizer and pooling.json.
+    """
+    import torch
+
+    model, tokenizer, config = _load_transformer(model_name, kind, max_length)
+    model.eval()
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+
+    sample = tokenizer(["a short sample", "and a somewhat longer sample sentence"], padding=True, return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    # Newer torch releases default to the dynamo exporter; the TorchScript one handles dynamic_axes
+    options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+    class LastHiddenState(torch.nn.Module):
+        """Positional inputs in input_names order, last_hidden_state out"""
+
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)), return_dict=True).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **options
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(output_dir, 'model-int8.onnx'), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    # Written last; its presence marks a complete export
+    with open(os.path.join(output_dir, 'pooling.json'), 'w') as f:
+        json.dump(dict(config, model_name=model_name, input_names=input_names), f)
+    return output_dir
+
+class OnnxEncoder:
+    """
+    Sentence embeddings from an exported encoder on ONNX Runtime.
+
+    The export is created on first use under ONNX_DIR and reused after that.
+    Inputs are padded only to the longest text of each length-sorted batch,
+    so short texts do not pay for max_length. intra_op_threads sets ONNX
+    Runtime's intra-op thread count (0 lets it choose).
+    """
+
+    def __init__(self, model_name: str, kind: str, quantize: bool = True, onnx_dir: Optional[str] = None,
+                 intra_op_threads: int = 0, max_length: int = 512):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=onnx requires `pip install onnxruntime onnx`") from e
+        from transformers import AutoTokenizer
+
+        onnx_dir = onnx_dir or os.getenv('ONNX_DIR', DEFAULT_ONNX_DIR)
+        self.path = os.path.join(onnx_dir, model_name.replace('/', '--'))
+        if not os.path.exists(os.path.join(self.path, 'pooling.json')):
+            print(f"Exporting {model_name} to ONNX...")
+            export_encoder(model_name, kind, self.path, quantize=True, max_length=max_length)
+        with open(os.path.join(self.path, 'pooling.json')) as f:
+            self.config: Dict[str, Any] = json.load(f)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            os.path.join(self.path, 'model-int8.onnx' if quantize else 'model.onnx'),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(self.path)
+        self.max_length = self.config['max_length']
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors='np')
+        feed = {name: inputs[name].astype(np.int64) for name in self.config['input_names']}
+        hidden = self.session.run(['last_hidden_state'], feed)[0]
+
+        if self.config['pooling'] == 'cls':
+            embeddings = hidden[:, 0, :]
+        else:
+            mask = inputs['attention_mask'][:, :, None].astype(hidden.dtype)
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config['normalize']:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+    def embed(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Sorting by length keeps padding within each batch small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = None
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            batch_embeddings = self._embed_batch([texts[i] for i in batch])
+            if embeddings is None:
+                embeddings = np.zeros((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+            embeddings[batch] = batch_embeddings
+        return embeddings
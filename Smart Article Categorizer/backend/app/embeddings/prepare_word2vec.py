@@ -0,0 +1,29 @@
+"""
+Download the word2vec vectors once and save them as a KeyedVectors file
+that the server memory-maps (mmap='r') instead of loading into each process.
+
+Usage (from backend/):
+    python -m app.embeddings.prepare_word2vec [--output PATH]
+"""
+import argparse
+import os
+
+from .embedding_factory import MODEL_VERSIONS, DEFAULT_WORD2VEC_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare memory-mappable word2vec vectors")
+    parser.add_argument('--output', default=os.getenv('WORD2VEC_PATH', DEFAULT_WORD2VEC_PATH),
+                        help="KeyedVectors file to write (default: WORD2VEC_PATH)")
+    args = parser.parse_args()
+
+    import gensim.downloader as api
+
+    print(f"Downloading {MODEL_VERSIONS['word2vec']}...")
+    vectors = api.load(MODEL_VERSIONS['word2vec'])
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    # Vector arrays are stored as separate .npy files, which KeyedVectors.load can memory-map
+    vectors.save(args.output)
+    print(f"Saved {len(vectors.index_to_key)} vectors to {args.output}")
+
+if __name__ == "__main__":
+    main()
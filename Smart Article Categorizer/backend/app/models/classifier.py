@@ -1,28 +1,41 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.model_selection import train_test_split
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
 import os
+import threading
 import pandas as pd
 
-from ..embeddings.embedding_factory import EmbeddingFactory
+from ..embeddings.embedding_factory import EmbeddingFactory, MODEL_VERSIONS
+from .registry import ModelRegistry
+from ..utils.visualization import ProjectionStore
 
 class ArticleClassifier:
     CATEGORIES = ['Tech', 'Finance', 'Healthcare', 'Sports', 'Politics', 'Entertainment']
-    
-    def __init__(self):
+    MODEL_NAMES = ['word2vec', 'bert', 'sbert', 'openai']
+    # Cheapest first; cascade mode escalates along this order
+    CASCADE_ORDER = ['word2vec', 'sbert', 'bert', 'openai']
+    MODES = ['all', 'cascade']
+
+    def __init__(self, registry: Optional[ModelRegistry] = None):
         self.embedding_factory = EmbeddingFactory()
-        self.models = {
-            'word2vec': LogisticRegression(max_iter=1000),
-            'bert': LogisticRegression(max_iter=1000),
-            'sbert': LogisticRegression(max_iter=1000),
-            'openai': LogisticRegression(max_iter=1000)
-        }
+        self.registry = registry or ModelRegistry()
+        self.projections = ProjectionStore(self.registry)
+        self.models = {}
         self.metrics = {}
+        self.embeddings = {}  # training-set embedding matrices (memory-mapped), in data order
+        self.artifact_keys = {}
+        self._train_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('CLASSIFY_WORKERS', '4')), thread_name_prefix='classify'
+        )
+        self.cascade_threshold = float(os.getenv('CASCADE_THRESHOLD', '0.7'))
         self.load_data()
-        self.train_models()
+        self.load_models()
 
     def load_data(self):
         """Load and prepare the training data"""
@@ -50,67 +63,235 @@ class ArticleClassifier:
             ]
             self.data = sample_texts
             self.labels = self.CATEGORIES[:len(sample_texts)]
+        self.dataset_hash = ModelRegistry.dataset_hash(self.data, self.labels)
 
-    def train_models(self):
-        """Train all embedding models"""
-        X_train, X_test, y_train, y_test = train_test_split(
-            self.data, self.labels, test_size=0.2, random_state=42
-        )
+    def artifact_key(self, model_name: str) -> str:
+        """Registry key for a model trained on the current data and embedding model version"""
+        return ModelRegistry.artifact_key(self.dataset_hash, MODEL_VERSIONS[model_name])
 
-        for model_name in self.models:
-            print(f"Training {model_name} model...")
-            
-            # Get embeddings for training data
-            X_train_emb = np.array([
-                self.embedding_factory.get_embedding(text, model_name)
-                for text in X_train
-            ])
-            
-            # Get embeddings for test data
-            X_test_emb = np.array([
-                self.embedding_factory.get_embedding(text, model_name)
-                for text in X_test
-            ])
-            
-            # Train the model
-            self.models[model_name].fit(X_train_emb, y_train)
-            
-            # Calculate metrics
-            y_pred = self.models[model_name].predict(X_test_emb)
-            report = classification_report(y_test, y_pred, output_dict=True)
-            conf_matrix = confusion_matrix(y_test, y_pred).tolist()
-            
-            self.metrics[model_name] = {
-                'classification_report': report,
-                'confusion_matrix': conf_matrix
-            }
+    def stale_models(self) -> List[str]:
+        """Enabled models with no artifacts for the current data and embedding model version"""
+        return [
+            model_name for model_name in self.embedding_factory.enabled_models
+            if not self.registry.exists(model_name, self.artifact_key(model_name))
+        ]
+
+    def load_models(self):
+        """Load trained enabled models from the registry; stale models stay unavailable until retrained"""
+        for model_name in self.embedding_factory.enabled_models:
+            key = self.artifact_key(model_name)
+            if not self.registry.exists(model_name, key):
+                print(f"No trained {model_name} model for the current data; run `python -m app.train`")
+                continue
+            self._use_artifacts(model_name, key)
+
+    def _use_artifacts(self, model_name: str, key: str):
+        artifacts = self.registry.load(model_name, key)
+        self.models[model_name] = artifacts.classifier
+        self.metrics[model_name] = artifacts.metrics
+        self.embeddings[model_name] = artifacts.embeddings
+        self.artifact_keys[model_name] = key
+        self.projections.forget(model_name, key)
+
+    def start_projections(self):
+        """
+        Fit the loaded models' visualization projections that are not on disk
+        yet in the background. Only the server calls this: the projection
+        worker is not a daemon, so CLI runs would wait at exit for the fits.
+        """
+        for model_name in list(self.models):
+            self.projections.ensure(model_name, self.artifact_keys[model_name], self.embeddings[model_name])
 
-    def classify(self, text: str) -> Dict[str, Any]:
-        """Classify a single article using all models"""
-        results = {}
+    def train_models(self, model_names: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """
+        Train the given models (default: all enabled) whose artifacts are
+        missing or, with force, all of them. Returns each model's status.
+        """
+        model_names = model_names or self.embedding_factory.enabled_models
+        unknown = [model_name for model_name in model_names if model_name not in self.MODEL_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown model: {', '.join(unknown)}")
+        disabled = [model_name for model_name in model_names if model_name not in self.embedding_factory.enabled_models]
+        if disabled:
+            raise ValueError(f"Model not enabled (ENABLED_MODELS): {', '.join(disabled)}")
         
-        for model_name, model in self.models.items():
-            # Get embedding
-            embedding = self.embedding_factory.get_embedding(text, model_name)
+        if not self._train_lock.acquire(blocking=False):
+            raise RuntimeError("Training is already running")
+        try:
+            train_indices, test_indices = train_test_split(
+                np.arange(len(self.data)), test_size=0.2, random_state=42
+            )
+            y_train = [self.labels[i] for i in train_indices]
+            y_test = [self.labels[i] for i in test_indices]
             
-            # Get prediction and probabilities
-            prediction = model.predict([embedding])[0]
-            probabilities = model.predict_proba([embedding])[0]
-            
-            # Get confidence scores for all classes
+            status = {}
+            for model_name in model_names:
+                key = self.artifact_key(model_name)
+                if not force and self.registry.exists(model_name, key):
+                    status[model_name] = 'up-to-date'
+                    continue
+                
+                print(f"Training {model_name} model...")
+                
+                # Embed the whole dataset once; train and test rows are views into it
+                embeddings = self.embedding_factory.get_embeddings(self.data, model_name)
+                X_train_emb = embeddings[train_indices]
+                X_test_emb = embeddings[test_indices]
+                
+                # Train the model
+                model = LogisticRegression(max_iter=1000)
+                model.fit(X_train_emb, y_train)
+                
+                # Calculate metrics
+                y_pred = model.predict(X_test_emb)
+                report = classification_report(y_test, y_pred, output_dict=True)
+                conf_matrix = confusion_matrix(y_test, y_pred).tolist()
+                metrics = {
+                    'classification_report': report,
+                    'confusion_matrix': conf_matrix
+                }
+                
+                self.registry.save(
+                    model_name, key, model, metrics, embeddings, train_indices, test_indices,
+                    manifest={
+                        'dataset_hash': self.dataset_hash,
+                        'embedding_model': MODEL_VERSIONS[model_name],
+                        'embedding_backend': self.embedding_factory.backend,
+                        'samples': len(self.data)
+                    }
+                )
+                self.registry.prune(model_name, key)
+                self._use_artifacts(model_name, key)
+                status[model_name] = 'trained'
+            return status
+        finally:
+            self._train_lock.release()
+
+    def select_models(self, model_names: Optional[List[str]] = None) -> List[str]:
+        """Validate a model selection; None selects every trained model"""
+        if not model_names:
+            return list(self.models)
+        unknown = [model_name for model_name in model_names if model_name not in self.MODEL_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown model: {', '.join(unknown)}")
+        untrained = [model_name for model_name in model_names if model_name not in self.models]
+        if untrained:
+            raise ValueError(f"Model not trained: {', '.join(untrained)}")
+        return list(dict.fromkeys(model_names))
+
+    def _predict(self, model_name: str, embeddings: np.ndarray) -> List[Dict[str, Any]]:
+        """Score embeddings with one predict_proba"""
+        model = self.models[model_name]
+        probabilities = model.predict_proba(embeddings)
+        best = probabilities.argmax(axis=1)
+        
+        results = []
+        for i, text_probabilities in enumerate(probabilities):
+            # Columns of predict_proba follow model.classes_, not CATEGORIES
             confidence_scores = {
-                category: float(prob)
-                for category, prob in zip(self.CATEGORIES, probabilities)
+                str(category): float(prob)
+                for category, prob in zip(model.classes_, text_probabilities)
             }
-            
-            results[model_name] = {
-                'prediction': prediction,
-                'confidence': float(max(probabilities)),
+            results.append({
+                'prediction': str(model.classes_[best[i]]),
+                'confidence': float(text_probabilities[best[i]]),
                 'confidence_scores': confidence_scores
-            }
+            })
+        self.projections.add(
+            model_name, self.artifact_keys[model_name], embeddings,
+            [result['prediction'] for result in results]
+        )
+        return results
+
+    def _classify_model(self, texts: List[str], model_name: str) -> List[Dict[str, Any]]:
+        return self._predict(model_name, self.embedding_factory.get_embeddings(texts, model_name))
+
+    async def _aclassify_model(self, texts: List[str], model_name: str) -> List[Dict[str, Any]]:
+        embeddings = await self.embedding_factory.aget_embeddings(texts, model_name, self.executor)
+        return self._predict(model_name, embeddings)
+
+    def classify(self, text: str, model_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Classify a single article using the selected (default: all trained) models"""
+        return self.classify_batch([text], model_names)[0]
+
+    def classify_batch(self, texts: List[str], model_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Classify several articles using the selected models, run concurrently
+        on the classifier's thread pool. Each model embeds the whole batch at
+        once and scores it with a single predict_proba.
+        """
+        model_names = self.select_models(model_names)
+        results = [{} for _ in texts]
+        if not texts:
+            return results
+        
+        futures = {
+            model_name: self.executor.submit(self._classify_model, texts, model_name)
+            for model_name in model_names
+        }
+        for model_name, future in futures.items():
+            for result, model_result in zip(results, future.result()):
+                result[model_name] = model_result
+        
+        return results
+
+    async def aclassify_batch(
+        self,
+        texts: List[str],
+        model_names: Optional[List[str]] = None,
+        mode: str = 'all',
+        threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several articles without blocking the event loop.
+        
+        mode='all' scores every selected model concurrently (local backends
+        on the thread pool, OpenAI through its async client). mode='cascade'
+        tries the selected models from cheapest to most expensive, and each
+        article stops at the first model whose confidence reaches threshold
+        (default CASCADE_THRESHOLD). Its results then hold the models that
+        were evaluated, with 'accepted' set on the one that answered.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        model_names = self.select_models(model_names)
+        results = [{} for _ in texts]
+        if not texts:
+            return results
+        
+        if mode == 'all':
+            model_results = await asyncio.gather(*[
+                self._aclassify_model(texts, model_name) for model_name in model_names
+            ])
+            for model_name, batch_results in zip(model_names, model_results):
+                for result, model_result in zip(results, batch_results):
+                    result[model_name] = model_result
+            return results
+        
+        threshold = self.cascade_threshold if threshold is None else threshold
+        cascade = [model_name for model_name in self.CASCADE_ORDER if model_name in model_names]
+        pending = list(range(len(texts)))
+        for position, model_name in enumerate(cascade):
+            batch_results = await self._aclassify_model([texts[i] for i in pending], model_name)
+            last = position == len(cascade) - 1
+            escalated = []
+            for i, model_result in zip(pending, batch_results):
+                model_result['accepted'] = last or model_result['confidence'] >= threshold
+                results[i][model_name] = model_result
+                if not model_result['accepted']:
+                    escalated.append(i)
+            pending = escalated
+            if not pending:
+                break
         
         return results
 
     def get_model_metrics(self) -> Dict[str, Any]:
-        """Return performance metrics for all models"""
-        return self.metrics 
\ No newline at end of file
+        """Return performance metrics and embedding cache statistics for all models"""
+        return {
+            model_name: dict(
+                metrics,
+                embedding_cache=self.embedding_factory.cache.stats(self.embedding_factory.cache_namespace(model_name))
+            )
+            for model_name, metrics in self.metrics.items()
+        }
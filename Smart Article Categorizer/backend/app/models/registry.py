@@ -0,0 +1,104 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+import hashlib
+import json
+import os
+import shutil
+import joblib
+import numpy as np
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(__file__), '../../artifacts')
+
+class ModelArtifacts:
+    """A trained classifier with its metrics and the training-set embeddings"""
+
+    def __init__(self, classifier, metrics: Dict[str, Any], embeddings: np.ndarray,
+                 train_indices: np.ndarray, test_indices: np.ndarray, manifest: Dict[str, Any]):
+        self.classifier = classifier
+        self.metrics = metrics
+        self.embeddings = embeddings
+        self.train_indices = train_indices
+        self.test_indices = test_indices
+        self.manifest = manifest
+
+class ModelRegistry:
+    """
+    On-disk store of trained models.
+
+    Artifacts are keyed by the dataset hash and the embedding model version,
+    so a change to either produces a new key and is never served stale:
+
+        {MODEL_DIR}/{model_name}/{key}/
+            manifest.json      dataset hash, embedding model version, timestamps
+            classifier.joblib  fitted LogisticRegression
+            metrics.json       classification report and confusion matrix
+            embeddings.npy     training-set embeddings in dataset order (memory-mapped on load)
+            split.npz          train/test row indices into embeddings.npy
+
+    Each artifact directory is written under a temporary name and renamed
+    into place, so a crash during training never leaves a partial artifact.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or os.getenv('MODEL_DIR', DEFAULT_MODEL_DIR))
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def dataset_hash(texts, labels) -> str:
+        payload = json.dumps([[text, label] for text, label in zip(texts, labels)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def artifact_key(dataset_hash: str, model_version: str) -> str:
+        return hashlib.sha256(f"{dataset_hash}:{model_version}".encode('utf-8')).hexdigest()[:16]
+
+    def path(self, model_name: str, key: str) -> str:
+        return os.path.join(self.root, model_name, key)
+
+    def exists(self, model_name: str, key: str) -> bool:
+        return os.path.exists(os.path.join(self.path(model_name, key), 'manifest.json'))
+
+    def save(self, model_name: str, key: str, classifier, metrics: Dict[str, Any], embeddings: np.ndarray,
+             train_indices: np.ndarray, test_indices: np.ndarray, manifest: Dict[str, Any]) -> str:
+        final_path = self.path(model_name, key)
+        tmp_path = final_path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        joblib.dump(classifier, os.path.join(tmp_path, 'classifier.joblib'))
+        np.save(os.path.join(tmp_path, 'embeddings.npy'), np.asarray(embeddings, dtype='float32'))
+        np.savez(os.path.join(tmp_path, 'split.npz'), train=train_indices, test=test_indices)
+        with open(os.path.join(tmp_path, 'metrics.json'), 'w') as f:
+            json.dump(metrics, f)
+        # The manifest is written last; its presence marks a complete artifact
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump(dict(manifest, model_name=model_name, key=key, created_at=datetime.now().isoformat()), f)
+
+        shutil.rmtree(final_path, ignore_errors=True)
+        os.rename(tmp_path, final_path)
+        return final_path
+
+    def load(self, model_name: str, key: str, mmap: bool = True) -> ModelArtifacts:
+        path = self.path(model_name, key)
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        with open(os.path.join(path, 'metrics.json')) as f:
+            metrics = json.load(f)
+        split = np.load(os.path.join(path, 'split.npz'))
+        return ModelArtifacts(
+            classifier=joblib.load(os.path.join(path, 'classifier.joblib')),
+            metrics=metrics,
+            embeddings=np.load(os.path.join(path, 'embeddings.npy'), mmap_mode='r' if mmap else None),
+            train_indices=split['train'],
+            test_indices=split['test'],
+            manifest=manifest
+        )
+
+    def prune(self, model_name: str, keep_key: str):
+        """Remove a model's artifacts other than keep_key"""
+        model_dir = os.path.join(self.root, model_name)
+        if not os.path.isdir(model_dir):
+            return
+        for name in os.listdir(model_dir):
+            if name != keep_key:
+                shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
@@ -0,0 +1,25 @@
+"""
+Train classifiers whose artifacts are missing for the current data and
+embedding model versions, and store them in the model registry.
+
+Usage (from backend/):
+    python -m app.train [--models bert sbert] [--force]
+"""
+import argparse
+
+from .models.classifier import ArticleClassifier
+
+def main():
+    parser = argparse.ArgumentParser(description="Train article classifiers")
+    parser.add_argument('--models', nargs='+', choices=ArticleClassifier.MODEL_NAMES,
+                        help="models to train (default: all enabled)")
+    parser.add_argument('--force', action='store_true', help="retrain even if artifacts are up to date")
+    args = parser.parse_args()
+
+    classifier = ArticleClassifier()
+    status = classifier.train_models(args.models, force=args.force)
+    for model_name, model_status in status.items():
+        print(f"{model_name}: {model_status}")
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,197 @@
 import numpy as np
 from sklearn.decomposition import PCA
-from umap import UMAP
-from typing import Dict, List, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+import joblib
+import os
+import threading
+
+class ProjectionStore:
+    """
+    2-D PCA and UMAP projections of each trained model's embedding matrix.
+
+    Projections are fitted once per model artifact and saved next to it, so
+    they are reused across restarts and replaced when the model is retrained:
+
+        {artifact dir}/projections/
+            pca.joblib, pca.npy     fitted PCA and projected training set
+            umap.joblib, umap.npy   fitted UMAP and projected training set
+
+    PCA is cheap and fitted on first use. UMAP is fitted by a background job.
+    Until it finishes, its projection is reported as pending. Newly classified
+    articles are projected with the fitted transforms rather than refitting.
+    The most recent RECENT_POINTS of them are kept per model; at most one
+    UMAP transform per model is queued, covering every kept point without one.
+    """
+
+    def __init__(self, registry, recent_points: Optional[int] = None):
+        self.registry = registry
+        self.recent_points = recent_points or int(os.getenv('RECENT_POINTS', '500'))
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='projections')
+        self.jobs: Dict[Tuple[str, str], Future] = {}
+        self.projectors: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.points: Dict[Tuple[str, str], Dict[str, np.ndarray]] = {}
+        self.recent: Dict[Tuple[str, str], deque] = {}
+        self.pending_transforms = set()
+        self._lock = threading.RLock()
+
+    def _dir(self, model_name: str, key: str) -> str:
+        return os.path.join(self.registry.path(model_name, key), 'projections')
+
+    def _save(self, model_name: str, key: str, method: str, projector, points: np.ndarray):
+        directory = self._dir(model_name, key)
+        os.makedirs(directory, exist_ok=True)
+        joblib.dump(projector, os.path.join(directory, f'{method}.joblib'))
+        # The .npy is written last and renamed into place; its presence marks a complete projection
+        tmp_path = os.path.join(directory, f'{method}.tmp.npy')
+        np.save(tmp_path, points)
+        os.replace(tmp_path, os.path.join(directory, f'{method}.npy'))
+
+    def _load(self, model_name: str, key: str, method: str) -> bool:
+        cache_key = (model_name, key)
+        if method in self.points.get(cache_key, {}):
+            return True
+        directory = self._dir(model_name, key)
+        points_path = os.path.join(directory, f'{method}.npy')
+        if not os.path.exists(points_path):
+            return False
+        projector = joblib.load(os.path.join(directory, f'{method}.joblib'))
+        self.projectors.setdefault(cache_key, {})[method] = projector
+        self.points.setdefault(cache_key, {})[method] = np.load(points_path)
+        return True
+
+    def _fit_pca(self, model_name: str, key: str, embeddings: np.ndarray):
+        with self._lock:
+            if self._load(model_name, key, 'pca'):
+                return
+            pca = PCA(n_components=2)
+            points = pca.fit_transform(embeddings)
+            self._save(model_name, key, 'pca', pca, points)
+            self.projectors.setdefault((model_name, key), {})['pca'] = pca
+            self.points.setdefault((model_name, key), {})['pca'] = points
+
+    def _fit_umap(self, model_name: str, key: str, embeddings: np.ndarray):
+        self._fit_pca(model_name, key, embeddings)
+        if self._load(model_name, key, 'umap'):
+            return
+        from umap import UMAP
+        umap = UMAP(n_components=2, n_neighbors=min(15, len(embeddings) - 1), random_state=42)
+        points = umap.fit_transform(embeddings)
+        self._save(model_name, key, 'umap', umap, points)
+        with self._lock:
+            self.projectors.setdefault((model_name, key), {})['umap'] = umap
+            self.points.setdefault((model_name, key), {})['umap'] = points
+
+    def forget(self, model_name: str, key: str):
+        """Drop cached projections of an artifact that was replaced on disk"""
+        with self._lock:
+            for cache in (self.jobs, self.projectors, self.points, self.recent):
+                cache.pop((model_name, key), None)
+
+    def ensure(self, model_name: str, key: str, embeddings: np.ndarray) -> Optional[Future]:
+        """Start the background job for projections missing on disk (at most one per artifact)"""
+        if os.path.exists(os.path.join(self._dir(model_name, key), 'umap.npy')):
+            return None
+        with self._lock:
+            job = self.jobs.get((model_name, key))
+            if job is not None and not (job.done() and job.exception() is not None):
+                return job
+            print(f"Computing {model_name} projections in the background...")
+            job = self.executor.submit(self._fit_umap, model_name, key, embeddings)
+
+            def report(job: Future):
+                if job.exception() is not None:
+                    print(f"{model_name} projections failed: {job.exception()!r}")
+
+            job.add_done_callback(report)
+            self.jobs[(model_name, key)] = job
+            return job
+
+    def status(self, model_name: str, key: str) -> str:
+        if self._load(model_name, key, 'umap'):
+            return 'ready'
+        job = self.jobs.get((model_name, key))
+        if job is not None and job.done() and job.exception() is not None:
+            return 'failed'
+        return 'pending'
+
+    def _transform_umap(self, model_name: str, key: str):
+        # Runs on the projection executor after any pending fit, so UMAP is ready if it can be
+        cache_key = (model_name, key)
+        with self._lock:
+            # Points added from here on queue the next transform
+            self.pending_transforms.discard(cache_key)
+            points = [point for point in self.recent.get(cache_key, ()) if point['umap'] is None]
+        if not points or not self._load(model_name, key, 'umap'):
+            return
+        umap = self.projectors[cache_key]['umap']
+        umap_points = umap.transform(np.stack([point['embedding'] for point in points]))
+        for point, xy in zip(points, umap_points):
+            point['umap'] = xy
+
+    def add(self, model_name: str, key: str, embeddings: np.ndarray, labels: List[str]):
+        """Project newly classified articles with the fitted transforms"""
+        cache_key = (model_name, key)
+        with self._lock:
+            self._load(model_name, key, 'pca')
+            pca = self.projectors.get(cache_key, {}).get('pca')
+        if pca is None:
+            # No projection of the training set to place them in yet
+            return
+        pca_points = pca.transform(embeddings)
+        new_points = [
+            {'embedding': np.asarray(embedding, dtype=np.float32), 'pca': xy, 'umap': None, 'label': label}
+            for embedding, xy, label in zip(embeddings, pca_points, labels)
+        ]
+        with self._lock:
+            self.recent.setdefault(cache_key, deque(maxlen=self.recent_points)).extend(new_points)
+            if cache_key in self.pending_transforms:
+                return
+            self.pending_transforms.add(cache_key)
+        # UMAP.transform is much slower than PCA's; keep it off the request path
+        self.executor.submit(self._transform_umap, model_name, key)
+
+    def projections(self, model_name: str, key: str, embeddings: np.ndarray, labels: List[str]) -> Dict[str, Any]:
+        """Cached projections of the training set and recently classified articles"""
+        self._fit_pca(model_name, key, embeddings)
+        umap_status = self.status(model_name, key)
+        if umap_status != 'ready':
+            self.ensure(model_name, key, embeddings)
+
+        with self._lock:
+            points = self.points[(model_name, key)]
+            pca = self.projectors[(model_name, key)]['pca']
+            recent = list(self.recent.get((model_name, key), ()))
+
+        def scatter(xy: np.ndarray, point_labels: List[str]) -> Dict[str, Any]:
+            xy = np.asarray(xy).reshape(-1, 2)
+            return {'x': xy[:, 0].tolist(), 'y': xy[:, 1].tolist(), 'labels': list(point_labels)}
+
+        recent_umap = [point for point in recent if point['umap'] is not None]
+        return {
+            'pca': dict(
+                scatter(points['pca'], labels),
+                variance_explained=pca.explained_variance_ratio_.tolist(),
+                new_points=scatter([point['pca'] for point in recent], [point['label'] for point in recent])
+            ),
+            'umap': dict(
+                scatter(points['umap'], labels) if umap_status == 'ready' else scatter([], []),
+                status=umap_status,
+                new_points=scatter([point['umap'] for point in recent_umap], [point['label'] for point in recent_umap])
+            )
+        }
 
 def create_visualization(classifier) -> Dict[str, Any]:
-    """Create visualization data for embeddings using PCA and UMAP"""
+    """Visualization data for each trained model, served from its cached projections"""
     visualizations = {}
-    
-    for model_name in classifier.models.keys():
-        # Get embeddings for all data points
-        embeddings = np.array([
-            classifier.embedding_factory.get_embedding(text, model_name)
-            for text in classifier.data
-        ])
-        
-        # Apply PCA
-        pca = PCA(n_components=2)
-        pca_result = pca.fit_transform(embeddings)
-        
-        # Apply UMAP
-        umap = UMAP(n_components=2, random_state=42)
-        umap_result = umap.fit_transform(embeddings)
-        
-        # Prepare visualization data
-        visualizations[model_name] = {
-            'pca': {
-                'x': pca_result[:, 0].tolist(),
-                'y': pca_result[:, 1].tolist(),
-                'labels': classifier.labels,
-                'variance_explained': pca.explained_variance_ratio_.tolist()
-            },
-            'umap': {
-                'x': umap_result[:, 0].tolist(),
-                'y': umap_result[:, 1].tolist(),
-                'labels': classifier.labels
-            }
-        }
-    
-    return visualizations 
\ No newline at end of file
+
+    for model_name in list(classifier.models.keys()):
+        visualizations[model_name] = classifier.projections.projections(
+            model_name,
+            classifier.artifact_keys[model_name],
+            classifier.embeddings[model_name],
+            classifier.labels
+        )
+
+    return visualizations
@@ -0,0 +1,58 @@
+"""
+Throughput of per-article classification versus classify_batch.
+
+Uses the trained models in the registry (run `python -m app.train` first)
+and the backends in ENABLED_MODELS. Batches are built by cycling through
+the sample articles, each with a distinct suffix.
+
+Usage (from backend/):
+    python benchmarks/bench_batch.py [--sizes 1 32 256] [--repeats 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.models.classifier import ArticleClassifier
+
+def best_time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched classification")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1, 32, 256])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # Time the embedding models, not embedding cache hits on repeated texts
+    os.environ['EMBEDDING_CACHE_MODELS'] = ''
+    classifier = ArticleClassifier()
+    if not classifier.models:
+        sys.exit("No trained models; run `python -m app.train` first")
+    print(f"Models: {', '.join(classifier.models)}")
+
+    # Load every backend before timing
+    classifier.classify_batch(classifier.data[:1])
+
+    print(f"{'batch':>6}{'per-article':>14}{'batched':>12}{'speedup':>10}")
+    for size in args.sizes:
+        texts = [
+            f"{classifier.data[i % len(classifier.data)]} ({i})"
+            for i in range(size)
+        ]
+        sequential = best_time(lambda: [classifier.classify(text) for text in texts], args.repeats)
+        batched = best_time(lambda: classifier.classify_batch(texts), args.repeats)
+        print(
+            f"{size:>6}{size / sequential:>10.1f}/s{size / batched:>10.1f}/s"
+            f"{sequential / batched:>9.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
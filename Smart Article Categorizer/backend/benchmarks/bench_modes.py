@@ -0,0 +1,77 @@
+"""
+Per-request latency of the classification modes.
+
+Classifies the sample articles one request at a time with:
+  sequential   every trained model, one after another
+  all          every trained model concurrently (aclassify_batch mode='all')
+  cascade      cheapest model first, escalating below the threshold
+  <model>      a single selected model
+
+Uses the trained models in the registry (run `python -m app.train` first).
+
+Usage (from backend/):
+    python benchmarks/bench_modes.py [--threshold 0.7] [--rounds 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.models.classifier import ArticleClassifier
+
+def sequential(classifier: ArticleClassifier, text: str):
+    return {
+        model_name: classifier._classify_model([text], model_name)[0]
+        for model_name in classifier.models
+    }
+
+async def measure(classifier: ArticleClassifier, texts, rounds: int, mode: str, **options):
+    latencies = []
+    escalated = 0
+    for _ in range(rounds):
+        for text in texts:
+            start = time.perf_counter()
+            if mode == 'sequential':
+                result = sequential(classifier, text)
+            else:
+                result = (await classifier.aclassify_batch([text], mode=mode, **options))[0]
+            latencies.append(time.perf_counter() - start)
+            if mode == 'cascade' and len(result) > 1:
+                escalated += 1
+    return np.array(latencies) * 1000, escalated / len(latencies)
+
+async def run(args):
+    # Time the embedding models, not embedding cache hits on repeated texts
+    os.environ['EMBEDDING_CACHE_MODELS'] = ''
+    classifier = ArticleClassifier()
+    if not classifier.models:
+        sys.exit("No trained models; run `python -m app.train` first")
+
+    # Load every backend before timing
+    classifier.classify_batch(classifier.data[:1])
+
+    runs = [('sequential', 'sequential', {}), ('all', 'all', {})]
+    runs.append(('cascade', 'cascade', {'threshold': args.threshold}))
+    runs.extend((model_name, 'all', {'model_names': [model_name]}) for model_name in classifier.models)
+
+    print(f"{'mode':<12}{'p50':>10}{'p95':>10}{'mean':>10}{'escalated':>11}")
+    for label, mode, options in runs:
+        latencies, escalated = await measure(classifier, classifier.data, args.rounds, mode, **options)
+        print(
+            f"{label:<12}{np.percentile(latencies, 50):>8.1f}ms{np.percentile(latencies, 95):>8.1f}ms"
+            f"{latencies.mean():>8.1f}ms" + (f"{escalated:>10.0%}" if mode == 'cascade' else "")
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classification modes")
+    parser.add_argument('--threshold', type=float, default=None, help="cascade threshold (default: CASCADE_THRESHOLD)")
+    parser.add_argument('--rounds', type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Startup time and memory of the embedding backends.
+
+Each configuration runs in a fresh subprocess that reports the RSS after
+import, after constructing EmbeddingFactory, and after the first embedding
+per enabled model (which is when lazy backends load).
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--configs word2vec sbert bert,sbert ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFAULT_CONFIGS = ['word2vec', 'bert', 'sbert', 'word2vec,bert,sbert']
+
+PROBE = """
+import json, time
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+report = {'import_rss_mb': rss_mb()}
+start = time.perf_counter()
+from app.embeddings.embedding_factory import EmbeddingFactory
+factory = EmbeddingFactory()
+report['construct_s'] = time.perf_counter() - start
+report['construct_rss_mb'] = rss_mb()
+start = time.perf_counter()
+for model_name in factory.enabled_models:
+    factory.get_embedding('Stock market reaches record high as tech stocks surge', model_name)
+report['first_embedding_s'] = time.perf_counter() - start
+report['loaded_rss_mb'] = rss_mb()
+print(json.dumps(report))
+"""
+
+def run_config(models: str) -> dict:
+    env = dict(os.environ, ENABLED_MODELS=models, MODEL_IDLE_TIMEOUT='0')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backend startup")
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS,
+                        help="comma-separated ENABLED_MODELS values to compare")
+    args = parser.parse_args()
+
+    print(f"{'ENABLED_MODELS':<24}{'construct':>11}{'RSS':>9}{'first use':>11}{'RSS loaded':>12}")
+    for models in args.configs:
+        try:
+            report = run_config(models)
+        except subprocess.CalledProcessError as e:
+            print(f"{models:<24} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(
+            f"{models:<24}{report['construct_s'] * 1000:>9.1f}ms{report['construct_rss_mb']:>7.0f}MB"
+            f"{report['first_embedding_s']:>10.2f}s{report['loaded_rss_mb']:>10.0f}MB"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -22,18 +22,40 @@ app.add_middleware(
 
 # Initialize models
 classifier = ArticleClassifier()
+classifier.start_projections()
 
-class ArticleInput(BaseModel):
+class ClassifyOptions(BaseModel):
+    models: Optional[List[str]] = None  # default: all trained models
+    mode: str = "all"  # "all" or "cascade"
+    threshold: Optional[float] = None  # cascade confidence threshold (default CASCADE_THRESHOLD)
+
+class ArticleInput(ClassifyOptions):
     text: str
 
-class BatchArticleInput(BaseModel):
+class BatchArticleInput(ClassifyOptions):
     articles: List[str]
 
+class TrainRequest(BaseModel):
+    models: Optional[List[str]] = None
+    force: bool = False
+
+def require_trained_models():
+    if not classifier.models:
+        raise HTTPException(
+            status_code=503,
+            detail="No trained models; run `python -m app.train` or POST /api/train"
+        )
+
 @app.post("/api/classify")
 async def classify_article(article: ArticleInput):
+    require_trained_models()
     try:
-        results = classifier.classify(article.text)
-        return results
+        results = await classifier.aclassify_batch(
+            [article.text], article.models, mode=article.mode, threshold=article.threshold
+        )
+        return results[0]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -45,16 +67,33 @@ async def get_model_metrics():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/train")
+def train_models(request: TrainRequest):
+    """Retrain models whose data or embedding model changed (all selected ones with force)"""
+    try:
+        status = classifier.train_models(request.models, force=request.force)
+        classifier.start_projections()
+        return {"status": status, "stale_models": classifier.stale_models()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @app.post("/api/batch")
 async def batch_classify(articles: BatchArticleInput):
+    require_trained_models()
     try:
-        results = [classifier.classify(text) for text in articles.articles]
+        results = await classifier.aclassify_batch(
+            articles.articles, articles.models, mode=articles.mode, threshold=articles.threshold
+        )
         return results
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/visualize")
-async def get_visualization():
+def get_visualization():
     try:
         visualization_data = create_visualization(classifier)
         return visualization_data
@@ -19,7 +19,7 @@ import {
     ResponsiveContainer
 } from 'recharts';
 import axios from 'axios';
-import { VisualizationData } from '../types';
+import { ProjectedPoints, VisualizationData } from '../types';
 
 const VisualizationDisplay: React.FC = () => {
     const [visualizationData, setVisualizationData] = useState<VisualizationData | null>(null);
@@ -56,8 +56,7 @@ const VisualizationDisplay: React.FC = () => {
         );
     }
 
-    const prepareChartData = () => {
-        const data = visualizationData[selectedModel][visualizationType];
+    const prepareChartData = (data: ProjectedPoints) => {
         return data.x.map((x, i) => ({
             x: x,
             y: data.y[i],
@@ -65,6 +64,8 @@ const VisualizationDisplay: React.FC = () => {
         }));
     };
 
+    const projection = visualizationData[selectedModel][visualizationType];
+
     const modelNames = {
         'word2vec': 'Word2Vec',
         'bert': 'BERT',
@@ -139,13 +140,26 @@ const VisualizationDisplay: React.FC = () => {
                         <Legend />
                         <Scatter
                             name="Articles"
-                            data={prepareChartData()}
+                            data={prepareChartData(projection)}
                             fill="#8884d8"
                         />
+                        <Scatter
+                            name="Recently classified"
+                            data={prepareChartData(projection.new_points)}
+                            fill="#ff7300"
+                        />
                     </ScatterChart>
                 </ResponsiveContainer>
             </Paper>
 
+            {visualizationType === 'umap' && visualizationData[selectedModel].umap.status !== 'ready' && (
+                <Typography variant="body2" sx={{ mt: 1, textAlign: 'center' }}>
+                    {visualizationData[selectedModel].umap.status === 'pending'
+                        ? 'UMAP projection is being computed; reload in a moment.'
+                        : 'UMAP projection failed; see the server log.'}
+                </Typography>
+            )}
+
             {visualizationType === 'pca' && (
                 <Typography variant="body2" sx={{ mt: 1, textAlign: 'center' }}>
                     Variance Explained: {
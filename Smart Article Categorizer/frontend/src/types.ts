@@ -4,6 +4,7 @@ export interface ModelResult {
     confidence_scores: {
         [key: string]: number;
     };
+    accepted?: boolean;  // cascade mode: this model's answer was used
 }
 
 export interface ClassificationResult {
@@ -20,20 +21,30 @@ export interface ModelMetrics {
         };
     };
     confusion_matrix: number[][];
+    embedding_cache?: {
+        memory_hits: number;
+        disk_hits: number;
+        misses: number;
+        lookups: number;
+        hit_rate: number;
+    };
+}
+
+export interface ProjectedPoints {
+    x: number[];
+    y: number[];
+    labels: string[];
 }
 
 export interface VisualizationData {
     [key: string]: {
-        pca: {
-            x: number[];
-            y: number[];
-            labels: string[];
+        pca: ProjectedPoints & {
             variance_explained: number[];
+            new_points: ProjectedPoints;  // recently classified articles, labelled by prediction
         };
-        umap: {
-            x: number[];
-            y: number[];
-            labels: string[];
+        umap: ProjectedPoints & {
+            status: 'ready' | 'pending' | 'failed';  // UMAP is fitted by a background job
+            new_points: ProjectedPoints;
         };
     };
 } 
\ No newline at end of file